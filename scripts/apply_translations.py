@@ -1,15 +1,26 @@
 #!/usr/bin/env python3
 """Apply translations from batch files to vi.ndjson."""
 
+import argparse
 import json
 import re
 from pathlib import Path
 from collections import defaultdict
 
-def load_translations():
+import script_stats
+from catalog_codec import decode
+from catalog_compression import compression_of
+from catalog_io import CatalogWriter, encode_record, iter_shard_lines, line_ending, map_shards, rewrite_lines
+from catalog_shards import is_sharded, resolve_catalog
+from script_stats import get_stats
+from source_index import open_index, read_lines
+from text_templates import expand_translations
+
+TRANSLATIONS_DIR = Path(__file__).parent.parent / "translations"
+
+def load_translations(trans_dir=TRANSLATIONS_DIR):
     """Load all translation files."""
     translations = {}
-    trans_dir = Path(__file__).parent.parent / "translations"
 
     # Load main translations file
     main_file = trans_dir / "translations_all.json"
@@ -33,54 +44,151 @@ def load_translations():
     print(f"Loaded {len(translations)} translations")
     return translations
 
-def main():
-    trans_dir = Path(__file__).parent.parent / "translations"
-    vi_file = trans_dir / "vi.ndjson"
-    output_file = trans_dir / "vi.ndjson.new"
-
-    translations = load_translations()
+def load_template_translations(path):
+    """Load a translated to_translate.json; template items are expanded onto every variant."""
+    print(f"Loading {path.name}...")
+    with open(path, "r", encoding="utf-8") as f:
+        translations, rejected = expand_translations(json.load(f))
+    print(f"Loaded {len(translations)} translations from {path.name}")
+    if rejected:
+        print(f"  Skipped {rejected} template variants whose translation does not use every ⟦n⟧ slot exactly")
+    return translations
 
+def _apply_shard(shard, translations):
+    """Apply translations to one catalog shard; returns the re-encoded ``(line, bytes)`` of updated entries."""
+    changes = []
     updated_count = 0
     total_count = 0
+    line_num = 0
+
+    for line_num, raw in iter_shard_lines(shard):
+        line = raw.decode("utf-8").strip()
+        if not line:
+            continue
+
+        try:
+            entry = decode(line)
+        except json.JSONDecodeError:
+            continue
+
+        total_count += 1
+
+        if apply_entry(entry, translations):
+            updated_count += 1
+            changes.append((line_num, encode_record(entry, line_ending(raw))))
+
+    return line_num, (changes, updated_count, total_count)
+
+def apply_entry(entry, translations):
+    """Set the translation of an untranslated entry whose original text has one; returns True if changed."""
+    source = entry.get("source")
+    locres_import = entry.get("locresImport")
+    original = source if source is not None else locres_import
+    translated = entry.get("translated")
+
+    if original and original in translations and (translated == original or translated is None):
+        entry["translated"] = translations[original]
+        return True
+    return False
+
+def apply_indexed(vi_file, output_file, translations):
+    """Patch only the records the source index lists for the batch originals.
+
+    Every other line is copied through as raw bytes. Returns ``(updated, indexed, checked)``:
+    ``indexed`` counts the records in the index, not catalog lines, and
+    ``checked`` the postings looked at.
+    """
+    index = open_index(vi_file)
+    postings = sorted(
+        (posting for found in index.find(translations).values() for posting in found if posting.untranslated),
+        key=lambda posting: posting.offset,
+    )
+    get_stats().count("lines", len(postings))
 
-    print("Processing vi.ndjson...")
-    with open(vi_file, "r", encoding="utf-8") as f_in, \
-         open(output_file, "w", encoding="utf-8") as f_out:
-
-        for line in f_in:
-            line = line.strip()
-            if not line:
-                f_out.write("\n")
-                continue
-
+    updated_count = 0
+    with open(vi_file, "rb") as f_in, CatalogWriter(output_file, mode_from=vi_file) as writer:
+        position = 0
+        for posting, raw in read_lines(vi_file, postings):
             try:
-                entry = json.loads(line)
+                entry = decode(raw)
             except json.JSONDecodeError:
-                f_out.write(line + "\n")
                 continue
+            if not isinstance(entry, dict) or not apply_entry(entry, translations):
+                continue
+            writer.copy(f_in, posting.offset - position)
+            f_in.readline()
+            writer.write_record(entry, line_ending(raw))
+            position = posting.offset + len(raw)
+            updated_count += 1
+        writer.copy(f_in)
+
+    return updated_count, len(index), len(postings)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Apply batch translations to vi.ndjson")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes for --no-index (default: CPU count)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="Re-encode the whole catalog instead of patching the records found via the source index")
+    parser.add_argument("--templates", type=Path, default=None,
+                        help="Translated to_translate.json from extract_untranslated.py --templates to apply as well")
+    parser.add_argument("--translations-dir", type=Path, default=TRANSLATIONS_DIR,
+                        help="Directory holding vi.ndjson and the translation files")
+    script_stats.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    stats = script_stats.start("apply_translations", args)
+    trans_dir = args.translations_dir
+    vi_file = resolve_catalog(trans_dir / "vi.ndjson")
+    sharded = is_sharded(vi_file)
+    if compression_of(vi_file):
+        # Keep the compression suffix last so the output is written compressed too
+        output_file = vi_file.with_name(vi_file.name.replace(".ndjson", ".new.ndjson", 1))
+    else:
+        output_file = vi_file.with_name(vi_file.name + ".new")
+    # The source index covers plain single-file catalogs only; others are scanned
+    indexed = not sharded and not compression_of(vi_file)
+
+    with stats.phase("load translations") as timer:
+        translations = load_translations(trans_dir)
+        if args.templates:
+            translations.update(load_template_translations(args.templates))
+        timer.records = len(translations)
 
-            total_count += 1
-
-            # Get original text
-            source = entry.get("source")
-            locres_import = entry.get("locresImport")
-            original = source if source is not None else locres_import
-            translated = entry.get("translated")
-
-            # Check if this needs translation
-            if original and original in translations:
-                # Check if currently untranslated (translated == original)
-                if translated == original or translated is None:
-                    entry["translated"] = translations[original]
-                    updated_count += 1
-
-            f_out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    updated_count = 0
+    total_count = 0
+    indexed_count = 0
+    checked_count = 0
 
-    print(f"\nProcessed {total_count} entries")
+    print("Processing vi.ndjson...")
+    if args.no_index or not indexed:
+        replacements = {}
+        with stats.phase("apply"), stats.profiled():
+            for offset, (changes, updated, total) in map_shards(vi_file, _apply_shard, translations, jobs=args.jobs):
+                for line_num, text in changes:
+                    replacements[offset + line_num] = text
+                updated_count += updated
+                total_count += total
+        with stats.phase("rewrite") as timer:
+            rewrite_lines(vi_file, replacements, output_file)
+            timer.records = len(replacements)
+    else:
+        with stats.phase("apply"), stats.profiled():
+            updated_count, indexed_count, checked_count = apply_indexed(vi_file, output_file, translations)
+    stats.count("updated", updated_count)
+
+    if args.no_index or not indexed:
+        print(f"\nProcessed {total_count} entries")
+    else:
+        print(f"\n{indexed_count} indexed records, {checked_count} postings checked")
     print(f"Updated {updated_count} translations")
     print(f"\nOutput written to: {output_file}")
     print("\nTo apply changes, run:")
-    print(f"  mv {output_file} {vi_file}")
+    if sharded:
+        print(f"  rm -r {vi_file} && mv {output_file} {vi_file}")
+    else:
+        print(f"  mv {output_file} {vi_file}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Time ``catalog_codec`` against plain ``json`` on a catalog.
+
+Decodes every line of the catalog with ``json.loads`` and with each
+available ``catalog_codec`` decoder, then re-encodes the records with
+``json.dumps(ensure_ascii=False)`` and ``catalog_codec.encode``. Before any
+numbers are printed, every result is checked to be identical to the ``json``
+one, so a run doubles as a compatibility check on real data.
+
+    python scripts/bench_codec.py --input translations/vi.ndjson --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Tuple
+
+import catalog_codec
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_INPUT = SCRIPTS_DIR.parent / "translations" / "vi.ndjson"
+
+
+def read_lines(path: Path, limit: int | None) -> List[bytes]:
+    lines: List[bytes] = []
+    with path.open("rb") as handle:
+        for raw in handle:
+            line = raw.strip()
+            if line:
+                lines.append(line)
+                if limit is not None and len(lines) >= limit:
+                    break
+    return lines
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def report(label: str, seconds: float, baseline: float, count: int) -> None:
+    rate = count / seconds if seconds else float("inf")
+    print(f"  {label:<24} {seconds:8.3f}s  {rate / 1000:9.1f}k lines/s  {baseline / seconds:5.2f}x")
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark catalog_codec against json")
+    parser.add_argument("--input", default=str(DEFAULT_INPUT), help="Catalog to read (default: translations/vi.ndjson)")
+    parser.add_argument("--lines", type=int, default=None, help="Only use the first N records")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best is reported (default: %(default)s)")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    path = Path(args.input)
+    if not path.is_file():
+        raise RuntimeError(f"Catalog not found: {path}")
+    lines = read_lines(path, args.lines)
+    size = sum(len(line) for line in lines)
+    print(f"{path.name}: {len(lines)} lines, {size / (1 << 20):.1f} MiB, decode backend: {catalog_codec.BACKEND}")
+
+    decoders = [("json.loads", json.loads), ("catalog_codec (json)", catalog_codec._decode_json)]
+    if catalog_codec.orjson is not None:
+        decoders.append(("catalog_codec (orjson)", catalog_codec._decode_orjson))
+
+    print("decode")
+    baseline = 0.0
+    records: List[Any] = []
+    for label, decoder in decoders:
+        seconds, decoded = best_time(lambda: [decoder(line) for line in lines], args.repeat)
+        if not records:
+            baseline, records = seconds, decoded
+        elif decoded != records:
+            raise RuntimeError(f"{label} decoded differently from json.loads")
+        report(label, seconds, baseline, len(lines))
+
+    print("encode")
+    baseline, expected = best_time(lambda: [json.dumps(record, ensure_ascii=False) for record in records], args.repeat)
+    report("json.dumps", baseline, baseline, len(records))
+    seconds, encoded = best_time(lambda: [catalog_codec.encode(record) for record in records], args.repeat)
+    if encoded != expected:
+        raise RuntimeError("catalog_codec.encode output differs from json.dumps")
+    report("catalog_codec.encode", seconds, baseline, len(records))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
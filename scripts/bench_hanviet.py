@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Time the Hán-Việt conversion stage on a catalog.
+
+A synthetic dictionary is built from the catalog's own sources: every Han
+character gets a reading, plus ``--phrases`` phrases of 2-6 characters
+sampled from the sources. The run measures loading that dictionary, converting
+every unique source without the memo (trie and a plain dict longest-match
+for comparison), and the memoized conversion of every record as the
+pipeline pass sees them. The trie output is checked against the dict one
+before any numbers are printed.
+
+    python scripts/bench_hanviet.py --input translations/vi.ndjson --phrases 200000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import hanviet
+from catalog_codec import decode
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_INPUT = SCRIPTS_DIR.parent / "translations" / "vi.ndjson"
+
+_ONSETS = ("", "b", "c", "ch", "d", "đ", "gi", "h", "kh", "l", "m", "n", "ng", "nh", "ph", "qu", "s", "t", "th", "tr", "v", "x")
+_RHYMES = ("a", "ai", "an", "ang", "anh", "ao", "âm", "ân", "ê", "i", "iên", "inh", "o", "ô", "ông", "u", "uân", "ưu", "ương", "y")
+_HAN_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+
+class DictTrie:
+    """Longest match by slicing into a plain dict, for checking and comparing ``HanVietTrie``."""
+
+    def __init__(self, entries: Dict[str, str]) -> None:
+        self.entries = entries
+        self.longest = max(map(len, entries), default=0)
+
+    def longest_match(self, text: str, start: int) -> Tuple[int, Optional[str]]:
+        for end in range(min(len(text), start + self.longest), start, -1):
+            reading = self.entries.get(text[start:end])
+            if reading is not None:
+                return end, reading
+        return start, None
+
+
+def read_sources(path: Path, limit: Optional[int]) -> List[str]:
+    sources: List[str] = []
+    with path.open("rb") as handle:
+        for raw in handle:
+            line = raw.strip()
+            if not line:
+                continue
+            record = decode(line)
+            if isinstance(record, dict) and isinstance(record.get("source"), str):
+                sources.append(record["source"])
+                if limit is not None and len(sources) >= limit:
+                    break
+    return sources
+
+
+def synthetic_dictionary(sources: Iterable[str], phrases: int, seed: int) -> Dict[str, str]:
+    rng = random.Random(seed)
+    syllables = [onset + rhyme for onset in _ONSETS for rhyme in _RHYMES]
+    runs = [run for source in set(sources) for run in _HAN_RUN.findall(source)]
+    chars = sorted({char for run in runs for char in run})
+    entries = {char: rng.choice(syllables) for char in chars}
+    runs = [run for run in runs if len(run) >= 2]
+    for _ in range(phrases if runs else 0):
+        run = rng.choice(runs)
+        length = rng.randint(2, min(6, len(run)))
+        start = rng.randrange(len(run) - length + 1)
+        phrase = run[start:start + length]
+        entries[phrase] = " ".join(rng.choice(syllables) for _ in phrase)
+    return entries
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def report(label: str, seconds: float, count: int, unit: str, chars: Optional[int] = None) -> None:
+    rate = count / seconds if seconds else float("inf")
+    line = f"  {label:<28} {seconds:8.3f}s  {rate / 1000:9.1f}k {unit}/s"
+    if chars is not None:
+        line += f"  {chars / seconds / 1e6:6.2f}M chars/s"
+    print(line)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Hán-Việt conversion stage")
+    parser.add_argument("--input", default=str(DEFAULT_INPUT), help="Catalog to read (default: translations/vi.ndjson)")
+    parser.add_argument("--lines", type=int, default=None, help="Only use the first N records")
+    parser.add_argument("--phrases", type=int, default=100_000, help="Synthetic phrases to add (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the synthetic dictionary (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best is reported (default: %(default)s)")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    path = Path(args.input)
+    if not path.is_file():
+        raise RuntimeError(f"Catalog not found: {path}")
+    sources = read_sources(path, args.lines)
+    unique = list(dict.fromkeys(sources))
+    unique_chars = sum(map(len, unique))
+    entries = synthetic_dictionary(unique, args.phrases, args.seed)
+    print(f"{path.name}: {len(sources)} sources ({len(unique)} unique, {unique_chars} characters); "
+          f"dictionary: {len(entries)} entries")
+
+    with tempfile.TemporaryDirectory(prefix="hanviet-bench-") as tmp:
+        dict_path = Path(tmp) / "dict.txt"
+        dict_path.write_text("".join(f"{phrase}={reading}\n" for phrase, reading in entries.items()), encoding="utf-8")
+        load_seconds, trie = best_time(lambda: hanviet.load_dictionary([dict_path]), args.repeat)
+    cased = {phrase: hanviet._cased(reading, "title") for phrase, reading in entries.items()}
+
+    converters = {
+        "trie": lambda: hanviet.HanVietConverter(trie),
+        "dict": lambda: hanviet.HanVietConverter(DictTrie(cased)),  # type: ignore[arg-type]
+    }
+    results: Dict[str, Tuple[float, List[Optional[str]]]] = {}
+    for label, make in converters.items():
+        def convert_all() -> List[Optional[str]]:
+            convert = make()._convert_text
+            return [convert(text) if hanviet._HAN.search(text) else None for text in unique]
+
+        results[label] = best_time(convert_all, args.repeat)
+    if results["trie"][1] != results["dict"][1]:
+        raise RuntimeError("HanVietTrie and the dict longest-match converted differently")
+
+    def convert_records() -> int:
+        converter = hanviet.HanVietConverter(trie)
+        return sum(converter.convert(text) is not None for text in sources)
+
+    memo_seconds, converted = best_time(convert_records, args.repeat)
+
+    print(f"load ({trie.nodes} trie nodes, longest entry {trie.longest})")
+    report("load_dictionary", load_seconds, len(entries), "entries")
+    print("convert unique sources (no memo)")
+    report("HanVietTrie", results["trie"][0], len(unique), "texts", unique_chars)
+    report("dict longest-match", results["dict"][0], len(unique), "texts", unique_chars)
+    print(f"convert every record (memoized; {converted} fully converted)")
+    report("HanVietConverter.convert", memo_seconds, len(sources), "records")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""Benchmark the catalog scripts on synthetic catalogs and flag regressions.
+
+For each requested catalog size a deterministic dataset is generated with
+``synth_catalog.py`` (catalog, translations_all.json, game locres), then
+every phase in ``PHASES`` runs as its own process, ``--repeat`` times, once
+per ``--formats`` entry: ``plain`` is the generated ``vi.ndjson``, ``gz`` and
+``xz`` a compressed copy of it (at ``$CATALOG_COMPRESSION_LEVEL``, else the
+default level) that the scripts read and write in place. The best wall time,
+the peak RSS and the stored catalog size are recorded. Peak RSS is the
+largest resident set of the script or any of its worker processes (``wait4``
+rusage), in MiB; on Linux it never reads below the runner's own (small)
+resident set, which child processes inherit as their starting peak.
+
+Results go to ``--output`` as JSON. Given a previous result file as
+``--baseline``, the run fails (exit status 1) when a phase got slower by more
+than ``--threshold`` percent (and by at least ``--min-delta`` seconds, to
+ignore noise on tiny runs) or grew its peak RSS by more than
+``--rss-threshold`` percent.
+
+The run also fails when the streaming locres build stops being bounded in
+memory: ``build_locres.py --jobs 1`` runs on the two ``--memory-check``
+catalog sizes, and its peak RSS may grow by at most ``--memory-budget`` (the
+spool budget passed to it) from the smaller to the larger. The sizes should
+be large enough for the smaller build to fill the spool and the
+source-hash cache already; what may still grow is the string-table index
+(one digest per unique text)::
+
+    python scripts/bench_scripts.py --records 10000,200000 --output bench.json
+    python scripts/bench_scripts.py --records 10000,200000 --baseline bench.json --output new.json
+    python scripts/bench_scripts.py --records 200000 --formats plain,gz,xz --phases build_locres,import_locres
+    python scripts/bench_scripts.py --records 10000 --memory-check ''   # skip the memory check
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import synth_catalog
+from catalog_compression import COMPRESSIONS, LEVEL_ENV
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# build_locres.DEFAULT_MEMORY_BUDGET_MB (not imported: the runner's own peak RSS
+# would rise with pylocres, and the measured scripts start from it).
+DEFAULT_MEMORY_BUDGET_MB = 64
+
+PLAIN = "plain"
+# --formats values: plain plus the compression suffixes without their dot
+FORMATS = [PLAIN] + [suffix.lstrip(".") for suffix in COMPRESSIONS]
+
+
+class Phase(NamedTuple):
+    script: str
+    # Arguments; {catalog}, {copy}, {dir}, {locres} and {jobs} are filled in per run.
+    args: Tuple[str, ...]
+    ok_status: Tuple[int, ...] = (0,)
+    warmup: bool = False  # run once untimed first (builds the source index)
+    fresh_copy: bool = False  # the script rewrites its catalog: give each run a new copy at {copy}
+
+
+PHASES: Dict[str, Phase] = {
+    "validate": Phase("validate-translations.py", ("{catalog}", "--jobs", "{jobs}"), ok_status=(0, 1)),
+    "extract": Phase("extract_untranslated.py", ("--no-index", "--translations-dir", "{dir}", "--jobs", "{jobs}")),
+    "extract_indexed": Phase("extract_untranslated.py", ("--translations-dir", "{dir}"), warmup=True),
+    "apply": Phase("apply_translations.py", ("--no-index", "--translations-dir", "{dir}", "--jobs", "{jobs}")),
+    "apply_indexed": Phase("apply_translations.py", ("--translations-dir", "{dir}"), warmup=True),
+    "build_locres": Phase(
+        "build_locres.py", ("--input", "{catalog}", "--output", "{dir}/built.locres", "--jobs", "{jobs}")
+    ),
+    "import_locres": Phase("import_locres.py", ("--locres", "{locres}", "--catalog", "{copy}"), fresh_copy=True),
+    "import_locres_memory": Phase(
+        "import_locres.py",
+        ("--locres", "{locres}", "--catalog", "{copy}", "--in-memory", "--jobs", "{jobs}"),
+        fresh_copy=True,
+    ),
+}
+
+
+class Measurement(NamedTuple):
+    seconds: float
+    peak_rss_mib: Optional[float]
+
+
+def _rss_mib(max_rss: int) -> float:
+    # ru_maxrss is in bytes on macOS and KiB elsewhere.
+    return max_rss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def run_measured(argv: Sequence[str], cwd: Path, log_path: Path) -> Tuple[int, Measurement]:
+    """Run ``argv`` to completion; returns its exit status, wall time and peak RSS."""
+    with log_path.open("ab") as log:
+        started = time.perf_counter()
+        process = subprocess.Popen(argv, cwd=str(cwd), stdout=log, stderr=subprocess.STDOUT)
+        if hasattr(os, "wait4"):
+            _pid, wait_status, usage = os.wait4(process.pid, 0)
+            seconds = time.perf_counter() - started
+            process.returncode = status = os.waitstatus_to_exitcode(wait_status)
+            return status, Measurement(seconds, _rss_mib(usage.ru_maxrss))
+        status = process.wait()
+        return status, Measurement(time.perf_counter() - started, None)
+
+
+class Dataset(NamedTuple):
+    records: int
+    directory: Path
+    catalog: Path
+    locres: Path
+    format: str = PLAIN
+
+
+def prepare_dataset(work_dir: Path, records: int, seed: int) -> Dataset:
+    """Generate (or reuse, when generated with the same parameters) the dataset for ``records``."""
+    directory = work_dir / f"records-{records}"
+    dataset = Dataset(records, directory, directory / "vi.ndjson", directory / "Game.locres")
+    stamp_path = directory / "synth.json"
+    stamp = {"records": records, "seed": seed, "generator_mtime": Path(synth_catalog.__file__).stat().st_mtime}
+    if stamp_path.is_file() and json.loads(stamp_path.read_text(encoding="utf-8")) == stamp:
+        return dataset
+
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+    print(f"Generating {records} records in {directory}...")
+    # In a child process: on Linux the measured scripts inherit this process's peak RSS.
+    subprocess.run(
+        [
+            sys.executable,
+            synth_catalog.__file__,
+            "--records",
+            str(records),
+            "--seed",
+            str(seed),
+            "--output",
+            str(dataset.catalog),
+            "--translations",
+            str(directory / "translations_all.json"),
+            "--locres",
+            str(dataset.locres),
+        ],
+        check=True,
+    )
+    stamp_path.write_text(json.dumps(stamp), encoding="utf-8")
+    return dataset
+
+
+def prepare_format(dataset: Dataset, catalog_format: str) -> Dataset:
+    """``dataset`` with its catalog stored as ``catalog_format`` (in a subdirectory for compressed ones)."""
+    if catalog_format == PLAIN:
+        return dataset
+    directory = dataset.directory / catalog_format
+    catalog = directory / f"{dataset.catalog.name}.{catalog_format}"
+    compressed = dataset._replace(directory=directory, catalog=catalog, format=catalog_format)
+    stamp_path = directory / "format.json"
+    stamp = {
+        "source": (dataset.directory / "synth.json").read_text(encoding="utf-8"),
+        "level": os.environ.get(LEVEL_ENV, ""),
+    }
+    if stamp_path.is_file() and json.loads(stamp_path.read_text(encoding="utf-8")) == stamp:
+        return compressed
+
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+    print(f"Compressing {dataset.catalog} to {catalog}...")
+    subprocess.run(
+        [
+            sys.executable,
+            str(SCRIPTS_DIR / "compress_catalog.py"),
+            str(dataset.catalog),
+            "--format",
+            catalog_format,
+            "--output",
+            str(catalog),
+            "--keep",
+        ],
+        check=True,
+    )
+    # extract/apply find the catalog and translations_all.json through --translations-dir.
+    shutil.copyfile(dataset.directory / "translations_all.json", directory / "translations_all.json")
+    stamp_path.write_text(json.dumps(stamp), encoding="utf-8")
+    return compressed
+
+
+def run_phase(name: str, dataset: Dataset, repeat: int, jobs: int) -> dict:
+    phase = PHASES[name]
+    copy = dataset.directory / f"work{''.join(dataset.catalog.suffixes)}"
+    values = {
+        "catalog": str(dataset.catalog),
+        "copy": str(copy),
+        "dir": str(dataset.directory),
+        "locres": str(dataset.locres),
+        "jobs": str(jobs),
+    }
+    argv = [sys.executable, str(SCRIPTS_DIR / phase.script)] + [arg.format(**values) for arg in phase.args]
+    log_path = dataset.directory / f"{name}.log"
+    log_path.unlink(missing_ok=True)
+
+    runs: List[Measurement] = []
+    for attempt in range(repeat + (1 if phase.warmup else 0)):
+        if phase.fresh_copy:
+            shutil.copyfile(dataset.catalog, copy)
+        status, measurement = run_measured(argv, SCRIPTS_DIR, log_path)
+        if status not in phase.ok_status:
+            tail = log_path.read_text(encoding="utf-8", errors="replace")[-2000:]
+            raise RuntimeError(f"{name} exited with status {status} on {dataset.records} records:\n{tail}")
+        if phase.warmup and attempt == 0:
+            continue
+        runs.append(measurement)
+    copy.unlink(missing_ok=True)
+
+    rss = [run.peak_rss_mib for run in runs if run.peak_rss_mib is not None]
+    return {
+        "phase": name,
+        "records": dataset.records,
+        "format": dataset.format,
+        "catalog_bytes": dataset.catalog.stat().st_size,
+        "seconds": min(run.seconds for run in runs),
+        "median_seconds": statistics.median(run.seconds for run in runs),
+        "runs": [round(run.seconds, 4) for run in runs],
+        "peak_rss_mib": max(rss) if rss else None,
+    }
+
+
+def memory_check(work_dir: Path, sizes: Sequence[int], seed: int, budget_mib: int) -> dict:
+    """Build the streaming locres of each catalog size serially; returns the peak RSS of each and their growth."""
+    builds = []
+    for records in sizes:
+        dataset = prepare_dataset(work_dir, records, seed)
+        print(f"Running the memory check build on {records} records...")
+        argv = [
+            sys.executable,
+            str(SCRIPTS_DIR / "build_locres.py"),
+            "--input",
+            str(dataset.catalog),
+            "--output",
+            str(dataset.directory / "memory-check.locres"),
+            "--jobs",
+            "1",
+            "--memory-budget",
+            str(budget_mib),
+        ]
+        log_path = dataset.directory / "memory_check.log"
+        log_path.unlink(missing_ok=True)
+        status, measurement = run_measured(argv, SCRIPTS_DIR, log_path)
+        if status != 0:
+            tail = log_path.read_text(encoding="utf-8", errors="replace")[-2000:]
+            raise RuntimeError(f"memory check build exited with status {status} on {records} records:\n{tail}")
+        builds.append({"records": records, "seconds": measurement.seconds, "peak_rss_mib": measurement.peak_rss_mib})
+    rss = [build["peak_rss_mib"] for build in builds]
+    growth = rss[-1] - rss[0] if None not in rss else None
+    return {"budget_mib": budget_mib, "builds": builds, "growth_mib": growth}
+
+
+def memory_regression(check: dict) -> Optional[str]:
+    """Describe a memory check whose peak RSS grew by more than its budget, else None."""
+    growth = check["growth_mib"]
+    if growth is None or growth <= check["budget_mib"]:
+        return None
+    small, large = check["builds"][0], check["builds"][-1]
+    return (
+        f"build_locres --jobs 1: peak RSS {small['peak_rss_mib']:.1f} MiB @ {small['records']} records"
+        f" -> {large['peak_rss_mib']:.1f} MiB @ {large['records']} records"
+        f" (+{growth:.1f} MiB, more than the {check['budget_mib']} MiB memory budget)"
+    )
+
+
+def result_key(item: dict) -> Tuple[str, int, str]:
+    # Results from before --formats existed are all plain.
+    return item["phase"], item["records"], item.get("format", PLAIN)
+
+
+def compare(
+    results: Iterable[dict], baseline: Iterable[dict], threshold: float, rss_threshold: float, min_delta: float
+) -> List[str]:
+    """Describe every phase that regressed against ``baseline``; thresholds are in percent."""
+    previous = {result_key(item): item for item in baseline}
+    regressions: List[str] = []
+    for item in results:
+        before = previous.get(result_key(item))
+        if before is None:
+            continue
+        label = f"{item['phase']} @ {item['records']} records ({item['format']})"
+        seconds, old_seconds = item["seconds"], before["seconds"]
+        if seconds > old_seconds * (1 + threshold / 100) and seconds - old_seconds >= min_delta:
+            regressions.append(
+                f"{label}: {old_seconds:.3f}s -> {seconds:.3f}s (+{(seconds / old_seconds - 1) * 100:.1f}%)"
+            )
+        rss, old_rss = item.get("peak_rss_mib"), before.get("peak_rss_mib")
+        if rss is not None and old_rss and rss > old_rss * (1 + rss_threshold / 100):
+            regressions.append(
+                f"{label}: peak RSS {old_rss:.1f} MiB -> {rss:.1f} MiB (+{(rss / old_rss - 1) * 100:.1f}%)"
+            )
+    return regressions
+
+
+def print_table(results: Sequence[dict], baseline: Dict[Tuple[str, int, str], dict]) -> None:
+    print(
+        f"\n{'phase':<22} {'records':>9} {'format':>6} {'catalog':>10} {'best':>9} {'median':>9}"
+        f" {'peak RSS':>11} {'vs baseline':>12}"
+    )
+    for item in results:
+        before = baseline.get(result_key(item))
+        change = f"{(item['seconds'] / before['seconds'] - 1) * 100:+.1f}%" if before else ""
+        rss = f"{item['peak_rss_mib']:.1f} MiB" if item["peak_rss_mib"] is not None else "n/a"
+        catalog = f"{item['catalog_bytes'] / (1 << 20):.1f} MiB"
+        print(
+            f"{item['phase']:<22} {item['records']:>9} {item['format']:>6} {catalog:>10}"
+            f" {item['seconds']:>8.3f}s {item['median_seconds']:>8.3f}s {rss:>11} {change:>12}"
+        )
+
+
+def parse_args(argv: Iterable[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time the catalog scripts on synthetic catalogs")
+    parser.add_argument(
+        "--records",
+        default="10000,100000",
+        help="Comma-separated catalog sizes, e.g. 10000,200000,2000000 (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--phases",
+        default=",".join(PHASES),
+        help="Comma-separated phases to run (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--formats",
+        default=PLAIN,
+        help=f"Comma-separated catalog formats to run each phase on, from {', '.join(FORMATS)} (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--memory-check",
+        default="400000,800000",
+        help="Two catalog sizes whose streaming locres builds may differ in peak RSS by at most"
+        " --memory-budget; empty to skip (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        help="build_locres --memory-budget for the memory check, in MiB (default: %(default)s)",
+    )
+    parser.add_argument("--seed", type=int, default=synth_catalog.DEFAULT_SEED, help="Generator seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per phase (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="--jobs passed to the scripts")
+    parser.add_argument("--work-dir", help="Where datasets are generated and kept (default: a temporary directory)")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent (default: %(default)s)")
+    parser.add_argument(
+        "--rss-threshold",
+        type=float,
+        default=10.0,
+        help="Allowed peak RSS growth in percent (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.05,
+        help="Slowdowns smaller than this many seconds are noise (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    args.records = [int(size) for size in args.records.split(",") if size.strip()]
+    args.phases = [name.strip() for name in args.phases.split(",") if name.strip()]
+    unknown = [name for name in args.phases if name not in PHASES]
+    if unknown:
+        parser.error(f"unknown phase(s): {', '.join(unknown)} (choose from {', '.join(PHASES)})")
+    args.formats = [name.strip() for name in args.formats.split(",") if name.strip()]
+    unknown = [name for name in args.formats if name not in FORMATS]
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)} (choose from {', '.join(FORMATS)})")
+    args.memory_check = sorted(int(size) for size in args.memory_check.split(",") if size.strip())
+    if args.memory_check and len(args.memory_check) != 2:
+        parser.error("--memory-check takes two catalog sizes")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return args
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    baseline: List[dict] = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)["results"]
+
+    temp_dir = None if args.work_dir else tempfile.mkdtemp(prefix="catalog-bench-")
+    work_dir = Path(args.work_dir or temp_dir)
+    results: List[dict] = []
+    check: Optional[dict] = None
+    try:
+        for records in args.records:
+            generated = prepare_dataset(work_dir, records, args.seed)
+            for catalog_format in args.formats:
+                dataset = prepare_format(generated, catalog_format)
+                for name in args.phases:
+                    print(f"Running {name} on {records} records ({catalog_format})...")
+                    results.append(run_phase(name, dataset, args.repeat, args.jobs))
+        if args.memory_check:
+            check = memory_check(work_dir, args.memory_check, args.seed, args.memory_budget)
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print_table(results, {result_key(item): item for item in baseline})
+    if check is not None and check["growth_mib"] is not None:
+        sizes = " -> ".join(f"{build['peak_rss_mib']:.1f} MiB @ {build['records']}" for build in check["builds"])
+        print(
+            f"\nMemory check (build_locres --jobs 1): {sizes} records,"
+            f" +{check['growth_mib']:.1f} MiB of {check['budget_mib']} MiB allowed"
+        )
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "jobs": args.jobs,
+            "compression_level": os.environ.get(LEVEL_ENV) or None,
+            "repeat": args.repeat,
+            "results": results,
+            "memory_check": check,
+        }
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+            handle.write("\n")
+        print(f"\nResults written to {args.output}")
+
+    regressions = compare(results, baseline, args.threshold, args.rss_threshold, args.min_delta)
+    memory = memory_regression(check) if check is not None else None
+    if memory:
+        regressions.append(memory)
+    if regressions:
+        against = f" against {args.baseline}" if args.baseline else ""
+        print(f"\n{len(regressions)} regression(s){against}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
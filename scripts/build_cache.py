@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Content-addressed cache of built locres files, shared by build_locres and pack.
+
+A build key digests everything a locres build reads: the catalog bytes (as
+stored, so compressed; per shard for a sharded catalog, so only changed
+shards are re-hashed), the
+overlays in order, config/translation-skip.json, the build mode and the
+builder itself (the source of the scripts shaping the output plus the
+pylocres version). Equal keys mean identical output, so a stored locres is
+restored instead of rebuilt.
+
+Layout under the cache directory::
+
+    locres/<key[:2]>/<key>.locres   the built file
+    locres/<key[:2]>/<key>.json     {"entries": N, "inputs": {...}}
+
+Entries are written atomically, so concurrent builds and interrupted runs
+never leave a partial file behind. Restoring refreshes an entry's mtime, so
+the directory can be trimmed by age.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+from catalog_shards import open_sharded, resolve_catalog
+from skip_rules import CONFIG_PATH as SKIP_RULES_PATH
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Scripts whose code decides the bytes build_locres writes.
+BUILDER_MODULES = (
+    "build_locres.py",
+    "catalog_codec.py",
+    "catalog_compression.py",
+    "catalog_io.py",
+    "catalog_overlay.py",
+    "catalog_shards.py",
+    "skip_rules.py",
+    "source_hash.py",
+)
+
+_CHUNK = 1 << 20
+
+# (path, size, mtime_ns, inode) -> digest; the worker process reuses it across calls.
+_digests: Dict[Tuple[str, int, int, int], str] = {}
+_builder: Optional[str] = None
+
+
+def file_digest(path: Path) -> str:
+    """BLAKE2b of the file's bytes, memoized while the file is unchanged on disk."""
+    resolved = path.resolve()
+    info = resolved.stat()
+    memo_key = (str(resolved), info.st_size, info.st_mtime_ns, info.st_ino)
+    digest = _digests.get(memo_key)
+    if digest is None:
+        hasher = hashlib.blake2b(digest_size=16)
+        with resolved.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(_CHUNK), b""):
+                hasher.update(chunk)
+        digest = _digests[memo_key] = hasher.hexdigest()
+    return digest
+
+
+def catalog_digest(path: Path) -> str:
+    """``file_digest`` of a catalog file, or of a sharded catalog's shard digests."""
+    sharded = open_sharded(path)
+    if sharded is None:
+        return file_digest(resolve_catalog(path))
+    hasher = hashlib.blake2b(digest_size=16)
+    for shard in sharded.paths():
+        hasher.update(f"{shard.name}\0{file_digest(shard)}\0".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def builder_digest() -> str:
+    global _builder  # noqa: PLW0603 -- computed once per process
+    if _builder is None:
+        hasher = hashlib.blake2b(digest_size=16)
+        for name in BUILDER_MODULES:
+            hasher.update(name.encode("utf-8") + b"\0" + (SCRIPTS_DIR / name).read_bytes() + b"\0")
+        try:
+            hasher.update(metadata.version("pylocres").encode("utf-8"))
+        except metadata.PackageNotFoundError:
+            pass
+        _builder = hasher.hexdigest()
+    return _builder
+
+
+def build_inputs(catalog: Path, overlays: Sequence[Path] = (), mode: str = "streaming") -> Dict[str, object]:
+    """The digests a build key is computed from (recorded next to each cache entry)."""
+    return {
+        "builder": builder_digest(),
+        "mode": mode,
+        "catalog": catalog_digest(catalog),
+        "overlays": [file_digest(overlay) for overlay in overlays],
+        "skipRules": file_digest(SKIP_RULES_PATH) if SKIP_RULES_PATH.is_file() else None,
+    }
+
+
+def build_key(inputs: Dict[str, object]) -> str:
+    encoded = json.dumps(inputs, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=20).hexdigest()
+
+
+def _copy_atomic(source: Path, destination: Path) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{destination.name}.", dir=str(destination.parent))
+    try:
+        with os.fdopen(fd, "wb") as handle, source.open("rb") as src:
+            shutil.copyfileobj(src, handle, _CHUNK)
+        os.replace(tmp_name, destination)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class BuildCache:
+    """Built locres files keyed by ``build_key``."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def entry_path(self, key: str) -> Path:
+        return self.root / "locres" / key[:2] / f"{key}.locres"
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """The entry's metadata when ``key`` is stored, else None."""
+        path = self.entry_path(key)
+        try:
+            meta = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        return meta if isinstance(meta, dict) and path.is_file() else None
+
+    def restore(self, key: str, outputs: Sequence[Path]) -> Optional[int]:
+        """Copy the stored locres to every output; returns its entry count, or None on a miss."""
+        meta = self.lookup(key)
+        if meta is None:
+            return None
+        path = self.entry_path(key)
+        for output in outputs:
+            _copy_atomic(path, output)
+        os.utime(path)
+        return int(meta.get("entries", 0))
+
+    def store(self, key: str, locres: Path, entries: int, inputs: Dict[str, object]) -> None:
+        path = self.entry_path(key)
+        _copy_atomic(locres, path)
+        meta_path = path.with_suffix(".json")
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{meta_path.name}.", dir=str(meta_path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump({"entries": entries, "inputs": inputs}, handle, indent=2)
+                handle.write("\n")
+            os.replace(tmp_name, meta_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
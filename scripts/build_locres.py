@@ -1,68 +1,59 @@
 #!/usr/bin/env python3
-"""Generate a UE locres file from an NDJSON translation catalog."""
+"""Generate a UE locres file from an NDJSON translation catalog.
+
+With ``--manifest`` several catalog -> locres targets are built in one run,
+concurrently in a process pool (see ``build_targets``). ``--overlay`` applies
+small variant catalogs on top of the input (see ``catalog_overlay``).
+``--cache-dir`` restores unchanged builds from a content-addressed cache
+(see ``build_cache``); ``--query-cache`` only reports hits and misses.
+"""
 from __future__ import annotations
 
 import argparse
+import hashlib
+import heapq
+import itertools
 import json
-import re
+import os
+import pickle
+import shutil
+import struct
 import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
-from zlib import crc32
+from typing import IO, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 try:
-    from pylocres import LocresFile, Namespace, Entry
+    from pylocres import LocresFile, LocresVersion, Namespace, Entry
+    from pylocres.city_hash import CityHash
+    from pylocres.locres import LOCRES_MAGIC
 except Exception as exc:  # pragma: no cover
     raise RuntimeError(
         "Missing dependency 'pylocres'. Install with: pip install pylocres"
     ) from exc
 
-SkipRule = Tuple[Optional[str], Optional[re.Pattern[str]], Optional[re.Pattern[str]]]
-_cached_rules: Optional[List[SkipRule]] = None
-
-
-def load_skip_rules() -> List[SkipRule]:
-    global _cached_rules  # noqa: PLW0603 -- cache is module-level by design
-    if _cached_rules is not None:
-        return _cached_rules
-
-    config_path = Path(__file__).resolve().parent.parent / "config" / "translation-skip.json"
-    try:
-        raw = json.loads(config_path.read_text(encoding="utf-8"))
-    except FileNotFoundError:
-        _cached_rules = []
-        return _cached_rules
-
-    rules: List[SkipRule] = []
-    for entry in raw.get("rules", []):
-        namespace = entry.get("namespace")  # None means "all namespaces"
-        regex_value = entry.get("keyRegex")
-        key_pattern = re.compile(regex_value) if isinstance(regex_value, str) else None
-        source_regex = entry.get("sourcePattern")
-        source_pattern = re.compile(source_regex) if isinstance(source_regex, str) else None
-        rules.append((namespace, key_pattern, source_pattern))
-
-    _cached_rules = rules
-    return rules
-
-
-def should_skip_translation(namespace: str, key: str, source: Optional[str] = None) -> bool:
-    if not namespace:
-        return False
-    for rule_namespace, key_pattern, source_pattern in load_skip_rules():
-        # None namespace means "all namespaces"
-        if rule_namespace is not None and rule_namespace != namespace:
-            continue
-        # Check key pattern
-        if key_pattern is not None:
-            if key is None or not key_pattern.search(key):
-                continue
-        # Check source pattern (if specified, source must match to skip)
-        if source_pattern is not None:
-            if source is None or not source_pattern.match(source):
-                continue
-        return True
-    return False
+import script_stats
+from build_cache import BuildCache, build_inputs, build_key
+from catalog_io import (
+    KEEP,
+    CatalogLineError,
+    CatalogPass,
+    Shard,
+    decode_line,
+    default_jobs,
+    iter_catalog_records,
+    iter_shard_lines,
+    map_shards,
+    scans_serially,
+)
+from catalog_overlay import Overrides, apply_override, apply_overrides, format_overlay_stats, load_overlays
+from catalog_shards import catalog_exists, describe_line, open_sharded
+from script_stats import get_stats
+from skip_rules import load_skip_rules, should_skip_translation
+from source_hash import add_stats, configure as configure_hash_cache, diff_stats, format_stats, get_cache, report_stats
 
 
 def normalize_crlf(text: str) -> str:
@@ -72,99 +63,874 @@ def normalize_crlf(text: str) -> str:
     return normalized.replace("\n", "\r\n")
 
 
-def hash_utf32le(text: str) -> int:
-    return crc32(text.encode("utf-32-le")) & 0xFFFFFFFF
-
-
 def compute_source_hash(source: str) -> int:
     # Hash the source as-is without normalization - game expects exact source hash
-    return hash_utf32le(source)
+    return get_cache().hash(source)
 
 
-def build_locres(entries: Iterable[dict], output_path: Path) -> int:
-    loc = LocresFile()
+LocresRow = Tuple[str, str, str, int]
 
-    namespace_map: Dict[str, Namespace] = {}
-    total_entries = 0
 
-    for entry in entries:
-        namespace = entry.get("namespace", "")
-        key = entry.get("key")
-        source = entry.get("source")
-        translated = entry.get("translated")
-        locres_override = entry.get("locresImport")
-        hash_override = entry.get("importedHash")
+def resolve_entry(entry: dict) -> Optional[LocresRow]:
+    """Return ``(namespace, key, target, source_hash)`` for a catalog record, or None to omit it."""
+    namespace = entry.get("namespace", "")
+    key = entry.get("key")
+    source = entry.get("source")
+    translated = entry.get("translated")
+    hash_override = entry.get("importedHash")
 
-        if not key:
-            continue
+    if not key:
+        return None
 
-        if should_skip_translation(str(namespace), str(key), str(source) if source else None):
-            translated = None
+    if should_skip_translation(str(namespace), str(key), str(source) if source else None):
+        return None
 
-        if translated is None:
-            continue
+    if translated is None or not isinstance(translated, str):
+        return None
 
-        if not isinstance(translated, str):
-            continue
+    if hash_override is not None:
+        try:
+            src_hash = int(str(hash_override), 0) & 0xFFFFFFFF
+        except (TypeError, ValueError):
+            return None
+    else:
+        if not source:
+            return None
+        src_hash = compute_source_hash(str(source))
 
-        target = normalize_crlf(translated)
+    return namespace, key, normalize_crlf(translated), src_hash
 
-        if namespace not in namespace_map:
-            namespace_map[namespace] = Namespace(namespace)
 
-        if hash_override is not None:
-            try:
-                src_hash = int(str(hash_override), 0) & 0xFFFFFFFF
-            except (TypeError, ValueError):
-                continue
-        else:
-            if not source:
+def build_locres(entries: Iterable[dict], output_path: Path, sort_namespaces: bool = False) -> int:
+    """Build a locres through pylocres; namespaces keep first-appearance order unless ``sort_namespaces``."""
+    stats = get_stats()
+    loc = LocresFile()
+
+    namespace_map: Dict[str, Namespace] = {}
+    total_entries = 0
+
+    # Decoding happens lazily in ``entries``, so it is part of this phase.
+    with stats.phase("construct"), stats.profiled():
+        for entry in entries:
+            row = resolve_entry(entry)
+            if row is None:
                 continue
-            src_hash = compute_source_hash(str(source))
+            namespace, key, target, src_hash = row
 
-        namespace_map[namespace].add(Entry(key, target, src_hash))
-        total_entries += 1
+            if namespace not in namespace_map:
+                namespace_map[namespace] = Namespace(namespace)
 
-    for namespace in namespace_map.values():
-        loc.add(namespace)
+            namespace_map[namespace].add(Entry(key, target, src_hash))
+            total_entries += 1
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    loc.write(str(output_path))
+        for name in sorted(namespace_map) if sort_namespaces else namespace_map:
+            loc.add(namespace_map[name])
+
+    with stats.phase("write") as timer:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        loc.write(str(output_path))
+        timer.records = total_entries
     return total_entries
 
 
+# ---------------------------------------------------------------------------
+# Streaming builder
+# ---------------------------------------------------------------------------
+
+DEFAULT_MEMORY_BUDGET_MB = 64
+_SPILL_BATCH = 4096
+_MAX_OPEN_RUNS = 64
+# Per-row cost of a buffered row besides its key and text strings (measured with
+# ``sys.getsizeof``): the tuple, its sequence and hash ints and the list slot.
+# Namespace strings are shared between rows.
+_ROW_OVERHEAD = 160
+
+# (namespace order, key, sequence, namespace, text, hash); the order is the
+# namespace itself when the spool sorts namespaces by name.
+SpoolRow = Tuple[Union[int, str], str, int, str, str, int]
+
+
+class NamespaceSpool:
+    """Group locres rows by namespace, spilling sorted runs to disk past a memory budget.
+
+    Rows are ordered by namespace (first-appearance order, like ``LocresFile``,
+    or by name with ``sort_namespaces``) and then by key. When the same (namespace, key) is added more than once the
+    last row wins, matching ``Namespace.add``.
+    """
+
+    def __init__(self, memory_budget: int, temp_dir: Optional[str] = None, sort_namespaces: bool = False) -> None:
+        self._budget = max(int(memory_budget), 1024 * 1024)
+        self._temp_dir = temp_dir
+        self._sort_namespaces = sort_namespaces
+        # namespace -> (order, the one copy of the name all its rows share)
+        self._namespaces: Dict[str, Tuple[Union[int, str], str]] = {}
+        self._buffer: List[SpoolRow] = []
+        self._buffered_bytes = 0
+        self._runs: List[IO[bytes]] = []
+        self._seq = itertools.count()
+
+    @property
+    def spilled_runs(self) -> int:
+        return len(self._runs)
+
+    def add(self, namespace: str, key: str, text: str, src_hash: int) -> None:
+        known = self._namespaces.get(namespace)
+        if known is None:
+            order = namespace if self._sort_namespaces else len(self._namespaces)
+            known = self._namespaces[namespace] = (order, namespace)
+        order, namespace = known
+        self._buffer.append((order, key, next(self._seq), namespace, text, src_hash))
+        self._buffered_bytes += _ROW_OVERHEAD + sys.getsizeof(key) + sys.getsizeof(text)
+        if self._buffered_bytes >= self._budget:
+            self._spill()
+
+    def _write_run(self, rows: Iterable[SpoolRow]) -> IO[bytes]:
+        run = tempfile.TemporaryFile(prefix="locres-spill-", dir=self._temp_dir)
+        batch: List[SpoolRow] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= _SPILL_BATCH:
+                pickle.dump(batch, run, pickle.HIGHEST_PROTOCOL)
+                batch = []
+        if batch:
+            pickle.dump(batch, run, pickle.HIGHEST_PROTOCOL)
+        run.seek(0)
+        return run
+
+    def _spill(self) -> None:
+        if not self._buffer:
+            return
+        self._buffer.sort()
+        self._runs.append(self._write_run(self._buffer))
+        self._buffer = []
+        self._buffered_bytes = 0
+        if len(self._runs) >= _MAX_OPEN_RUNS:
+            # Collapse the runs into one so the final merge keeps few files open.
+            runs = self._runs
+            merged = self._write_run(heapq.merge(*(self._iter_run(run) for run in runs)))
+            for run in runs:
+                run.close()
+            self._runs = [merged]
+
+    @staticmethod
+    def _iter_run(run: IO[bytes]) -> Iterator[SpoolRow]:
+        while True:
+            try:
+                batch = pickle.load(run)
+            except EOFError:
+                return
+            yield from batch
+
+    def _iter_rows(self) -> Iterator[SpoolRow]:
+        self._buffer.sort()
+        if not self._runs:
+            return iter(self._buffer)
+        streams = [self._iter_run(run) for run in self._runs]
+        streams.append(iter(self._buffer))
+        return heapq.merge(*streams)
+
+    def iter_namespaces(self) -> Iterator[Tuple[str, Iterator[Tuple[str, str, int]]]]:
+        """Yield ``(namespace, rows)`` one namespace at a time; ``rows`` yields its ``(key, text, hash)`` by key.
+
+        Rows stream from the spool, so each namespace's rows must be consumed
+        before asking for the next namespace.
+        """
+        for _order, group in itertools.groupby(self._iter_rows(), key=lambda row: row[0]):
+            first = next(group)
+            yield first[3], self._last_per_key(itertools.chain((first,), group))
+
+    @staticmethod
+    def _last_per_key(rows: Iterable[SpoolRow]) -> Iterator[Tuple[str, str, int]]:
+        # Rows arrive sorted by key and then by sequence: keep the last of each run of equal keys.
+        pending: Optional[Tuple[str, str, int]] = None
+        for _order, key, _seq, _namespace, text, src_hash in rows:
+            if pending is not None and pending[0] != key:
+                yield pending
+            pending = (key, text, src_hash)
+        if pending is not None:
+            yield pending
+
+    def close(self) -> None:
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._buffer = []
+
+    def __enter__(self) -> "NamespaceSpool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _fstring_bytes(value: str) -> bytes:
+    # Mirrors pylocres FString.write: ASCII when possible, otherwise UTF-16LE.
+    value += "\x00"
+    if value.isascii():
+        return struct.pack("<I", len(value)) + value.encode("ascii")
+    encoded = value.encode("utf-16le")
+    return struct.pack("<i", -(len(encoded) // 2)) + encoded
+
+
+def _key_hash(value: str) -> int:
+    return CityHash.city_hash_64_utf16_to_uint32(value)
+
+
+class StreamingLocresWriter:
+    """Write a CityHash (v3) locres one namespace section at a time.
+
+    Unique localized strings are spooled to a temporary file and only their
+    digests, lengths and reference counts stay in memory; the string table is
+    copied behind the key table once every namespace has been written.
+    """
+
+    _HEADER_SIZE = len(LOCRES_MAGIC) + 1 + 8
+
+    def __init__(self, handle: BinaryIO, temp_dir: Optional[str] = None) -> None:
+        self._handle = handle
+        self._strings = tempfile.TemporaryFile(prefix="locres-strings-", dir=temp_dir)
+        self._string_index: Dict[bytes, int] = {}
+        self._string_sizes = array("I")
+        self._string_refs = array("I")
+        self.namespace_count = 0
+        self.entry_count = 0
+
+        handle.write(LOCRES_MAGIC)
+        handle.write(struct.pack("<B", LocresVersion.CityHash.value))
+        handle.write(b"\x00" * 8)  # string table offset, patched in finish()
+        handle.write(struct.pack("<II", 0, 0))  # entry/namespace counts, patched in finish()
+
+    def _intern_string(self, text: str) -> int:
+        encoded = _fstring_bytes(text)
+        digest = hashlib.blake2b(encoded, digest_size=16).digest()
+        index = self._string_index.get(digest)
+        if index is None:
+            index = self._string_index[digest] = len(self._string_sizes)
+            self._strings.write(encoded)
+            self._string_sizes.append(len(encoded))
+            self._string_refs.append(1)
+        else:
+            self._string_refs[index] += 1
+        return index
+
+    def write_namespace(self, name: str, rows: Iterable[Tuple[str, str, int]]) -> None:
+        """Write one namespace section, streaming ``rows``; the entry count is patched in afterwards."""
+        handle = self._handle
+        section_start = handle.tell()
+        handle.write(struct.pack("<I", _key_hash(name)))
+        handle.write(_fstring_bytes(name))
+        count_offset = handle.tell()
+        handle.write(struct.pack("<I", 0))
+        count = 0
+        for key, text, src_hash in rows:
+            handle.write(struct.pack("<I", _key_hash(key)))
+            handle.write(_fstring_bytes(key))
+            handle.write(struct.pack("<II", int(src_hash) & 0xFFFFFFFF, self._intern_string(text)))
+            count += 1
+        if not count:
+            handle.seek(section_start)
+            handle.truncate()
+            return
+        handle.seek(count_offset)
+        handle.write(struct.pack("<I", count))
+        handle.seek(0, os.SEEK_END)
+        self.namespace_count += 1
+        self.entry_count += count
+
+    def finish(self) -> None:
+        handle = self._handle
+        text_offset = handle.tell()
+        handle.write(struct.pack("<I", len(self._string_sizes)))
+        self._strings.seek(0)
+        for size, refs in zip(self._string_sizes, self._string_refs):
+            handle.write(self._strings.read(size))
+            handle.write(struct.pack("<I", refs))
+        self._strings.close()
+
+        handle.seek(len(LOCRES_MAGIC) + 1)
+        handle.write(struct.pack("<Q", text_offset))
+        handle.seek(self._HEADER_SIZE)
+        handle.write(struct.pack("<II", self.entry_count, self.namespace_count))
+        handle.seek(0, os.SEEK_END)
+
+
+def write_locres_rows(
+    rows: Iterable[LocresRow],
+    output_path: Path,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024,
+    temp_dir: Optional[str] = None,
+    sort_namespaces: bool = False,
+) -> int:
+    """Write resolved ``(namespace, key, target, source_hash)`` rows through the streaming writer.
+
+    Memory is bounded by ``memory_budget`` (bytes) plus the string-table
+    digests (one per unique text); namespace sections are streamed.
+    """
+    stats = get_stats()
+    with NamespaceSpool(memory_budget, temp_dir, sort_namespaces) as spool:
+        with stats.phase("resolve"), stats.profiled():
+            for row in rows:
+                spool.add(*row)
+        with stats.phase("write") as timer:
+            timer.records = write_spool(spool, output_path, temp_dir)
+        return timer.records
+
+
+def write_spool(spool: NamespaceSpool, output_path: Path, temp_dir: Optional[str] = None) -> int:
+    """Write the rows collected in ``spool`` to ``output_path`` (atomically); returns the entry count."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    try:
+        with tmp_path.open("w+b") as handle:
+            writer = StreamingLocresWriter(handle, temp_dir)
+            for namespace, section in spool.iter_namespaces():
+                writer.write_namespace(namespace, section)
+            writer.finish()
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return writer.entry_count
+
+
+def build_locres_streaming(
+    entries: Iterable[dict],
+    output_path: Path,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024,
+    temp_dir: Optional[str] = None,
+) -> int:
+    """Build a locres without materialising the catalog or pylocres objects.
+
+    The output matches ``build_locres`` for catalogs sorted by (namespace, key).
+    """
+    rows = (row for row in map(resolve_entry, entries) if row is not None)
+    return write_locres_rows(rows, output_path, memory_budget, temp_dir)
+
+
 def parse_args(argv: Iterable[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Build UE locres from NDJSON catalog")
-    parser.add_argument("--input", required=True, help="Path to translations NDJSON file")
-    parser.add_argument("--output", required=True, help="Path to output Game.locres")
-    return parser.parse_args(argv)
+    parser.add_argument("--input", help="Path to translations NDJSON file")
+    parser.add_argument("--output", help="Path to output Game.locres")
+    parser.add_argument(
+        "--overlay",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="Overlay NDJSON overriding or suppressing translations of the input; repeat to stack, later wins",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="JSON list of {input, output, name, overlays} targets to build concurrently instead of --input/--output",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        help="MiB of entries to buffer before spilling sorted runs to disk (default: %(default)s)",
+    )
+    parser.add_argument("--temp-dir", help="Directory for spill files (default: system temp)")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for decoding the catalog, or targets built at once with --manifest (default: CPU count)",
+    )
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="Build through pylocres objects instead of the streaming writer",
+    )
+    parser.add_argument(
+        "--hash-cache",
+        help="Persisted source-hash table to reuse and update (default: in-memory only)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Build cache directory: restore outputs whose inputs are unchanged, store new builds",
+    )
+    parser.add_argument(
+        "--query-cache",
+        nargs="?",
+        const="",
+        metavar="REPORT",
+        help="With --cache-dir: print hit or miss per target without building; write them as JSON to REPORT if given",
+    )
+    script_stats.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.query_cache is not None and not args.cache_dir:
+        parser.error("--query-cache needs --cache-dir")
+    if args.manifest:
+        if args.input or args.output or args.in_memory or args.overlay:
+            parser.error("--manifest cannot be combined with --input, --output, --overlay or --in-memory")
+    elif not (args.input and args.output):
+        parser.error("--input and --output are required (or use --manifest)")
+    return args
+
+
+def _decode_shard(shard: Shard) -> Tuple[int, List[dict]]:
+    records: List[dict] = []
+    line_number = 0
+    for line_number, raw in iter_shard_lines(shard):
+        try:
+            record = decode_line(raw)
+        except json.JSONDecodeError as exc:
+            raise CatalogLineError(line_number, str(exc)) from exc
+        if record is not None:
+            records.append(record)
+    return line_number, records
+
+
+def _resolve_shard(shard: Shard, hash_cache: Optional[Path], overrides: Optional[Overrides]) -> Tuple[int, tuple]:
+    configure_hash_cache(hash_cache)
+    started = time.perf_counter()
+    line_count, records = _decode_shard(shard)
+    applied = sum(apply_override(record, overrides) for record in records) if overrides else 0
+    decoded = time.perf_counter()
+    rows = [row for row in map(resolve_entry, records) if row is not None]
+    timings = (("decode", decoded - started, line_count), ("skip+hash", time.perf_counter() - decoded, len(records)))
+    new_hashes, hash_stats = get_cache().drain()
+    return line_count, (rows, new_hashes, hash_stats, timings, applied)
+
+
+def sorts_namespaces(path: Path | str) -> bool:
+    """Whether builds from ``path`` order namespaces by name.
+
+    A sharded catalog is read bucket by bucket, so first-appearance order would
+    follow the shard layout; sorting by name gives the locres a sorted
+    single-file catalog builds.
+    """
+    return open_sharded(path) is not None
+
+
+def _invalid_json(path: Path, exc: CatalogLineError) -> RuntimeError:
+    return RuntimeError(f"Invalid JSON on {describe_line(path, exc.line)}: {exc.message}")
+
+
+def iter_catalog_lines(path: Path, jobs: Optional[int] = None) -> Iterable[dict]:
+    try:
+        if scans_serially(path, jobs):
+            yield from iter_catalog_records(path)
+            return
+        for _offset, records in map_shards(path, _decode_shard, jobs=jobs):
+            yield from records
+    except CatalogLineError as exc:
+        raise _invalid_json(path, exc) from exc
+
+
+def iter_resolved_rows(
+    path: Path,
+    jobs: Optional[int] = None,
+    hash_cache: Optional[Path] = None,
+    hash_stats: Optional[Dict[str, int]] = None,
+    overrides: Optional[Overrides] = None,
+    overlay_counts: Optional[Dict[str, int]] = None,
+) -> Iterable[LocresRow]:
+    """Decode, overlay, skip-filter and hash catalog records in worker processes.
+
+    Hashes computed by the workers are merged into this process's cache (so
+    ``get_cache().save()`` persists them) and their counters are summed into
+    ``hash_stats``; the number of records changed by ``overrides`` is added
+    to ``overlay_counts["applied"]``. When the scan would run serially the
+    records are resolved here one at a time instead, so memory does not grow
+    with the catalog.
+    """
+    cache = configure_hash_cache(hash_cache)
+    cache.mark()
+    stats = get_stats()
+    try:
+        if scans_serially(path, jobs):
+            before = cache.stats()
+            applied = 0
+            for record in iter_catalog_records(path):
+                if overrides:
+                    applied += apply_override(record, overrides)
+                row = resolve_entry(record)
+                if row is not None:
+                    yield row
+            if hash_stats is not None:
+                add_stats(hash_stats, diff_stats(cache.stats(), before))
+            if overlay_counts is not None:
+                overlay_counts["applied"] = overlay_counts.get("applied", 0) + applied
+            return
+        for _offset, (rows, new_hashes, shard_stats, timings, applied) in map_shards(
+            path, _resolve_shard, hash_cache, overrides or None, jobs=jobs
+        ):
+            cache.merge(new_hashes)
+            if hash_stats is not None:
+                add_stats(hash_stats, shard_stats)
+            if overlay_counts is not None:
+                overlay_counts["applied"] = overlay_counts.get("applied", 0) + applied
+            for stage, seconds, records in timings:
+                stats.add_worker_time(stage, seconds, records)
+            yield from rows
+    except CatalogLineError as exc:
+        raise _invalid_json(path, exc) from exc
+
+
+class LocresPass(CatalogPass):
+    """Pipeline pass resolving records into locres rows and writing them through the streaming writer.
+
+    Options: ``locres_output`` (required), ``memory_budget`` (MiB),
+    ``temp_dir`` and ``hash_cache``.
+    """
+
+    name = "locres"
+    strict = True
+
+    def __init__(self, options: Dict[str, object]) -> None:
+        super().__init__(options)
+        hash_cache = options.get("hash_cache")
+        self.hash_cache = Path(str(hash_cache)) if hash_cache else None
+        self.hash_stats: Dict[str, int] = {}
+        self._spool: Optional[NamespaceSpool] = None
+
+    def shard_state(self) -> List[LocresRow]:
+        configure_hash_cache(self.hash_cache)
+        return []
+
+    def process(self, state: List[LocresRow], record: dict, line: int) -> int:
+        row = resolve_entry(record)
+        if row is not None:
+            state.append(row)
+        return KEEP
+
+    def close_shard(self, state: List[LocresRow]) -> tuple:
+        new_hashes, hash_stats = get_cache().drain()
+        return state, new_hashes, hash_stats
+
+    def begin(self) -> None:
+        memory_budget = int(self.options.get("memory_budget") or DEFAULT_MEMORY_BUDGET_MB)
+        self._spool = NamespaceSpool(
+            memory_budget * 1024 * 1024,
+            self.options.get("temp_dir"),
+            bool(self.options.get("input")) and sorts_namespaces(str(self.options["input"])),
+        )
+
+    def merge(self, state: tuple, line_offset: int) -> None:
+        rows, new_hashes, hash_stats = state
+        configure_hash_cache(self.hash_cache).merge(new_hashes)
+        add_stats(self.hash_stats, hash_stats)
+        for row in rows:
+            self._spool.add(*row)
+
+    def finish(self) -> int:
+        output_path = Path(str(self.options["locres_output"]))
+        total = write_spool(self._spool, output_path, self.options.get("temp_dir"))
+        configure_hash_cache(self.hash_cache).save()
+        report_stats(self.hash_stats)
+        print(f"\nWrote {total} entries to {output_path}")
+        print(format_stats(self.hash_stats))
+        return 0
+
+    def close(self) -> None:
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+
+# ---------------------------------------------------------------------------
+# Batch builds
+# ---------------------------------------------------------------------------
+
+
+class BuildTarget(NamedTuple):
+    """One catalog (with its overlays) and every locres path it should be written to."""
+
+    name: str
+    input: Path
+    outputs: Tuple[Path, ...]
+    overlays: Tuple[Path, ...] = ()
+
+
+# (entries, hash stats, new hashes, seconds, overlay summary or None)
+TargetResult = Tuple[int, Dict[str, int], Dict[bytes, int], float, Optional[str]]
+
+
+def load_manifest(path: Path) -> List[BuildTarget]:
+    """Read a ``--manifest`` file into build targets.
+
+    The manifest is ``{"targets": [{"input": ..., "output": ..., "name": ...,
+    "overlays": [...]}]}`` (or just the list); relative paths are resolved
+    against the manifest's directory. Targets reading the same catalog with
+    the same overlays produce the same locres, so they are merged into one
+    build whose result is copied to each output.
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        raise RuntimeError(f"Cannot read manifest {path}: {exc}") from exc
+    items = data.get("targets") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise RuntimeError(f"Manifest {path} lists no targets")
+
+    base = path.resolve().parent
+    grouped: Dict[Tuple[Path, Tuple[Path, ...]], Tuple[str, List[Path]]] = {}
+    claimed: Dict[Path, Tuple[Path, Tuple[Path, ...]]] = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("input") or not item.get("output"):
+            raise RuntimeError(f'Manifest {path}: target {index} needs "input" and "output"')
+        overlays = item.get("overlays") or []
+        if not isinstance(overlays, list):
+            raise RuntimeError(f'Manifest {path}: "overlays" of target {index} must be a list')
+        source = (base / str(item["input"]), tuple(base / str(overlay) for overlay in overlays))
+        output_path = base / str(item["output"])
+        if claimed.setdefault(output_path, source) != source:
+            raise RuntimeError(f"Manifest {path}: {output_path} is the output of more than one build")
+        _name, outputs = grouped.setdefault(source, (str(item.get("name") or source[0].stem), []))
+        if output_path not in outputs:
+            outputs.append(output_path)
+    return [
+        BuildTarget(name, input_path, tuple(outputs), overlays)
+        for (input_path, overlays), (name, outputs) in grouped.items()
+    ]
+
+
+def _copy_output(source: Path, destination: Path) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = destination.with_name(destination.name + ".tmp")
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _build_target(
+    target: BuildTarget,
+    memory_budget: int,
+    temp_dir: Optional[str],
+    hash_cache: Optional[Path],
+    jobs: Optional[int],
+) -> TargetResult:
+    """Build ``target`` through the streaming writer (see ``TargetResult``).
+
+    Runs in a batch worker process, so it must not print.
+    """
+    started = time.perf_counter()
+    if not catalog_exists(target.input):
+        raise RuntimeError(f"Catalog not found: {target.input}")
+    overrides = load_overlays(target.overlays)
+    cache = configure_hash_cache(hash_cache)
+    hash_stats: Dict[str, int] = {}
+    overlay_counts: Dict[str, int] = {}
+    rows = iter_resolved_rows(target.input, jobs, hash_cache, hash_stats, overrides, overlay_counts)
+    total = write_locres_rows(rows, target.outputs[0], memory_budget, temp_dir, sorts_namespaces(target.input))
+    for output in target.outputs[1:]:
+        _copy_output(target.outputs[0], output)
+    new_hashes, _delta = cache.drain()
+    overlay_summary = format_overlay_stats(overrides, overlay_counts.get("applied", 0)) if target.overlays else None
+    return total, hash_stats, new_hashes, time.perf_counter() - started, overlay_summary
+
+
+def build_targets(
+    targets: List[BuildTarget],
+    jobs: Optional[int] = None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024,
+    temp_dir: Optional[str] = None,
+    hash_cache: Optional[Path] = None,
+    build_cache: Optional[BuildCache] = None,
+) -> Tuple[int, Dict[str, int]]:
+    """Build every target, up to ``jobs`` at a time; returns the number of failed targets and the hash stats.
+
+    Skip rules and the persisted hash table are loaded here once; forked
+    workers inherit both, send back the hashes they computed, and the table
+    is saved once at the end. With a single target (or ``jobs`` 1) the
+    targets are built in this process and the catalog shards use the jobs.
+    Targets found in ``build_cache`` are restored from it instead, and new
+    builds are stored there.
+    """
+    stats = get_stats()
+    jobs = default_jobs() if jobs is None else max(1, jobs)
+    cache = configure_hash_cache(hash_cache)
+    load_skip_rules()
+    hash_stats: Dict[str, int] = {}
+    failed = 0
+    keys: Dict[BuildTarget, Tuple[str, Dict[str, object]]] = {}
+    if build_cache is not None:
+        targets = restore_targets(targets, build_cache, keys)
+        if not targets:
+            return 0, hash_stats
+
+    def settle(target: BuildTarget, outcome: Callable[[], TargetResult]) -> None:
+        nonlocal failed
+        try:
+            total, target_stats, new_hashes, seconds, overlay_summary = outcome()
+        except (RuntimeError, OSError) as exc:
+            failed += 1
+            print(f"[{target.name}] Build failed: {exc}", file=sys.stderr)
+            return
+        cache.merge(new_hashes)
+        add_stats(hash_stats, target_stats)
+        stats.add_worker_time(f"target {target.name}", seconds, total)
+        if overlay_summary:
+            print(f"[{target.name}] {overlay_summary}")
+        for output in target.outputs:
+            print(f"[{target.name}] Wrote {total} entries to {output}")
+        if target in keys:
+            store_build(build_cache, keys[target], target.outputs[0], total, target.name)
+
+    with stats.phase("build targets") as timer:
+        if len(targets) == 1 or jobs == 1:
+            for target in targets:
+                settle(target, lambda: _build_target(target, memory_budget, temp_dir, hash_cache, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(targets))) as executor:
+                futures = [
+                    executor.submit(_build_target, target, memory_budget, temp_dir, hash_cache, 1)
+                    for target in targets
+                ]
+                for target, future in zip(targets, futures):
+                    settle(target, future.result)
+        timer.records = len(targets)
+    cache.save()
+    return failed, hash_stats
+
+
+def restore_targets(
+    targets: List[BuildTarget],
+    build_cache: BuildCache,
+    keys: Dict[BuildTarget, Tuple[str, Dict[str, object]]],
+) -> List[BuildTarget]:
+    """Restore the cached targets; returns the ones still to build (their keys go into ``keys``).
+
+    A target whose inputs cannot be read is left to build, which reports the error.
+    """
+    pending: List[BuildTarget] = []
+    with get_stats().phase("build cache") as timer:
+        for target in targets:
+            try:
+                inputs = build_inputs(target.input, target.overlays)
+            except OSError:
+                pending.append(target)
+                continue
+            key = build_key(inputs)
+            entries = build_cache.restore(key, target.outputs)
+            if entries is None:
+                keys[target] = (key, inputs)
+                pending.append(target)
+                continue
+            for output in target.outputs:
+                print(f"[{target.name}] Restored {entries} entries to {output} from the build cache")
+        timer.records = len(targets)
+    return pending
+
+
+def store_build(
+    build_cache: Optional[BuildCache], keyed: Tuple[str, Dict[str, object]], locres: Path, entries: int, name: str
+) -> None:
+    """Add a finished build to the cache; a cache that cannot be written only costs a warning."""
+    if build_cache is None:
+        return
+    key, inputs = keyed
+    try:
+        build_cache.store(key, locres, entries, inputs)
+    except OSError as exc:
+        print(f"[{name}] Warning: could not store the build in {build_cache.root}: {exc}", file=sys.stderr)
+
+
+def query_cache(targets: List[BuildTarget], build_cache: BuildCache, report: str, mode: str = "streaming") -> int:
+    """Print whether each target is in the build cache, without building; optionally write a JSON report."""
+    results = []
+    for target in targets:
+        if not catalog_exists(target.input):
+            raise RuntimeError(f"[{target.name}] Catalog not found: {target.input}")
+        for path in target.overlays:
+            if not path.is_file():
+                raise RuntimeError(f"[{target.name}] Overlay not found: {path}")
+        key = build_key(build_inputs(target.input, target.overlays, mode))
+        hit = build_cache.lookup(key) is not None
+        print(f"[{target.name}] {'hit' if hit else 'miss'} {key}")
+        results.append(
+            {"name": target.name, "key": key, "hit": hit, "outputs": [str(output) for output in target.outputs]}
+        )
+    hits = sum(result["hit"] for result in results)
+    print(f"Build cache: {hits} of {len(results)} target(s) cached in {build_cache.root}")
+    if report:
+        Path(report).write_text(json.dumps({"targets": results}, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return 0
 
 
-def iter_catalog_lines(path: Path) -> Iterable[dict]:
-    with path.open("r", encoding="utf-8") as handle:
-        for line_number, raw_line in enumerate(handle, 1):
-            line = raw_line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except json.JSONDecodeError as exc:
-                raise RuntimeError(
-                    f"Invalid JSON on line {line_number} of {path}: {exc}"
-                ) from exc
+def main_manifest(args: argparse.Namespace) -> int:
+    manifest_path = Path(args.manifest)
+    targets = load_manifest(manifest_path)
+    build_cache = BuildCache(Path(args.cache_dir)) if args.cache_dir else None
+    if build_cache is not None and args.query_cache is not None:
+        return query_cache(targets, build_cache, args.query_cache)
+    outputs = sum(len(target.outputs) for target in targets)
+    print(f"Building {len(targets)} locres target(s) for {outputs} output(s) from {manifest_path}")
+    failed, hash_stats = build_targets(
+        targets,
+        args.jobs,
+        memory_budget=args.memory_budget * 1024 * 1024,
+        temp_dir=args.temp_dir,
+        hash_cache=Path(args.hash_cache) if args.hash_cache else None,
+        build_cache=build_cache,
+    )
+    if hash_stats:  # empty when every target came from the build cache
+        report_stats(hash_stats)
+        print(format_stats(hash_stats))
+    if failed:
+        print(f"{failed} of {len(targets)} target(s) failed.", file=sys.stderr)
+        return 1
+    return 0
 
 
 def main(argv: Iterable[str] | None = None) -> int:
     args = parse_args(argv or sys.argv[1:])
+    script_stats.start("build_locres", args)
+    if args.manifest:
+        return main_manifest(args)
     catalog_path = Path(args.input)
     output_path = Path(args.output)
 
-    if not catalog_path.is_file():
+    if not catalog_exists(catalog_path):
         raise RuntimeError(f"Catalog not found: {catalog_path}")
 
-    entries = list(iter_catalog_lines(catalog_path))
-    total = build_locres(entries, output_path)
+    overlay_paths = tuple(Path(overlay) for overlay in args.overlay)
+    build_cache = BuildCache(Path(args.cache_dir)) if args.cache_dir else None
+    mode = "in-memory" if args.in_memory else "streaming"
+    if build_cache is not None and args.query_cache is not None:
+        target = BuildTarget(catalog_path.stem, catalog_path, (output_path,), overlay_paths)
+        return query_cache([target], build_cache, args.query_cache, mode)
+    keyed: Optional[Tuple[str, Dict[str, object]]] = None
+    if build_cache is not None:
+        with get_stats().phase("build cache"):
+            inputs = build_inputs(catalog_path, overlay_paths, mode)
+            keyed = (build_key(inputs), inputs)
+            restored = build_cache.restore(keyed[0], [output_path])
+        if restored is not None:
+            print(f"Restored {restored} entries to {output_path} from the build cache")
+            return 0
+
+    overrides = load_overlays(overlay_paths)
+    overlay_counts: Dict[str, int] = {}
+    hash_cache_path = Path(args.hash_cache) if args.hash_cache else None
+    cache = configure_hash_cache(hash_cache_path)
+    hash_stats: Dict[str, int] = {}
+    if args.in_memory:
+        before = cache.stats()
+        entries = iter_catalog_lines(catalog_path, args.jobs)
+        if overrides:
+            entries = apply_overrides(entries, overrides, overlay_counts)
+        total = build_locres(entries, output_path, sorts_namespaces(catalog_path))
+        hash_stats = diff_stats(cache.stats(), before)
+    else:
+        total = write_locres_rows(
+            iter_resolved_rows(catalog_path, args.jobs, hash_cache_path, hash_stats, overrides, overlay_counts),
+            output_path,
+            memory_budget=args.memory_budget * 1024 * 1024,
+            temp_dir=args.temp_dir,
+            sort_namespaces=sorts_namespaces(catalog_path),
+        )
+    cache.save()
+    if keyed is not None:
+        store_build(build_cache, keyed, output_path, total, catalog_path.stem)
+    report_stats(hash_stats)
+    if args.overlay:
+        print(format_overlay_stats(overrides, overlay_counts.get("applied", 0)))
     print(f"Wrote {total} entries to {output_path}")
+    print(format_stats(hash_stats))
     return 0
 
 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Fast decode/encode of catalog record lines, byte-compatible with ``json``.
+
+Catalog records are flat objects of strings, nulls and integers, so:
+
+* Decoding goes through ``orjson`` when it is installed, else straight
+  into the C scanner behind ``json.loads`` (skipping its per-call encoding
+  detection and whitespace handling). Anything either fast path does not
+  take as-is (leading whitespace, a BOM, trailing data, nested values,
+  floats, invalid input) is decoded again by ``json.loads``, so results and
+  errors are always exactly the ``json`` ones.
+* Encoding builds the ``json.dumps(record, ensure_ascii=False)`` text of a
+  flat record directly from the C string encoder and cached key prefixes.
+  Other values fall back to ``json.dumps``. ``orjson`` is not used here:
+  its separators differ, and output must stay byte-identical.
+
+``BACKEND`` names the decoder in use.
+"""
+from __future__ import annotations
+
+import json
+import json.decoder
+import json.encoder
+from typing import Any, Callable, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+_scan_once = json.decoder.JSONDecoder().scan_once
+_encode_string: Callable[[str], str] = json.encoder.encode_basestring
+_key_prefixes: Dict[str, str] = {}
+_SCALARS = (str, int, bool, type(None))
+
+
+def _decode_json(data: Union[bytes, str]) -> Any:
+    if isinstance(data, bytes):
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            return json.loads(data)
+    else:
+        text = data
+    try:
+        value, end = _scan_once(text, 0)
+    except (StopIteration, ValueError):
+        return json.loads(data)
+    if end != len(text):
+        return json.loads(data)
+    return value
+
+
+def _decode_orjson(data: Union[bytes, str]) -> Any:
+    try:
+        value = orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
+    # orjson turns integers past 64 bits into floats; only trust flat records of exact scalars.
+    if type(value) is not dict:
+        return json.loads(data)
+    for item in value.values():
+        if type(item) not in _SCALARS:
+            return json.loads(data)
+    return value
+
+
+# decode(data) -> the ``json.loads(data)`` value of one JSON document.
+decode: Callable[[Union[bytes, str]], Any] = _decode_orjson if orjson is not None else _decode_json
+
+
+def _key_prefix(key: str) -> str:
+    prefix = _key_prefixes.get(key)
+    if prefix is None:
+        prefix = _key_prefixes[key] = _encode_string(key) + ": "
+    return prefix
+
+
+def encode(record: Any) -> str:
+    """``json.dumps(record, ensure_ascii=False)``."""
+    if type(record) is not dict:
+        return json.dumps(record, ensure_ascii=False)
+    parts = []
+    for key, value in record.items():
+        if type(key) is not str:
+            return json.dumps(record, ensure_ascii=False)
+        kind = type(value)
+        if kind is str:
+            text = _encode_string(value)
+        elif value is None:
+            text = "null"
+        elif kind is int:
+            text = int.__repr__(value)
+        elif kind is bool:
+            text = "true" if value else "false"
+        else:
+            return json.dumps(record, ensure_ascii=False)
+        parts.append(_key_prefix(key) + text)
+    return "{" + ", ".join(parts) + "}"
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Transparent gzip/xz compression of single-file catalogs (``vi.ndjson.gz``, ``vi.ndjson.xz``).
+
+The catalog is mostly repeated JSON keys and CJK text, so it compresses
+several-fold. The compression follows the file name: ``.gz`` is gzip, ``.xz``
+is xz (LZMA2), anything else is plain NDJSON. Readers decompress as a stream
+(``open_catalog``) and ``catalog_io.CatalogWriter`` compresses whatever it
+writes to a compressed path, so scripts handle either form unchanged, and
+``catalog_shards.resolve_catalog`` lets ``translations/vi.ndjson`` stand for a
+compressed copy when the plain file does not exist.
+
+The level of new files comes from ``--level`` where a script offers it, else
+from ``CATALOG_COMPRESSION_LEVEL``, else ``DEFAULT_LEVELS``. Output is
+reproducible: gzip headers carry no file name or timestamp.
+
+Compressed files cannot be cut at byte offsets, so ``catalog_io.map_shards``
+decompresses them to a temporary file before a parallel scan, and random
+access (``catalog_io.CatalogSource``) reads from such a copy too.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+
+GZIP = "gzip"
+XZ = "xz"
+
+# File suffix -> compression
+COMPRESSIONS: Dict[str, str] = {".gz": GZIP, ".xz": XZ}
+DEFAULT_LEVELS: Dict[str, int] = {GZIP: 6, XZ: 6}
+LEVEL_ENV = "CATALOG_COMPRESSION_LEVEL"
+
+_READ_BUFFER = 1 << 20
+_WRITE_BUFFER = 1 << 20
+
+
+def compression_of(path: Path | str) -> Optional[str]:
+    """The compression implied by ``path``'s suffix, or None for a plain file."""
+    return COMPRESSIONS.get(Path(path).suffix.lower())
+
+
+def compressed_variants(path: Path | str) -> List[Path]:
+    """``path`` with each compression suffix appended, in ``COMPRESSIONS`` order."""
+    path = Path(path)
+    return [path.with_name(path.name + suffix) for suffix in COMPRESSIONS]
+
+
+def compression_level(compression: str, level: Optional[int] = None) -> int:
+    """``level``, else ``$CATALOG_COMPRESSION_LEVEL``, else the default for ``compression``."""
+    if level is None:
+        configured = os.environ.get(LEVEL_ENV, "").strip()
+        if configured:
+            try:
+                level = int(configured)
+            except ValueError:
+                raise RuntimeError(f"{LEVEL_ENV} must be an integer, got {configured!r}") from None
+    if level is None:
+        return DEFAULT_LEVELS[compression]
+    if not 0 <= level <= 9:
+        raise RuntimeError(f"Compression level must be between 0 and 9, got {level}")
+    return level
+
+
+def open_catalog(path: Path | str) -> BinaryIO:
+    """Open a catalog for reading, decompressing ``.gz``/``.xz`` files as a stream."""
+    compression = compression_of(path)
+    if compression == GZIP:
+        return gzip.open(path, "rb")
+    if compression == XZ:
+        return io.BufferedReader(lzma.open(path, "rb"), _READ_BUFFER)
+    return open(path, "rb")
+
+
+def decompress_stream(handle: BinaryIO, compression: str) -> BinaryIO:
+    """Read ``handle`` (any object with ``read``) as a ``compression`` stream."""
+    if compression == GZIP:
+        return gzip.GzipFile(filename="", mode="rb", fileobj=handle)
+    return io.BufferedReader(lzma.LZMAFile(handle, "rb"), _READ_BUFFER)
+
+
+def compress_stream(handle: BinaryIO, compression: str, level: Optional[int] = None) -> BinaryIO:
+    """Wrap the binary file ``handle`` so writes to the result land in it compressed.
+
+    Closing the wrapper finishes the stream but leaves ``handle`` open.
+    """
+    level = compression_level(compression, level)
+    if compression == GZIP:
+        stream: BinaryIO = gzip.GzipFile(filename="", mode="wb", compresslevel=level, fileobj=handle, mtime=0)
+    else:
+        stream = lzma.LZMAFile(handle, "wb", preset=level)
+    # Catalog writers emit one line at a time; batch them before the compressor.
+    return io.BufferedWriter(stream, _WRITE_BUFFER)
+
+
+def decompressed_copy(path: Path | str, temp_dir: Optional[str] = None) -> Path:
+    """Decompress ``path`` into a new temporary file (removing it is up to the caller)."""
+    fd, tmp_name = tempfile.mkstemp(prefix="catalog-", suffix=".ndjson", dir=temp_dir)
+    try:
+        with os.fdopen(fd, "wb") as target, open_catalog(path) as source:
+            shutil.copyfileobj(source, target, _READ_BUFFER)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return Path(tmp_name)
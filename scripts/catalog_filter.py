@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Record predicates evaluated on raw NDJSON catalog lines before decoding.
+
+Catalog records are flat objects with a fixed schema (``namespace``, ``key``,
+``source``, ``translated``, ``locresImport``, ...), so most predicates can be
+decided by locating one field in the raw bytes: a field's value is ``null``,
+a string, or something else. A string body whose only escapes are the
+short ones ``json.dumps`` emits for quotes, backslashes and control
+characters is the one encoding of its value, so equal bodies mean equal
+strings. Only lines a predicate cannot decide that way (``\\u`` escapes,
+odd spacing, duplicate keys) are decoded and checked on the record, so a
+``RecordFilter`` returns the same records as checking every decoded line.
+
+Inside a JSON string every ``"`` is escaped, so ``"name":`` preceded by
+``{``, ``,`` or whitespace can only be a key.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Dict, Iterable, Optional, Pattern, Tuple
+
+from catalog_io import decode_line
+
+# Kinds of raw field values.
+UNKNOWN = 0  # not located reliably; decode to decide
+ABSENT = 1
+NULL = 2
+STRING = 3  # payload is the string's raw body, which uses only canonical escapes
+ESCAPED = 4  # a string with ``\\u`` or ``\\/`` escapes
+OTHER = 5  # number, boolean, array or object
+
+RawValue = Tuple[int, Optional[bytes]]
+
+_FIELD_PATTERNS: Dict[str, Tuple[bytes, bytes, Pattern[bytes]]] = {}
+_SEPARATORS = b"{, \t"
+
+# A string body with no \u or \/ escapes.
+_CANONICAL_STRING = rb'"[^"\\]*(?:\\[^u/][^"\\]*)*"'
+# json.dumps layout of a record whose translation differs from its source.
+_TRANSLATED_SOURCE = re.compile(
+    rb'[{ ]"source": (' + _CANONICAL_STRING + rb'), "translated": (?!\1[,}])' + _CANONICAL_STRING + rb'[,}]'
+)
+
+
+def _field_pattern(name: str) -> Tuple[bytes, bytes, Pattern[bytes]]:
+    entry = _FIELD_PATTERNS.get(name)
+    if entry is None:
+        quoted = json.dumps(name).encode("ascii")
+        pattern = re.compile(re.escape(quoted) + rb':[ \t]*(?:(null)|"([^"\\]*(?:\\.[^"\\]*)*)"|([^\s,}]))')
+        entry = _FIELD_PATTERNS[name] = (quoted, b", " + quoted + b": null", pattern)
+    return entry
+
+
+def raw_field(line: bytes, name: str) -> RawValue:
+    """Locate top-level field ``name`` in a raw record line; returns ``(kind, payload)``."""
+    quoted, canonical_null, pattern = _field_pattern(name)
+    if canonical_null in line and line.count(quoted) == 1:
+        return NULL, None
+    match = pattern.search(line)
+    if match is None:
+        if quoted not in line and b"\\u" not in line:
+            return ABSENT, None
+        return UNKNOWN, None
+    start = match.start()
+    if not start or line[start - 1] not in _SEPARATORS or line.count(quoted) > 1:
+        return UNKNOWN, None
+    if match.group(1):
+        return NULL, None
+    body = match.group(2)
+    if body is None:
+        return OTHER, None
+    if b"\\" in body and (b"\\u" in body or b"\\/" in body):
+        return ESCAPED, None
+    return STRING, body
+
+
+class Predicate:
+    """A record condition; ``raw`` answers True/False from the line bytes, or None when it cannot tell."""
+
+    def raw(self, line: bytes) -> Optional[bool]:
+        return None
+
+    def __call__(self, record: dict) -> bool:
+        raise NotImplementedError
+
+
+class NamespaceEquals(Predicate):
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+        self.encoded = json.dumps(namespace, ensure_ascii=False)[1:-1].encode("utf-8")
+
+    def raw(self, line: bytes) -> Optional[bool]:
+        kind, body = raw_field(line, "namespace")
+        if kind == STRING:
+            return body == self.encoded
+        if kind in (ABSENT, NULL, OTHER):
+            return False
+        return None
+
+    def __call__(self, record: dict) -> bool:
+        return record.get("namespace") == self.namespace
+
+
+class NamespacePrefix(NamespaceEquals):
+    def raw(self, line: bytes) -> Optional[bool]:
+        kind, body = raw_field(line, "namespace")
+        if kind == STRING:
+            return body.startswith(self.encoded)
+        if kind in (ABSENT, NULL, OTHER):
+            return False
+        return None
+
+    def __call__(self, record: dict) -> bool:
+        namespace = record.get("namespace")
+        return isinstance(namespace, str) and namespace.startswith(self.namespace)
+
+
+class FieldIsNull(Predicate):
+    """``record.get(name) is None``; ``negate`` flips it to "is present and not null"."""
+
+    def __init__(self, name: str, negate: bool = False) -> None:
+        self.name = name
+        self.negate = negate
+
+    def raw(self, line: bytes) -> Optional[bool]:
+        kind, _body = raw_field(line, self.name)
+        if kind == UNKNOWN:
+            return None
+        return (kind in (ABSENT, NULL)) != self.negate
+
+    def __call__(self, record: dict) -> bool:
+        return (record.get(self.name) is None) != self.negate
+
+
+def translated_is_null() -> FieldIsNull:
+    return FieldIsNull("translated")
+
+
+def translated_not_null() -> FieldIsNull:
+    return FieldIsNull("translated", negate=True)
+
+
+def has_locres_import() -> FieldIsNull:
+    return FieldIsNull("locresImport", negate=True)
+
+
+class Untranslated(Predicate):
+    """The record has an original text (``source``, else ``locresImport``) and ``translated`` is null or equal to it."""
+
+    def raw(self, line: bytes) -> Optional[bool]:
+        # Most catalog lines are translated records in json.dumps layout: one search settles them.
+        if (
+            _TRANSLATED_SOURCE.search(line) is not None
+            and line.count(b'"source"') == 1
+            and line.count(b'"translated"') == 1
+        ):
+            return False
+        kind, translated = raw_field(line, "translated")
+        if kind == UNKNOWN:
+            return None
+        original_kind, original = raw_field(line, "source")
+        if original_kind in (ABSENT, NULL):
+            original_kind, original = raw_field(line, "locresImport")
+        if original_kind == UNKNOWN:
+            return None
+        if original_kind in (ABSENT, NULL):
+            return False
+        if kind in (ABSENT, NULL):
+            return True
+        if kind == STRING and original_kind == STRING:
+            return translated == original
+        if (kind == OTHER) != (original_kind == OTHER):
+            return False
+        return None
+
+    def __call__(self, record: dict) -> bool:
+        source = record.get("source")
+        original = source if source is not None else record.get("locresImport")
+        if original is None:
+            return False
+        translated = record.get("translated")
+        return translated is None or translated == original
+
+
+class RecordFilter:
+    """All of ``predicates``; decodes a line only when the raw checks leave it in the running."""
+
+    def __init__(self, predicates: Iterable[Predicate]) -> None:
+        self.predicates = tuple(predicates)
+        self.decoded = 0
+        self.skipped = 0  # lines rejected without decoding
+
+    def select(self, raw: bytes) -> Optional[dict]:
+        """The decoded record if it matches, else None (also for blank, invalid and non-object lines)."""
+        undecided = []
+        for predicate in self.predicates:
+            verdict = predicate.raw(raw)
+            if verdict is False:
+                self.skipped += 1
+                return None
+            if verdict is None:
+                undecided.append(predicate)
+        self.decoded += 1
+        try:
+            record = decode_line(raw)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(record, dict):
+            return None
+        for predicate in undecided:
+            if not predicate(record):
+                return None
+        return record
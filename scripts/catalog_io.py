@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""Shared NDJSON catalog reading helpers, including multi-process sharded scans.
+
+Large catalogs are split into newline-aligned byte ranges ("shards") that are
+decoded and processed in a ``ProcessPoolExecutor``. Shard workers are plain
+module-level functions ``worker(shard, *args) -> (line_count, value)``; the
+driver yields ``(line_offset, value)`` in file order, where ``line_offset`` is
+the number of lines before the shard so workers can report shard-local line
+numbers.
+
+``CatalogPass`` is the plugin interface of ``catalog_pipeline.py``, which
+dispatches every decoded record of one scan to a chain of passes.
+
+``CatalogWriter`` rewrites a catalog atomically, copying unchanged lines
+through as their original bytes so only mutated records are re-encoded.
+
+Catalog paths may name a sharded catalog (see ``catalog_shards``): scans
+cover its shards in order, ``rewrite_lines`` rewrites only the shards holding
+replaced lines, and ``open_catalog_writer`` returns a ``ShardedCatalogWriter``
+routing each record to its namespace's shard.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from catalog_codec import decode, encode
+from catalog_compression import compress_stream, compression_of, decompressed_copy, open_catalog
+from catalog_shards import (
+    DEFAULT_BUCKETS,
+    ShardEntry,
+    ShardedCatalog,
+    catalog_files,
+    count_lines,
+    file_sha256,
+    is_sharded,
+    open_sharded,
+    resolve_catalog,
+)
+from script_stats import get_stats
+
+DEFAULT_SHARD_BYTES = 8 * 1024 * 1024
+# Upper bound on a plain file's shard, so no single worker result grows with the catalog.
+MAX_SHARD_BYTES = DEFAULT_SHARD_BYTES
+# Below this size the pool start-up costs more than it saves.
+SERIAL_THRESHOLD_BYTES = 16 * 1024 * 1024
+# The same for compressed catalogs, which shrink at least fourfold.
+COMPRESSED_SERIAL_THRESHOLD_BYTES = SERIAL_THRESHOLD_BYTES // 4
+WRITE_BUFFER_BYTES = 1 << 20
+COPY_CHUNK_BYTES = 64 * 1024
+
+ShardWorker = Callable[..., Tuple[int, Any]]
+
+# Verdicts returned by ``CatalogPass.process``.
+KEEP = 0
+CHANGED = 1  # the pass modified the record in place
+DROP = 2  # later passes do not see the record
+
+
+class Shard(NamedTuple):
+    path: str
+    index: int
+    start: int
+    end: int
+    # Byte offset of ``path`` within the whole catalog (non-zero for later shards of a sharded catalog).
+    base: int = 0
+
+
+class CatalogLineError(ValueError):
+    """A catalog line could not be decoded; ``line`` is 1-based."""
+
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+    def __reduce__(self):
+        return type(self), (self.line, self.message)
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def split_shards(path: Path | str, count: int, min_bytes: int = DEFAULT_SHARD_BYTES) -> List[Shard]:
+    """Split ``path`` into at most ``count`` shards that start and end on line boundaries."""
+    path = str(path)
+    size = os.path.getsize(path)
+    count = max(1, min(count, -(-size // max(min_bytes, 1))))
+    if count == 1 or size == 0:
+        return [Shard(path, 0, 0, size)]
+
+    boundaries = [0]
+    with open(path, "rb") as handle:
+        for index in range(1, count):
+            approx = size * index // count
+            if approx <= boundaries[-1]:
+                continue
+            handle.seek(approx - 1)
+            handle.readline()  # consume the rest of the line straddling the cut
+            position = handle.tell()
+            if boundaries[-1] < position < size:
+                boundaries.append(position)
+    boundaries.append(size)
+    return [Shard(path, index, start, end) for index, (start, end) in enumerate(zip(boundaries, boundaries[1:]))]
+
+
+def iter_shard_lines(shard: Shard) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(local_line_number, raw_line)`` for a shard; raw lines keep their newline.
+
+    A compressed file is always one whole-file shard and is decompressed as it is read.
+    """
+    if compression_of(shard.path):
+        with open_catalog(shard.path) as handle:
+            yield from enumerate(handle, 1)
+        return
+    with open(shard.path, "rb") as handle:
+        handle.seek(shard.start)
+        remaining = shard.end - shard.start
+        line_number = 0
+        while remaining > 0:
+            raw = handle.readline()
+            if not raw:
+                break
+            remaining -= len(raw)
+            line_number += 1
+            yield line_number, raw
+
+
+def decode_line(raw: bytes) -> Optional[Any]:
+    """Decode one raw catalog line; returns None for blank lines and raises ``json.JSONDecodeError``."""
+    line = raw.strip()
+    if not line:
+        return None
+    return decode(line)
+
+
+def map_shards(
+    path: Path | str,
+    worker: ShardWorker,
+    *args: Any,
+    jobs: Optional[int] = None,
+    min_shard_bytes: int = DEFAULT_SHARD_BYTES,
+) -> Iterator[Tuple[int, Any]]:
+    """Run ``worker(shard, *args)`` over ``path`` and yield ``(line_offset, value)`` in file order.
+
+    At most ``2 * jobs`` shards are in flight so results never pile up faster
+    than the caller consumes them, and plain files are cut into shards of at
+    most ``MAX_SHARD_BYTES`` (also when scanning serially) so each result
+    stays bounded. Closing the generator early cancels the
+    remaining shards. ``CatalogLineError`` raised by a worker is re-raised with
+    its line number rebased to the whole file. The files of a sharded catalog
+    are split in proportion to their size; shards never span two files. A
+    compressed catalog is scanned as one stream, or decompressed to a
+    temporary file first when it is large enough to be worth a parallel scan.
+    """
+    jobs = default_jobs() if jobs is None else max(1, jobs)
+    files = [str(file_path) for file_path in catalog_files(path)]
+    temp_copy: Optional[Path] = None
+    if (
+        jobs > 1
+        and len(files) == 1
+        and compression_of(files[0])
+        and os.path.getsize(files[0]) >= COMPRESSED_SERIAL_THRESHOLD_BYTES
+    ):
+        with get_stats().phase("decompress"):
+            temp_copy = decompressed_copy(files[0])
+        files = [str(temp_copy)]
+    try:
+        yield from _map_files(files, worker, args, jobs, min_shard_bytes)
+    finally:
+        if temp_copy is not None:
+            temp_copy.unlink(missing_ok=True)
+
+
+def _map_files(
+    files: List[str], worker: ShardWorker, args: Tuple[Any, ...], jobs: int, min_shard_bytes: int
+) -> Iterator[Tuple[int, Any]]:
+    sizes = [os.path.getsize(file_path) for file_path in files]
+    size = sum(sizes)
+    shards: List[Shard] = []
+    base = 0
+    serial = jobs == 1 or size < SERIAL_THRESHOLD_BYTES
+    for file_path, file_size in zip(files, sizes):
+        if compression_of(file_path):
+            pieces = [Shard(file_path, 0, 0, file_size)]
+        else:
+            count = -(-file_size // MAX_SHARD_BYTES)
+            if not serial:
+                count = max(count, -(-jobs * 4 * file_size // size))
+            pieces = split_shards(file_path, count, min(min_shard_bytes, MAX_SHARD_BYTES))
+        shards.extend(piece._replace(index=len(shards) + index, base=base) for index, piece in enumerate(pieces))
+        base += file_size
+
+    stats = get_stats()
+    stats.count("bytes", size)
+    line_offset = 0
+    if serial or len(shards) <= 1:
+        for shard in shards:
+            try:
+                line_count, value = worker(shard, *args)
+            except CatalogLineError as exc:
+                if not line_offset:
+                    raise
+                raise CatalogLineError(exc.line + line_offset, exc.message) from exc
+            stats.count("lines", line_count)
+            yield line_offset, value
+            line_offset += line_count
+        return
+
+    pending: Deque[Future] = deque()
+    queue = deque(shards)
+    with ProcessPoolExecutor(max_workers=min(jobs, len(shards))) as executor:
+        try:
+            while queue and len(pending) < jobs * 2:
+                pending.append(executor.submit(worker, queue.popleft(), *args))
+            while pending:
+                future = pending.popleft()
+                try:
+                    line_count, value = future.result()
+                except CatalogLineError as exc:
+                    raise CatalogLineError(exc.line + line_offset, exc.message) from exc
+                if queue:
+                    pending.append(executor.submit(worker, queue.popleft(), *args))
+                stats.count("lines", line_count)
+                yield line_offset, value
+                line_offset += line_count
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def scans_serially(path: Path | str, jobs: Optional[int] = None) -> bool:
+    """Whether ``map_shards(path, ..., jobs=jobs)`` runs its shards in this process."""
+    if (default_jobs() if jobs is None else max(1, jobs)) == 1:
+        return True
+    files = catalog_files(path)
+    if len(files) == 1 and compression_of(files[0]):
+        return os.path.getsize(files[0]) < COMPRESSED_SERIAL_THRESHOLD_BYTES
+    return sum(os.path.getsize(file_path) for file_path in files) < SERIAL_THRESHOLD_BYTES
+
+
+def iter_catalog_records(path: Path | str) -> Iterator[Any]:
+    """Decode the whole catalog in this process one line at a time, skipping blank lines.
+
+    The serial counterpart of a ``map_shards`` decode for callers that must
+    not hold a shard's records at once; counts ``bytes`` and ``lines`` the
+    same way. ``CatalogLineError`` carries the whole-catalog line number.
+    """
+    stats = get_stats()
+    stats.count("bytes", sum(os.path.getsize(file_path) for file_path in catalog_files(path)))
+    line_number = 0
+    try:
+        for line_number, raw in iter_catalog_raw(path):
+            try:
+                record = decode_line(raw)
+            except json.JSONDecodeError as exc:
+                raise CatalogLineError(line_number, str(exc)) from exc
+            if record is not None:
+                yield record
+    finally:
+        stats.count("lines", line_number)
+
+
+def iter_catalog_raw(path: Path | str) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(line_number, raw_line)`` for the whole catalog, across the files of a sharded one."""
+    line_offset = 0
+    for file_path in catalog_files(path):
+        line_number = 0
+        with open_catalog(file_path) as handle:
+            for line_number, raw in enumerate(handle, 1):
+                yield line_offset + line_number, raw
+        line_offset += line_number
+
+
+class CatalogPass:
+    """One step of a ``catalog_pipeline.py`` run.
+
+    Instances are built from ``options`` (a dict of plain values) both in the
+    driver and in every shard worker. Per-shard results live in the
+    accumulator returned by ``shard_state`` and are shipped back to the
+    driver, which folds them into its own instance with ``merge``.
+    """
+
+    name = ""
+    mutates = False  # may return CHANGED
+    strict = False  # undecodable lines abort the run instead of being skipped
+
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.options = options
+
+    def shard_state(self) -> Any:
+        return None
+
+    def process(self, state: Any, record: dict, line: int) -> int:
+        raise NotImplementedError
+
+    def close_shard(self, state: Any) -> Any:
+        return state
+
+    def begin(self) -> None:
+        """Driver-side setup before the first ``merge``."""
+
+    def merge(self, state: Any, line_offset: int) -> None:
+        raise NotImplementedError
+
+    def finish(self) -> int:
+        """Report results; returns the pass's exit status."""
+        return 0
+
+    def close(self) -> None:
+        """Release driver-side resources; called even when the run fails."""
+
+
+def encode_record(record: Any, ending: bytes = b"\n") -> bytes:
+    """``json.dumps(record, ensure_ascii=False)`` as UTF-8, followed by ``ending``."""
+    return encode(record).encode("utf-8") + ending
+
+
+def line_ending(raw: bytes) -> bytes:
+    """The newline sequence ending ``raw``; a final line without one gets a plain newline."""
+    return raw[len(raw.rstrip(b"\r\n")):] or b"\n"
+
+
+class CatalogWriter:
+    """Atomically (re)write a catalog, passing unchanged lines through byte for byte.
+
+    Output goes through a large buffer into a temp file next to ``path``,
+    which replaces ``path`` when the ``with`` block exits cleanly and is
+    removed otherwise (or when ``discard`` was set). The result keeps the
+    permissions of ``path`` (or of ``mode_from`` when ``path`` is new),
+    falling back to the umask default. A ``.gz``/``.xz`` path is written
+    compressed at ``level`` (see ``catalog_compression.compression_level``).
+    """
+
+    def __init__(self, path: Path | str, mode_from: Optional[Path | str] = None, level: Optional[int] = None) -> None:
+        self.path = Path(path)
+        self.mode_from = Path(mode_from) if mode_from else None
+        self.level = level
+        self.discard = False
+        self._handle: Optional[BinaryIO] = None
+        self._file: Optional[BinaryIO] = None
+        self._tmp_name = ""
+
+    def __enter__(self) -> "CatalogWriter":
+        fd, self._tmp_name = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp", dir=str(self.path.parent))
+        self._file = self._handle = os.fdopen(fd, "wb", buffering=WRITE_BUFFER_BYTES)
+        compression = compression_of(self.path)
+        if compression is not None:
+            self._handle = compress_stream(self._file, compression, self.level)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        try:
+            try:
+                self._handle.close()
+            finally:
+                self._file.close()
+            if exc_type is not None or self.discard:
+                return
+            for template in (self.path, self.mode_from):
+                if template is not None and template.exists():
+                    shutil.copymode(template, self._tmp_name)
+                    break
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(self._tmp_name, 0o666 & ~umask)
+            os.replace(self._tmp_name, self.path)
+        finally:
+            Path(self._tmp_name).unlink(missing_ok=True)
+
+    def write_raw(self, raw: bytes, namespace: Optional[str] = None) -> None:
+        """Write one or more raw lines; ``namespace`` only matters to ``ShardedCatalogWriter``."""
+        self._handle.write(raw)
+
+    def write_record(self, record: Any, ending: bytes = b"\n") -> None:
+        self._handle.write(encode_record(record, ending))
+
+    def copy(self, source: BinaryIO, length: Optional[int] = None) -> None:
+        """Copy ``length`` bytes (or everything up to EOF) from ``source``."""
+        if length is None:
+            shutil.copyfileobj(source, self._handle, WRITE_BUFFER_BYTES)
+            return
+        while length > 0:
+            chunk = source.read(min(length, WRITE_BUFFER_BYTES))
+            if not chunk:
+                break
+            self._handle.write(chunk)
+            length -= len(chunk)
+
+    def copy_lines(self, source: BinaryIO, count: int) -> None:
+        """Copy the next ``count`` lines of ``source`` without splitting them in Python."""
+        # Start small so short gaps between dense replacements do not each read a full buffer.
+        size = COPY_CHUNK_BYTES
+        while count > 0:
+            chunk = source.read(size)
+            if not chunk:
+                return
+            newlines = chunk.count(b"\n")
+            if newlines < count:
+                self._handle.write(chunk)
+                count -= newlines
+                size = min(size * 2, WRITE_BUFFER_BYTES)
+                continue
+            end = -1
+            for _ in range(count):
+                end = chunk.find(b"\n", end + 1)
+            self._handle.write(memoryview(chunk)[:end + 1])
+            source.seek(end + 1 - len(chunk), os.SEEK_CUR)
+            return
+
+
+def _record_namespace(record: Any) -> str:
+    return str(record.get("namespace") or "") if isinstance(record, dict) else ""
+
+
+class ShardedCatalogWriter:
+    """``CatalogWriter`` for a sharded catalog: each record goes to its namespace's shard.
+
+    Shards are written through ``CatalogWriter``s and replaced together when
+    the ``with`` block exits cleanly. A shard whose new bytes equal the file on
+    disk is left untouched (so git and LFS see no change), shards that receive
+    no records are deleted, and the manifest is rewritten last. Raw lines
+    should come with their namespace; without one they are decoded to find it.
+    """
+
+    def __init__(self, root: Path | str, buckets: Optional[int] = None) -> None:
+        self.root = Path(root)
+        if is_sharded(self.root):
+            self.catalog = ShardedCatalog.load(self.root)
+        else:
+            self.catalog = ShardedCatalog(self.root, buckets or DEFAULT_BUCKETS)
+        self._writers: Dict[str, Tuple[CatalogWriter, Any, List[int]]] = {}
+
+    def __enter__(self) -> "ShardedCatalogWriter":
+        self.root.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def _shard(self, namespace: str) -> Tuple[CatalogWriter, Any, List[int]]:
+        name = self.catalog.file_for(namespace)
+        shard = self._writers.get(name)
+        if shard is None:
+            writer = CatalogWriter(self.root / name)
+            writer.__enter__()
+            shard = self._writers[name] = (writer, hashlib.sha256(), [0, 0])
+        return shard
+
+    def write_raw(self, raw: bytes, namespace: Optional[str] = None) -> None:
+        if namespace is None:
+            namespace = _record_namespace(decode_line(raw))
+        writer, hasher, counts = self._shard(namespace)
+        writer.write_raw(raw)
+        hasher.update(raw)
+        if raw.count(b"\n") > 1:
+            counts[0] += sum(1 for line in raw.splitlines() if line.strip())
+        elif raw.strip():
+            counts[0] += 1
+        counts[1] += len(raw)
+
+    def write_record(self, record: Any, ending: bytes = b"\n") -> None:
+        self.write_raw(encode_record(record, ending), _record_namespace(record))
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        entries: Dict[str, ShardEntry] = {}
+        if exc_type is None:
+            for name, (writer, hasher, (records, size)) in self._writers.items():
+                path = self.root / name
+                entries[name] = ShardEntry(name, hasher.hexdigest(), records, size)
+                if path.is_file() and path.stat().st_size == size and file_sha256(path) == entries[name].sha256:
+                    writer.discard = True
+        # Each shard is replaced atomically; a failure part-way leaves the
+        # manifest describing the old shards (``shard_catalog.py status`` shows which changed).
+        error: Optional[BaseException] = None
+        for writer, _hasher, _counts in self._writers.values():
+            try:
+                writer.__exit__(exc_type or (type(error) if error else None), None, None)
+            except BaseException as failure:  # keep closing the others, then re-raise
+                error = error or failure
+        if error is not None:
+            raise error
+        if exc_type is not None:
+            return
+        for name in set(self.catalog.shards) - set(entries):
+            (self.root / name).unlink(missing_ok=True)
+        self.catalog.shards = entries
+        self.catalog.save()
+
+
+def open_catalog_writer(
+    path: Path | str, mode_from: Optional[Path | str] = None
+) -> CatalogWriter | ShardedCatalogWriter:
+    """A writer replacing the catalog at ``path`` in whichever layout it has."""
+    resolved = resolve_catalog(path)
+    if is_sharded(resolved):
+        return ShardedCatalogWriter(resolved)
+    return CatalogWriter(path, mode_from=mode_from)
+
+
+class CatalogSource:
+    """Raw lines of a catalog by byte offset, ``Shard.base`` included for sharded catalogs.
+
+    Offsets of a compressed catalog count decompressed bytes; it is read from
+    a decompressed temporary copy, removed by ``close``.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.files = catalog_files(path)
+        self._temp_copies: List[Path] = []
+        for index, file_path in enumerate(self.files):
+            if compression_of(file_path):
+                self.files[index] = decompressed_copy(file_path)
+                self._temp_copies.append(self.files[index])
+        self.bases: List[int] = []
+        base = 0
+        for file_path in self.files:
+            self.bases.append(base)
+            base += os.path.getsize(file_path)
+        self._handles: Dict[int, BinaryIO] = {}
+
+    def readline_at(self, offset: int) -> bytes:
+        index = max(0, bisect_right(self.bases, offset) - 1)
+        handle = self._handles.get(index)
+        if handle is None:
+            handle = self._handles[index] = open(self.files[index], "rb")
+        handle.seek(offset - self.bases[index])
+        return handle.readline()
+
+    def close(self) -> None:
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
+        for temp_copy in self._temp_copies:
+            temp_copy.unlink(missing_ok=True)
+        self._temp_copies.clear()
+
+    def __enter__(self) -> "CatalogSource":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _rewrite_sharded(
+    catalog: ShardedCatalog, replacements: Dict[int, bytes], output: Optional[Path | str] = None
+) -> None:
+    """``rewrite_lines`` for a sharded catalog: only shards holding replaced lines are rewritten.
+
+    With ``output`` the result is a new sharded catalog directory; untouched
+    shards are copied there.
+    """
+    target = ShardedCatalog(Path(output), catalog.buckets, catalog.shards.values()) if output else catalog
+    if output:
+        target.root.mkdir(parents=True, exist_ok=True)
+    ordered = sorted(replacements)
+    position = 0
+    line_offset = 0
+    touched = []
+    for name in catalog.files():
+        path = catalog.root / name
+        lines = count_lines(path)
+        local: Dict[int, bytes] = {}
+        while position < len(ordered) and ordered[position] <= line_offset + lines:
+            local[ordered[position] - line_offset] = replacements[ordered[position]]
+            position += 1
+        line_offset += lines
+        if local:
+            _rewrite_file(path, local, target.root / name)
+            touched.append(name)
+        elif output:
+            with open(path, "rb") as source, CatalogWriter(target.root / name, mode_from=path) as writer:
+                writer.copy(source)
+    if position < len(ordered):
+        raise ValueError(f"line {ordered[position]} is past the end of {catalog.root} ({line_offset} lines)")
+    target.refresh(touched)
+    target.save()
+
+
+def rewrite_lines(path: Path | str, replacements: Dict[int, bytes], output: Optional[Path | str] = None) -> None:
+    """Write ``path`` with the given 1-based lines replaced to ``output`` (default: in place).
+
+    Runs of untouched lines are block-copied, so rewriting a catalog after a
+    handful of fixes costs about as much as copying the file. For a sharded
+    catalog ``output`` is a directory and only the affected shards are rewritten.
+    """
+    sharded = open_sharded(path)
+    if sharded is not None:
+        _rewrite_sharded(sharded, replacements, output)
+        return
+    _rewrite_file(resolve_catalog(path), replacements, Path(output) if output else None)
+
+
+def _rewrite_file(path: Path, replacements: Dict[int, bytes], output: Optional[Path] = None) -> None:
+    if compression_of(path):
+        # A decompressing stream cannot seek back, which ``copy_lines`` relies on.
+        with open_catalog(path) as source, CatalogWriter(output or path, mode_from=path) as writer:
+            for line_number, raw in enumerate(source, 1):
+                writer.write_raw(replacements.get(line_number, raw))
+        return
+    with open(path, "rb") as source, CatalogWriter(output or path, mode_from=path) as writer:
+        next_line = 1
+        for line_number in sorted(replacements):
+            writer.copy_lines(source, line_number - next_line)
+            source.readline()
+            writer.write_raw(replacements[line_number])
+            next_line = line_number + 1
+        writer.copy(source)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Compact in-memory catalog: ``__slots__`` records with shared strings.
+
+Holding a whole catalog as one dict per line costs several hundred bytes of
+dict overhead per record, plus a separate copy of every repeated namespace,
+source and translation string. ``CatalogRecord`` keeps the fixed schema
+fields in slots, shares equal string values across the catalog, and
+remembers the field order (``layout``, itself shared) so a record encodes
+back to the same JSON as the dict it came from. Unknown fields go to a
+per-record ``extra`` dict.
+
+Records keep the byte offset of their line in the catalog they were loaded
+from (counted across the shards of a sharded catalog) until they are
+modified, and ``Catalog.save`` copies those lines through instead of
+re-encoding them (see ``catalog_io.CatalogWriter``).
+
+Records also answer the dict calls the catalog scripts use on rows (``get``,
+``[]``, ``in``, ``pop``), with the JSON field names.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from catalog_io import CatalogLineError, CatalogSource, Shard, decode_line, iter_shard_lines, map_shards, open_catalog_writer
+from catalog_shards import catalog_exists
+
+# JSON field name -> slot
+FIELD_SLOTS: Dict[str, str] = {
+    "namespace": "namespace",
+    "key": "key",
+    "source": "source",
+    "translated": "translated",
+    "locresImport": "locres_import",
+    "importedHash": "imported_hash",
+}
+
+Normalizer = Callable[[dict], Any]
+
+# field order -> (the shared copy of it, the fields without a slot)
+_layouts: Dict[Tuple[str, ...], Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+
+
+def _layout_info(names: Iterable[str]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    names = tuple(names)
+    info = _layouts.get(names)
+    if info is None:
+        info = _layouts[names] = (names, tuple(name for name in names if name not in FIELD_SLOTS))
+    return info
+
+
+def _shared_layout(names: Iterable[str]) -> Tuple[str, ...]:
+    return _layout_info(names)[0]
+
+
+class CatalogRecord:
+    """One catalog line; ``offset`` is the byte offset of its unmodified line, or -1."""
+
+    __slots__ = ("namespace", "key", "source", "translated", "locres_import", "imported_hash", "extra", "layout", "offset")
+
+    def __init__(self) -> None:
+        self.namespace = self.key = self.source = self.translated = None
+        self.locres_import = self.imported_hash = None
+        self.extra: Optional[Dict[str, Any]] = None
+        self.layout: Tuple[str, ...] = ()
+        self.offset = -1
+
+    @classmethod
+    def from_dict(
+        cls, fields: Dict[str, Any], offset: int = -1, strings: Optional[Dict[str, str]] = None
+    ) -> "CatalogRecord":
+        """Build a record from a decoded line; string values are shared through ``strings`` when given."""
+        record = cls.__new__(cls)
+        get = fields.get
+        namespace = get("namespace")
+        source = get("source")
+        translated = get("translated")
+        locres_import = get("locresImport")
+        if strings is not None:
+            share = strings.setdefault
+            if type(namespace) is str:
+                namespace = share(namespace, namespace)
+            if type(source) is str:
+                source = share(source, source)
+            if type(translated) is str:
+                translated = share(translated, translated)
+            if type(locres_import) is str:
+                locres_import = share(locres_import, locres_import)
+        record.namespace = namespace
+        record.key = get("key")
+        record.source = source
+        record.translated = translated
+        record.locres_import = locres_import
+        record.imported_hash = get("importedHash")
+        record.layout, extra_names = _layout_info(fields)
+        record.extra = {name: fields[name] for name in extra_names} if extra_names else None
+        record.offset = offset
+        return record
+
+    def share_strings(self, strings: Dict[str, str]) -> None:
+        """Replace string values by the copies in ``strings`` (adding new ones); keys are left alone."""
+        self.layout = _shared_layout(self.layout)
+        share = strings.setdefault
+        if type(self.namespace) is str:
+            self.namespace = share(self.namespace, self.namespace)
+        if type(self.source) is str:
+            self.source = share(self.source, self.source)
+        if type(self.translated) is str:
+            self.translated = share(self.translated, self.translated)
+        if type(self.locres_import) is str:
+            self.locres_import = share(self.locres_import, self.locres_import)
+
+    def _value(self, name: str) -> Any:
+        slot = FIELD_SLOTS.get(name)
+        return getattr(self, slot) if slot is not None else self.extra[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.layout
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.layout:
+            raise KeyError(name)
+        return self._value(name)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self._value(name) if name in self.layout else default
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        slot = FIELD_SLOTS.get(name)
+        if slot is not None:
+            setattr(self, slot, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[name] = value
+        if name not in self.layout:
+            self.layout = _shared_layout(self.layout + (name,))
+        self.offset = -1
+
+    def pop(self, name: str, *default: Any) -> Any:
+        if name not in self.layout:
+            if default:
+                return default[0]
+            raise KeyError(name)
+        value = self._value(name)
+        slot = FIELD_SLOTS.get(name)
+        if slot is not None:
+            setattr(self, slot, None)
+        else:
+            del self.extra[name]
+        self.layout = _shared_layout(field for field in self.layout if field != name)
+        self.offset = -1
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: self._value(name) for name in self.layout}
+
+    def __repr__(self) -> str:
+        return f"CatalogRecord({self.to_dict()!r})"
+
+
+def normalize_unchanged(record: dict, normalize: Normalizer) -> bool:
+    """Run ``normalize`` on ``record`` in place; True when that left the record as it was."""
+    before = list(record.items())
+    normalize(record)
+    return list(record.items()) == before
+
+
+def _load_shard(shard: Shard, normalize: Optional[Normalizer]) -> Tuple[int, List[CatalogRecord]]:
+    strings: Dict[str, str] = {}
+    records: List[CatalogRecord] = []
+    offset = shard.base + shard.start
+    line_number = 0
+    for line_number, raw in iter_shard_lines(shard):
+        line_offset = offset
+        offset += len(raw)
+        try:
+            fields = decode_line(raw)
+        except json.JSONDecodeError as exc:
+            raise CatalogLineError(line_number, str(exc)) from exc
+        if not isinstance(fields, dict):
+            continue
+        if normalize is not None and not normalize_unchanged(fields, normalize):
+            line_offset = -1
+        records.append(CatalogRecord.from_dict(fields, line_offset, strings))
+    return line_number, records
+
+
+class Catalog:
+    """The records of one NDJSON catalog, in file order."""
+
+    def __init__(self, path: Optional[Path | str] = None, records: Optional[List[CatalogRecord]] = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self.records: List[CatalogRecord] = records if records is not None else []
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[CatalogRecord]:
+        return iter(self.records)
+
+    def __getitem__(self, index: int) -> CatalogRecord:
+        return self.records[index]
+
+    def append(self, record: CatalogRecord | Dict[str, Any]) -> CatalogRecord:
+        if not isinstance(record, CatalogRecord):
+            record = CatalogRecord.from_dict(record)
+        self.records.append(record)
+        return record
+
+    def save(self, path: Optional[Path | str] = None, sort_key: Optional[Callable[[CatalogRecord], Any]] = None) -> None:
+        """Atomically write the records (sorted by ``sort_key`` if given) to ``path`` (default: where they came from).
+
+        Unmodified records are copied from the file they were loaded from,
+        which must not have changed since. A sharded catalog is written back
+        sharded, rewriting only the shards whose bytes change.
+        """
+        target = Path(path) if path is not None else self.path
+        if target is None:
+            raise ValueError("Catalog has no path to save to")
+        records = sorted(self.records, key=sort_key) if sort_key is not None else self.records
+        source = CatalogSource(self.path) if self.path is not None and catalog_exists(self.path) else None
+        try:
+            with open_catalog_writer(target) as writer:
+                for record in records:
+                    if record.offset < 0 or source is None:
+                        writer.write_record(record.to_dict())
+                        continue
+                    writer.write_raw(source.readline_at(record.offset).strip() + b"\n", str(record.namespace or ""))
+        finally:
+            if source is not None:
+                source.close()
+
+
+def load_catalog(path: Path | str, jobs: Optional[int] = None, normalize: Optional[Normalizer] = None) -> Catalog:
+    """Load ``path`` (a catalog file or sharded catalog) into a ``Catalog``; a missing one gives an empty one.
+
+    ``normalize`` is applied to each decoded line first; records it changes
+    are re-encoded on save. Invalid JSON raises ``catalog_io.CatalogLineError``.
+    """
+    path = Path(path)
+    catalog = Catalog(path)
+    if not catalog_exists(path):
+        return catalog
+    shards = 0
+    for _offset, records in map_shards(path, _load_shard, normalize, jobs=jobs):
+        catalog.records.extend(records)
+        shards += 1
+    if shards > 1:
+        # Each worker shared strings within its own shard only.
+        strings: Dict[str, str] = {}
+        for record in catalog.records:
+            record.share_strings(strings)
+    return catalog
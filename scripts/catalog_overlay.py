@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Overlay catalogs: small NDJSON files that adjust a base catalog for one build variant.
+
+Each overlay line names a base record by ``namespace`` and ``key`` and gives
+the ``translated`` text the variant should use instead; ``"translated": null``
+suppresses the translation (the entry is left out of the locres, so the game
+shows its source text). Overlays are applied in order, later ones winning::
+
+    {"namespace": "UI", "key": "Menu_Start", "translated": "Bắt đầu"}
+    {"namespace": "UI", "key": "Menu_Logo", "translated": null}
+
+Overlays are meant to stay small enough to review, so they are loaded whole
+into an ``Overrides`` map. Base records are adjusted one by one as they are
+decoded, which keeps the sharded scan of the base catalog (and never needs
+the base to be sorted); no merged catalog is written anywhere.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from catalog_codec import decode
+from catalog_compression import open_catalog
+
+# (namespace, key) -> translated text, or None to suppress it.
+Overrides = Dict[Tuple[str, str], Optional[str]]
+
+
+def load_overlays(paths: Sequence[Path]) -> Overrides:
+    """Read ``paths`` in order into one overrides map (later files win)."""
+    overrides: Overrides = {}
+    for path in paths:
+        if not path.is_file():
+            raise RuntimeError(f"Overlay not found: {path}")
+        with open_catalog(path) as handle:
+            for line_number, raw in enumerate(handle, 1):
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    record = decode(line)
+                except json.JSONDecodeError as exc:
+                    raise RuntimeError(f"Invalid JSON on line {line_number} of {path}: {exc}") from exc
+                if not isinstance(record, dict) or not record.get("key") or "translated" not in record:
+                    raise RuntimeError(f'Line {line_number} of {path} needs "key" and "translated"')
+                translated = record["translated"]
+                if translated is not None and not isinstance(translated, str):
+                    raise RuntimeError(f'Line {line_number} of {path}: "translated" must be a string or null')
+                overrides[(str(record.get("namespace") or ""), str(record["key"]))] = translated
+    return overrides
+
+
+def apply_override(record: dict, overrides: Overrides) -> bool:
+    """Replace ``record["translated"]`` when an overlay names the record; returns True if one did."""
+    pair = (str(record.get("namespace") or ""), str(record.get("key") or ""))
+    if pair not in overrides:
+        return False
+    record["translated"] = overrides[pair]
+    return True
+
+
+def apply_overrides(records: Iterable[dict], overrides: Overrides, counts: Dict[str, int]) -> Iterator[dict]:
+    """Yield ``records`` with the overrides applied, adding the number adjusted to ``counts["applied"]``."""
+    for record in records:
+        if apply_override(record, overrides):
+            counts["applied"] = counts.get("applied", 0) + 1
+        yield record
+
+
+def format_overlay_stats(overrides: Overrides, applied: int) -> str:
+    suppressed = sum(1 for value in overrides.values() if value is None)
+    line = f"Overlays: {len(overrides)} overrides ({suppressed} suppressing), {applied} applied."
+    if applied < len(overrides):
+        line += f" {len(overrides) - applied} unmatched (no such record in the base catalog)."
+    return line
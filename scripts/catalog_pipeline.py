@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Run the catalog checks, fixes and builds over a single decode of an NDJSON catalog.
+
+The pre-release routine used to run validate-translations.py, fix-quotes.py,
+extract_untranslated.py and build_locres.py one after another, each decoding
+the whole catalog. Here the catalog is scanned once (in newline-aligned
+shards, see ``catalog_io.map_shards``) and every record is handed to the
+selected passes in chain order, so a pass sees the record as left by the
+passes before it. A pass can drop a record from the rest of the chain (the
+``skip`` pass does this for skip-listed entries).
+
+Passes are the ``CatalogPass`` plugins defined in the scripts they replace;
+see ``PASSES``. When a mutating pass changed records (``quotes`` with
+``--fix``), only those lines are re-encoded and the catalog is rewritten
+atomically; every other line is copied through byte for byte.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import script_stats
+from catalog_codec import decode
+from catalog_io import (
+    CHANGED,
+    DROP,
+    CatalogLineError,
+    CatalogPass,
+    Shard,
+    encode_record,
+    iter_shard_lines,
+    line_ending,
+    map_shards,
+    rewrite_lines,
+)
+from catalog_shards import catalog_exists, describe_line
+from script_stats import get_stats
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_INPUT = SCRIPTS_DIR.parent / "translations" / "vi.ndjson"
+
+# name -> (script defining the pass, class name), in the default chain order.
+PASSES: Dict[str, Tuple[str, str]] = {
+    "validate": ("validate-translations.py", "ValidatePass"),
+    "quotes": ("fix-quotes.py", "QuotePass"),
+    "untranslated": ("extract_untranslated.py", "UntranslatedPass"),
+    "skip": ("skip_rules.py", "SkipPass"),
+    "locres": ("build_locres.py", "LocresPass"),
+    "hanviet": ("hanviet.py", "HanVietPass"),
+}
+# Passes only run when named in --passes.
+OPTIONAL_PASSES = ("hanviet",)
+
+PassSpec = Tuple[str, Dict[str, Any]]
+
+
+def load_pass_class(name: str) -> type:
+    script, class_name = PASSES[name]
+    module_name = Path(script).stem.replace("-", "_")
+    module = sys.modules.get(module_name)
+    if module is None:
+        if module_name == Path(script).stem:
+            module = importlib.import_module(module_name)
+        else:
+            # Hyphenated script names are not importable with a plain import.
+            spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / script)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            spec.loader.exec_module(module)
+    return getattr(module, class_name)
+
+
+def build_passes(specs: Sequence[PassSpec]) -> List[CatalogPass]:
+    return [load_pass_class(name)(options) for name, options in specs]
+
+
+def _run_shard(shard: Shard, specs: Sequence[PassSpec]) -> Tuple[int, tuple]:
+    """Dispatch every record of a shard through the pass chain.
+
+    Returns the pass accumulators, the re-encoded ``(local_line, text)`` of
+    changed records and the local numbers of undecodable lines.
+    """
+    passes = build_passes(specs)
+    states = [item.shard_state() for item in passes]
+    chain = list(zip(passes, states))
+    strict = any(item.strict for item in passes)
+    changes: List[Tuple[int, bytes]] = []
+    invalid: List[int] = []
+    line_number = 0
+
+    for line_number, raw in iter_shard_lines(shard):
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            record = decode(line)
+        except json.JSONDecodeError as exc:
+            if strict:
+                raise CatalogLineError(line_number, str(exc)) from exc
+            invalid.append(line_number)
+            continue
+        if not isinstance(record, dict):
+            continue
+
+        changed = False
+        for item, state in chain:
+            verdict = item.process(state, record, line_number)
+            if verdict == DROP:
+                break
+            if verdict == CHANGED:
+                changed = True
+        if changed:
+            changes.append((line_number, encode_record(record, line_ending(raw))))
+
+    states = [item.close_shard(state) for item, state in chain]
+    return line_number, (states, changes, invalid)
+
+
+def run_pipeline(path: Path, specs: Sequence[PassSpec], jobs: Optional[int] = None, write: bool = True) -> int:
+    """Scan ``path`` once through the passes in ``specs``; returns the highest pass exit status."""
+    stats = get_stats()
+    passes = build_passes(specs)
+    replacements: Dict[int, bytes] = {}
+    invalid_lines = 0
+    try:
+        for item in passes:
+            item.begin()
+        try:
+            with stats.phase("scan"), stats.profiled():
+                for line_offset, (states, changes, invalid) in map_shards(path, _run_shard, tuple(specs), jobs=jobs):
+                    for item, state in zip(passes, states):
+                        item.merge(state, line_offset)
+                    for line_number, text in changes:
+                        replacements[line_offset + line_number] = text
+                    invalid_lines += len(invalid)
+        except CatalogLineError as exc:
+            raise RuntimeError(f"Invalid JSON on {describe_line(path, exc.line)}: {exc.message}") from exc
+
+        if invalid_lines:
+            print(f"Skipped {invalid_lines} undecodable lines in {path.name}")
+        if replacements and write:
+            with stats.phase("rewrite") as timer:
+                rewrite_lines(path, replacements)
+                timer.records = len(replacements)
+            print(f"Rewrote {len(replacements)} changed records in {path}")
+
+        status = 0
+        for item in passes:
+            print(f"\n== {item.name} ==")
+            with stats.phase(f"{item.name} finish"):
+                status = max(status, item.finish())
+        return status
+    finally:
+        for item in passes:
+            item.close()
+
+
+def parse_args(argv: Iterable[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run catalog passes over one decode of an NDJSON catalog")
+    parser.add_argument("--input", default=str(DEFAULT_INPUT), help="Catalog to scan (default: translations/vi.ndjson)")
+    parser.add_argument(
+        "--passes",
+        default=",".join(name for name in PASSES if name not in OPTIONAL_PASSES),
+        help="Comma-separated passes, run in the given order (default: %(default)s)",
+    )
+    parser.add_argument("--fix", action="store_true", help="Let mutating passes rewrite the catalog")
+    parser.add_argument("--locres-output", help="Output Game.locres for the locres pass")
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=64,
+        help="MiB of locres rows to buffer before spilling to disk (default: %(default)s)",
+    )
+    parser.add_argument("--temp-dir", help="Directory for spill files (default: system temp)")
+    parser.add_argument("--hash-cache", help="Persisted source-hash table for the locres pass")
+    parser.add_argument("--top", type=int, default=None, help="untranslated pass: only write the K most frequent texts")
+    parser.add_argument("--sample-keys", type=int, default=0, help="untranslated pass: example keys kept per text")
+    parser.add_argument("--templates", action="store_true", help="untranslated pass: collapse texts into slot templates")
+    parser.add_argument(
+        "--untranslated-dir",
+        help="untranslated pass: directory for to_translate.txt/json (default: the catalog's directory)",
+    )
+    parser.add_argument("--hanviet-rules", help="hanviet pass: rules selecting the records to convert")
+    parser.add_argument("--hanviet-output", help="hanviet pass: overlay NDJSON to write")
+    parser.add_argument(
+        "--hanviet-dict",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="hanviet pass: dictionary file (repeatable; default: config/hanviet/*.txt)",
+    )
+    parser.add_argument(
+        "--hanviet-overwrite",
+        action="store_true",
+        help="hanviet pass: also convert records that already have a translation",
+    )
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    script_stats.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    args.passes = [name.strip() for name in args.passes.split(",") if name.strip()]
+    unknown = [name for name in args.passes if name not in PASSES]
+    if unknown:
+        parser.error(f"unknown pass(es): {', '.join(unknown)} (choose from {', '.join(PASSES)})")
+    if "locres" in args.passes and not args.locres_output:
+        parser.error("the locres pass needs --locres-output")
+    if "hanviet" in args.passes and not (args.hanviet_rules and args.hanviet_output):
+        parser.error("the hanviet pass needs --hanviet-rules and --hanviet-output")
+    return args
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    script_stats.start("catalog_pipeline", args)
+    catalog_path = Path(args.input)
+    if not catalog_exists(catalog_path):
+        raise RuntimeError(f"Catalog not found: {catalog_path}")
+
+    options = {
+        "input": str(catalog_path),
+        "fix": args.fix,
+        "locres_output": args.locres_output,
+        "memory_budget": args.memory_budget,
+        "temp_dir": args.temp_dir,
+        "hash_cache": args.hash_cache,
+        "top": args.top,
+        "sample_keys": args.sample_keys,
+        "templates": args.templates,
+        "untranslated_dir": args.untranslated_dir,
+        "hanviet_rules": args.hanviet_rules,
+        "hanviet_output": args.hanviet_output,
+        "hanviet_dict": args.hanviet_dict,
+        "hanviet_overwrite": args.hanviet_overwrite,
+    }
+    specs = [(name, options) for name in args.passes]
+    print(f"Scanning {catalog_path.name} through: {', '.join(args.passes)}")
+    return run_pipeline(catalog_path, specs, args.jobs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
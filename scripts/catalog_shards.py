@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Namespace-sharded catalog layout: ``translations/vi/`` instead of one ``vi.ndjson``.
+
+A sharded catalog is a directory of NDJSON shards plus ``manifest.json``::
+
+    translations/vi/manifest.json
+    translations/vi/00.ndjson ... translations/vi/ff.ndjson
+
+Every record lives in the shard of its namespace's bucket (``shard_bucket``:
+the first four bytes of the SHA-1 of the namespace, modulo ``buckets``), so a
+namespace never spans shards, and shards can be rewritten, fetched
+(``git lfs pull --include``) and committed independently. Within a shard the
+records keep their catalog order. Empty buckets have no file.
+
+The manifest lists the shards in bucket order with the SHA-256 of each file
+(also its git-lfs object id), its record count and its size::
+
+    {"version": 1, "buckets": 256, "shards": [
+        {"file": "00.ndjson", "sha256": "...", "records": 812, "bytes": 203114}, ...]}
+
+Readers treat the listed shards, in manifest order, as one catalog whose line
+numbers run on from shard to shard (``locate_line`` maps them back). The
+helpers in ``catalog_io`` accept either layout wherever they take a catalog
+path, and ``resolve_catalog`` lets ``translations/vi.ndjson`` stand for
+``translations/vi/`` when only the sharded layout exists (or for a
+compressed ``vi.ndjson.gz``/``.xz``, see ``catalog_compression``). ``shard_catalog.py``
+converts between the layouts and checks manifests against the shards.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from catalog_compression import COMPRESSIONS, compressed_variants, open_catalog
+
+MANIFEST_NAME = "manifest.json"
+LAYOUT_VERSION = 1
+DEFAULT_BUCKETS = 256
+SHARD_SUFFIX = ".ndjson"
+
+_CHUNK = 1 << 20
+
+
+class ShardEntry(NamedTuple):
+    file: str
+    sha256: str
+    records: int
+    bytes: int
+
+
+def shard_bucket(namespace: str, buckets: int) -> int:
+    digest = hashlib.sha1(namespace.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % buckets
+
+
+def shard_file_name(bucket: int, buckets: int) -> str:
+    width = max(2, len(f"{buckets - 1:x}"))
+    return f"{bucket:0{width}x}{SHARD_SUFFIX}"
+
+
+def scan_shard(path: Path) -> ShardEntry:
+    """The manifest entry of ``path`` as it is on disk (records are non-blank lines)."""
+    hasher = hashlib.sha256()
+    records = 0
+    size = 0
+    with path.open("rb") as handle:
+        for raw in handle:
+            hasher.update(raw)
+            size += len(raw)
+            if raw.strip():
+                records += 1
+    return ShardEntry(path.name, hasher.hexdigest(), records, size)
+
+
+def file_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def count_lines(path: Path) -> int:
+    """Lines as ``catalog_io.iter_shard_lines`` numbers them (a final line without newline counts)."""
+    lines = 0
+    last = b"\n"
+    with open_catalog(path) as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    return lines + (last != b"\n")
+
+
+class ShardedCatalog:
+    """A sharded catalog directory and its manifest."""
+
+    def __init__(self, root: Path, buckets: int = DEFAULT_BUCKETS, shards: Iterable[ShardEntry] = ()) -> None:
+        if buckets < 1:
+            raise ValueError("buckets must be at least 1")
+        self.root = Path(root)
+        self.buckets = buckets
+        self.shards: Dict[str, ShardEntry] = {entry.file: entry for entry in shards}
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, root: Path) -> "ShardedCatalog":
+        manifest_path = Path(root) / MANIFEST_NAME
+        try:
+            data = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            raise RuntimeError(f"Cannot read catalog manifest {manifest_path}: {exc}") from exc
+        if not isinstance(data, dict) or data.get("version") != LAYOUT_VERSION:
+            raise RuntimeError(f"{manifest_path} is not a version {LAYOUT_VERSION} catalog manifest")
+        try:
+            shards = [
+                ShardEntry(str(item["file"]), str(item["sha256"]), int(item["records"]), int(item["bytes"]))
+                for item in data.get("shards", [])
+            ]
+            return cls(Path(root), int(data["buckets"]), shards)
+        except (KeyError, TypeError, ValueError) as exc:
+            raise RuntimeError(f"Invalid catalog manifest {manifest_path}: {exc}") from exc
+
+    def files(self) -> List[str]:
+        return sorted(self.shards)
+
+    def paths(self) -> List[Path]:
+        """The shard files in catalog order."""
+        return [self.root / name for name in self.files()]
+
+    def file_for(self, namespace: str) -> str:
+        return shard_file_name(shard_bucket(namespace, self.buckets), self.buckets)
+
+    @property
+    def records(self) -> int:
+        return sum(entry.records for entry in self.shards.values())
+
+    def refresh(self, files: Optional[Iterable[str]] = None) -> List[str]:
+        """Re-scan ``files`` (default: every shard file in the directory) into the manifest.
+
+        Files that no longer exist are dropped. Returns the names whose entry changed.
+        """
+        if files is None:
+            names = set(self.shards) | {path.name for path in self.root.glob(f"*{SHARD_SUFFIX}")}
+        else:
+            names = set(files)
+        changed = []
+        for name in sorted(names):
+            path = self.root / name
+            entry = scan_shard(path) if path.is_file() else None
+            if entry != self.shards.get(name):
+                changed.append(name)
+                if entry is None:
+                    del self.shards[name]
+                else:
+                    self.shards[name] = entry
+        return changed
+
+    def status(self) -> List[Tuple[str, str]]:
+        """``(file, state)`` for every shard: ``ok``, ``modified``, ``missing`` or ``untracked``."""
+        result = []
+        for name, entry in sorted(self.shards.items()):
+            path = self.root / name
+            if not path.is_file():
+                result.append((name, "missing"))
+            elif path.stat().st_size != entry.bytes or file_sha256(path) != entry.sha256:
+                result.append((name, "modified"))
+            else:
+                result.append((name, "ok"))
+        for path in sorted(self.root.glob(f"*{SHARD_SUFFIX}")):
+            if path.name not in self.shards:
+                result.append((path.name, "untracked"))
+        return result
+
+    def save(self) -> None:
+        """Atomically write the manifest."""
+        data = {
+            "version": LAYOUT_VERSION,
+            "buckets": self.buckets,
+            "shards": [self.shards[name]._asdict() for name in self.files()],
+        }
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{MANIFEST_NAME}.", dir=str(self.root))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as handle:
+                json.dump(data, handle, indent=2)
+                handle.write("\n")
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_name, 0o666 & ~umask)
+            os.replace(tmp_name, self.manifest_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+
+def is_sharded(path: Path | str) -> bool:
+    return (Path(path) / MANIFEST_NAME).is_file()
+
+
+def resolve_catalog(path: Path | str) -> Path:
+    """``path``, or what stands in for a missing ``<name>.ndjson``.
+
+    That is ``<name>.ndjson.gz``, ``<name>.ndjson.xz`` or the sharded
+    directory ``<name>/``, whichever exists first.
+    """
+    path = Path(path)
+    if path.exists() or path.suffix != SHARD_SUFFIX:
+        return path
+    for variant in compressed_variants(path):
+        if variant.is_file():
+            return variant
+    if is_sharded(path.with_suffix("")):
+        return path.with_suffix("")
+    return path
+
+
+def open_sharded(path: Path | str) -> Optional[ShardedCatalog]:
+    """The ``ShardedCatalog`` at (or standing in for) ``path``, or None for a plain NDJSON file."""
+    path = resolve_catalog(path)
+    return ShardedCatalog.load(path) if is_sharded(path) else None
+
+
+def catalog_exists(path: Path | str) -> bool:
+    path = resolve_catalog(path)
+    return path.is_file() or is_sharded(path)
+
+
+def catalog_files(path: Path | str) -> List[Path]:
+    """The files holding the catalog at ``path``, in catalog order."""
+    sharded = open_sharded(path)
+    return sharded.paths() if sharded is not None else [resolve_catalog(path)]
+
+
+def list_catalogs(directory: Path | str) -> List[Path]:
+    """Every ``*.ndjson`` (or compressed) catalog and sharded catalog directory in ``directory``, by name."""
+    directory = Path(directory)
+    patterns = [f"*{SHARD_SUFFIX}"] + [f"*{SHARD_SUFFIX}{suffix}" for suffix in COMPRESSIONS]
+    found = [path for pattern in patterns for path in directory.glob(pattern) if path.is_file()]
+    found += [path for path in directory.iterdir() if path.is_dir() and is_sharded(path)] if directory.is_dir() else []
+    return sorted(found, key=lambda path: path.name)
+
+
+class LineLocator:
+    """Maps catalog line numbers to ``(file, line in that file)``, counting each shard once."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self.sharded = open_sharded(path) is not None
+        self._files = catalog_files(path)
+        self._bases: List[int] = []
+        base = 0
+        for file_path in self._files[:-1]:
+            self._bases.append(base)
+            base += count_lines(file_path)
+        self._bases.append(base)
+
+    def locate(self, line: int) -> Tuple[Path, int]:
+        if not self._files:
+            return self.path, line
+        index = max(bisect_right(self._bases, line - 1) - 1, 0)
+        return self._files[index], line - self._bases[index]
+
+    def label(self, line: int) -> Tuple[str, int]:
+        """``(name, line)`` for reports: the file name, or ``<catalog>/<shard>`` for a sharded catalog."""
+        file_path, local = self.locate(line)
+        return (f"{file_path.parent.name}/{file_path.name}" if self.sharded else file_path.name), local
+
+    def relabel(self, report: dict) -> dict:
+        """Point a report's ``file``/``line`` at its shard (a no-op for single-file catalogs)."""
+        if self.sharded:
+            report["file"], report["line"] = self.label(report["line"])
+        return report
+
+
+def locate_line(path: Path | str, line: int) -> Tuple[Path, int]:
+    """Map a catalog line number to ``(file, line in that file)``."""
+    return LineLocator(path).locate(line)
+
+
+def describe_line(path: Path | str, line: int) -> str:
+    """``line N of <file>``, naming the shard for sharded catalogs."""
+    file_path, local = locate_line(path, line)
+    return f"line {local} of {file_path if open_sharded(path) is not None else path}"
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Convert a catalog between plain NDJSON and gzip/xz compression.
+
+    python scripts/compress_catalog.py translations/vi.ndjson --format xz --level 9   # -> vi.ndjson.xz
+    python scripts/compress_catalog.py translations/vi.ndjson.xz --decompress         # -> vi.ndjson
+
+The source is removed once the converted file is in place (unless
+``--keep``): a plain ``vi.ndjson`` takes precedence over ``vi.ndjson.xz``, so
+keeping both would leave the scripts reading the plain one. The lines are
+copied through unchanged. See ``catalog_compression`` for how the scripts
+read and write compressed catalogs.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Iterable
+
+import script_stats
+from catalog_compression import COMPRESSIONS, LEVEL_ENV, compression_of, open_catalog
+from catalog_io import CatalogWriter
+from script_stats import get_stats
+
+_COPY_BUFFER = 1 << 20
+
+# --format values: the compression suffixes without their dot
+FORMATS = [suffix.lstrip(".") for suffix in COMPRESSIONS]
+
+
+def convert(source: Path, output: Path, level: int | None = None) -> int:
+    """Copy ``source`` to ``output``, (de)compressing as their names say; returns the uncompressed size."""
+    copied = 0
+    with get_stats().phase("convert") as timer, open_catalog(source) as handle, CatalogWriter(
+        output, mode_from=source, level=level
+    ) as writer:
+        for chunk in iter(lambda: handle.read(_COPY_BUFFER), b""):
+            writer.write_raw(chunk)
+            copied += len(chunk)
+        timer.records = copied
+    return copied
+
+
+def parse_args(argv: Iterable[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compress or decompress a catalog NDJSON")
+    parser.add_argument("catalog", help="Catalog to convert")
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="xz",
+        help="Compression to apply (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--level",
+        type=int,
+        default=None,
+        help=f"Compression level 0-9 (default: ${LEVEL_ENV}, else 6)",
+    )
+    parser.add_argument("--decompress", action="store_true", help="Write the plain catalog instead")
+    parser.add_argument("--output", help="File to write (default: derived from the catalog name)")
+    parser.add_argument("--keep", action="store_true", help="Keep the source catalog")
+    script_stats.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    script_stats.start("compress_catalog", args)
+    source = Path(args.catalog)
+    if not source.is_file():
+        raise RuntimeError(f"Catalog not found: {source}")
+    plain = source.with_suffix("") if compression_of(source) else source
+    if args.output:
+        output = Path(args.output)
+    elif args.decompress:
+        output = plain
+    else:
+        output = plain.with_name(f"{plain.name}.{args.format}")
+    if output.resolve() == source.resolve():
+        raise RuntimeError(f"{source} is already {'plain' if args.decompress else args.format}")
+
+    uncompressed = convert(source, output, args.level)
+    stored = output.stat().st_size
+    ratio = f" ({uncompressed / stored:.1f}x)" if stored and compression_of(output) else ""
+    print(f"Wrote {output}: {stored} bytes from {uncompressed} uncompressed{ratio}")
+    if not args.keep:
+        source.unlink()
+        print(f"Removed {source}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
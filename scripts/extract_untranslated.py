@@ -1,89 +1,59 @@
 #!/usr/bin/env python3
 """Extract untranslated entries from vi.ndjson, group by unique source text."""
 
+import argparse
 import json
 import re
-from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
 
-# Load skip rules
-skip_rules = []
-skip_file = Path(__file__).parent.parent / "config" / "translation-skip.json"
-if skip_file.exists():
-    with open(skip_file, "r", encoding="utf-8") as f:
-        config = json.load(f)
-        skip_rules = config.get("rules", [])
+import script_stats
+from catalog_filter import NamespacePrefix, RecordFilter, Untranslated
+from catalog_compression import compression_of
+from catalog_io import KEEP, CatalogPass, iter_shard_lines, map_shards
+from catalog_shards import is_sharded, resolve_catalog
+from script_stats import get_stats
+from skip_rules import should_skip_translation
+from source_index import open_index, read_lines
+from text_templates import collapse_families, rank
+
+TRANSLATIONS_DIR = Path(__file__).parent.parent / "translations"
 
 def should_skip(entry):
     """Check if entry matches any skip rule."""
-    namespace = entry.get("namespace", "")
-    key = entry.get("key", "")
-    source = entry.get("source") or entry.get("locresImport") or ""
-
-    for rule in skip_rules:
-        rule_ns = rule.get("namespace", "")
-        key_regex = rule.get("keyRegex")
-        source_pattern = rule.get("sourcePattern")
-
-        # Check namespace match
-        if rule_ns and namespace != rule_ns:
-            continue
-
-        # Check key regex if specified
-        if key_regex:
-            if not re.match(key_regex, key):
-                continue
-
-        # Check source pattern if specified
-        if source_pattern:
-            if not re.match(source_pattern, source):
-                continue
-
-        # All conditions matched - skip this entry
-        return True
-
-    return False
+    return should_skip_translation(entry.get("namespace", ""), entry.get("key"), entry.get("source"))
+
+# Whole-text shapes that are technical rather than translatable, tried as one
+# alternation anchored like the per-pattern re.match(r'^...$') checks it replaces.
+TECHNICAL_PATTERNS = (
+    r'[\d.,/\-\+\*%]+',  # pure numbers
+    r'\\[\d]+',  # format specifiers like \10, \1, \100
+    r'\(@@\w+\)\(/\w+\)',  # placeholders like (@@Name)(/Name)
+    r"""[…？！。、，；：""【】《》（）\-—/\.,!?;:'"()\[\]<>]+""",  # pure punctuation
+    r'[A-Za-z][A-Za-z0-9_]*',  # pure ASCII identifiers (PascalCase, camelCase, snake_case)
+    r'[A-Z][a-z]+(?:\d+)?',  # pure Pinyin-like (capitalized words without Chinese)
+)
+_TECHNICAL_MATCH = re.compile('(?:' + '|'.join(TECHNICAL_PATTERNS) + ')$').match
+_CHINESE_SEARCH = re.compile(r'[\u4e00-\u9fff]').search
+
+CLASSIFY_CACHE_SIZE = 1 << 16
 
 def is_technical_text(text):
     """Check if text is technical/placeholder that shouldn't be translated."""
-    if not text:
-        return True
-
-    # Skip pure numbers
-    if re.match(r'^[\d.,/\-\+\*%]+$', text):
+    if not text or text == '__NULL__':
         return True
-
-    # Skip format specifiers like \10, \1, \100
-    if re.match(r'^\\[\d]+$', text):
-        return True
-
-    # Skip placeholders like (@@Name)(/Name)
-    if re.match(r'^\(@@\w+\)\(/\w+\)$', text):
-        return True
-
-    # Skip __NULL__
-    if text == '__NULL__':
-        return True
-
-    # Skip pure punctuation
-    if re.match(r'^[…？！。、，；：""''【】《》（）\-—/\\.,!?;:\'"()\[\]<>]+$', text):
-        return True
-
-    # Skip pure ASCII identifiers (PascalCase, camelCase, snake_case)
-    if re.match(r'^[A-Za-z][A-Za-z0-9_]*$', text):
-        return True
-
-    # Skip pure Pinyin-like (capitalized words without Chinese)
-    if re.match(r'^[A-Z][a-z]+(\d+)?$', text):
-        return True
-
-    return False
+    return _TECHNICAL_MATCH(text) is not None
 
 def has_chinese(text):
     """Check if text contains Chinese characters."""
-    if not text:
+    if not text or text.isascii():
         return False
-    return bool(re.search(r'[\u4e00-\u9fff]', text))
+    return _CHINESE_SEARCH(text) is not None
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def needs_translation(text):
+    """Memoized: non-technical text with Chinese characters."""
+    return has_chinese(text) and not is_technical_text(text)
 
 def is_untranslated(entry):
     """Check if an entry is untranslated."""
@@ -105,84 +75,232 @@ def is_untranslated(entry):
 
     return False
 
-def main():
-    vi_file = Path(__file__).parent.parent / "translations" / "vi.ndjson"
-
-    # Group by unique source text
-    untranslated_groups = defaultdict(list)
+class SourceGroups:
+    """Occurrence counts of untranslated originals (first-seen order) plus a bounded key sample per text."""
+
+    def __init__(self, sample_size=0):
+        self.sample_size = sample_size
+        self.counts = {}
+        self.samples = {}
+
+    def add(self, original, namespace, key):
+        self.counts[original] = self.counts.get(original, 0) + 1
+        if self.sample_size:
+            sample = self.samples.setdefault(original, [])
+            if len(sample) < self.sample_size:
+                sample.append({"key": key, "namespace": namespace})
+
+    def merge(self, other):
+        """Fold in groups of a later part of the catalog."""
+        for original, count in other.counts.items():
+            self.counts[original] = self.counts.get(original, 0) + count
+        for original, sample in other.samples.items():
+            mine = self.samples.setdefault(original, [])
+            mine.extend(sample[:self.sample_size - len(mine)])
+
+    def __len__(self):
+        return len(self.counts)
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def ranked(self, top=None, templates=False):
+        """``(text, count, variants)`` most common first, ties in first-seen order; only the ``top`` most common if given.
+
+        With ``templates``, texts differing only in numbers, placeholders or
+        tags are collapsed into one template item listing its variants.
+        """
+        if templates:
+            items = collapse_families(self.counts.items())
+        else:
+            items = ((text, count, None) for text, count in self.counts.items())
+        return rank(items, top)
+
+def record_filter(namespace=None):
+    """Raw-line prefilter for untranslated records, optionally of namespaces starting with ``namespace``."""
+    predicates = [Untranslated()]
+    if namespace:
+        predicates.append(NamespacePrefix(namespace))
+    return RecordFilter(predicates)
+
+def _group_shard(shard, sample_size=0, namespace=None):
+    """Group the untranslated Chinese entries of one catalog shard by original text."""
+    groups = SourceGroups(sample_size)
     skipped_technical = 0
+    line_num = 0
 
-    print("Reading vi.ndjson...")
-    with open(vi_file, "r", encoding="utf-8") as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-
-            try:
-                entry = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-
-            if should_skip(entry):
-                continue
-
-            if is_untranslated(entry):
-                # Get the original text for grouping
-                source = entry.get("source")
-                locres_import = entry.get("locresImport")
-                original = source if source is not None else locres_import
-
-                if original:
-                    # Skip technical text
-                    if is_technical_text(original):
-                        skipped_technical += 1
-                        continue
-
-                    # Only include if has Chinese characters
-                    if not has_chinese(original):
-                        skipped_technical += 1
-                        continue
-
-                    untranslated_groups[original].append({
-                        "key": entry.get("key"),
-                        "namespace": entry.get("namespace"),
-                    })
+    # Translated records are rejected on their raw bytes without being decoded
+    selected = record_filter(namespace)
+    for line_num, raw in iter_shard_lines(shard):
+        entry = selected.select(raw)
+        if entry:
+            skipped_technical += group_entry(entry, groups)
+
+    return line_num, (groups, skipped_technical)
+
+def group_entry(entry, groups):
+    """Add an untranslated Chinese entry to ``groups``; returns True if it was skipped as technical."""
+    if should_skip(entry):
+        return False
+
+    if not is_untranslated(entry):
+        return False
+
+    # Get the original text for grouping
+    source = entry.get("source")
+    locres_import = entry.get("locresImport")
+    original = source if source is not None else locres_import
 
+    if not original:
+        return False
+
+    # Skip technical text, and only include if has Chinese characters
+    if not needs_translation(original):
+        return True
+
+    groups.add(original, entry.get("namespace"), entry.get("key"))
+    return False
+
+def group_indexed(vi_file, sample_size=0, namespace=None):
+    """Group by reading only the untranslated records listed in the source index."""
+    groups = SourceGroups(sample_size)
+    skipped_technical = 0
+    selected = record_filter(namespace)
+    postings = open_index(vi_file).untranslated()
+    get_stats().count("lines", len(postings))
+    for _posting, raw in read_lines(vi_file, postings):
+        entry = selected.select(raw)
+        if entry:
+            skipped_technical += group_entry(entry, groups)
+    return groups, skipped_technical
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Group untranslated entries of vi.ndjson by source text")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes for --no-index (default: CPU count)")
+    parser.add_argument("--no-index", action="store_true", help="Scan the whole catalog instead of using the source index")
+    parser.add_argument("--top", type=int, default=None, help="Only write the K most frequent untranslated texts")
+    parser.add_argument("--sample-keys", type=int, default=0,
+                        help="Keep up to N example namespace/key pairs per text in to_translate.json")
+    parser.add_argument("--templates", action="store_true",
+                        help="Collapse texts differing only in numbers/placeholders/tags into ⟦n⟧ slot templates")
+    parser.add_argument("--namespace", default=None, help="Only extract entries whose namespace starts with this prefix")
+    parser.add_argument("--translations-dir", type=Path, default=TRANSLATIONS_DIR,
+                        help="Directory holding vi.ndjson; to_translate.txt/json are written there too")
+    script_stats.add_arguments(parser)
+    return parser.parse_args(argv)
+
+class UntranslatedPass(CatalogPass):
+    """Pipeline pass grouping untranslated entries and writing to_translate.txt/json.
+
+    The files go to the ``untranslated_dir`` option, defaulting to the
+    directory of the scanned catalog (``input``).
+    """
+
+    name = "untranslated"
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.sample_size = options.get("sample_keys") or 0
+        self.groups = SourceGroups(self.sample_size)
+        self.skipped_technical = 0
+
+    def shard_state(self):
+        return [SourceGroups(self.sample_size), 0]
+
+    def process(self, state, record, line):
+        state[1] += group_entry(record, state[0])
+        return KEEP
+
+    def merge(self, state, line_offset):
+        groups, skipped = state
+        self.groups.merge(groups)
+        self.skipped_technical += skipped
+
+    def output_dir(self):
+        """``untranslated_dir`` if given, else the directory of the scanned catalog."""
+        if self.options.get("untranslated_dir"):
+            return Path(self.options["untranslated_dir"])
+        if self.options.get("input"):
+            return Path(self.options["input"]).parent
+        return TRANSLATIONS_DIR
+
+    def finish(self):
+        write_outputs(self.groups, self.skipped_technical, self.options.get("top"), self.options.get("templates"),
+                      self.output_dir())
+        return 0
+
+def write_outputs(groups, skipped_technical, top=None, templates=False, output_dir=TRANSLATIONS_DIR):
+    """Write the groups, most frequent first, to to_translate.txt and .json in ``output_dir``."""
     # Sort by number of occurrences (most common first)
-    sorted_groups = sorted(untranslated_groups.items(), key=lambda x: -len(x[1]))
+    sorted_groups = groups.ranked(top, templates)
 
-    print(f"\nFound {len(sorted_groups)} unique Chinese texts needing translation")
-    print(f"Total entries: {sum(len(v) for v in untranslated_groups.values())}")
+    print(f"\nFound {len(groups)} unique Chinese texts needing translation")
+    print(f"Total entries: {groups.total()}")
     print(f"Skipped technical entries: {skipped_technical}")
+    if templates:
+        families = sum(1 for _text, _count, variants in sorted_groups if variants)
+        print(f"Collapsed into {len(sorted_groups)} texts ({families} templates)")
+    if top is not None:
+        print(f"Writing the {len(sorted_groups)} most frequent")
 
     # Output for manual translation - simple format
-    output_file = Path(__file__).parent.parent / "translations" / "to_translate.txt"
+    output_file = output_dir / "to_translate.txt"
 
     with open(output_file, "w", encoding="utf-8") as f:
-        for i, (source_text, entries) in enumerate(sorted_groups, 1):
+        for i, (source_text, count, variants) in enumerate(sorted_groups, 1):
             # Clean up newlines for display
             display_text = source_text.replace('\n', '\\n')
-            f.write(f"{i}. [{len(entries)}x] {display_text}\n")
+            label = f"{count}x, {len(variants)} variants" if variants else f"{count}x"
+            f.write(f"{i}. [{label}] {display_text}\n")
             f.write(f"   → \n")
             f.write("\n")
 
     print(f"\nSaved to: {output_file}")
 
     # Also save JSON for programmatic use
-    json_output = Path(__file__).parent.parent / "translations" / "to_translate.json"
+    json_output = output_dir / "to_translate.json"
     output_data = []
-    for source_text, entries in sorted_groups:
-        output_data.append({
+    for source_text, count, variants in sorted_groups:
+        item = {
             "zh": source_text,
             "vi": "",
-            "count": len(entries),
-        })
+            "count": count,
+        }
+        if variants:
+            item["variants"] = variants
+        elif groups.sample_size:
+            item["keys"] = groups.samples.get(source_text, [])
+        output_data.append(item)
 
     with open(json_output, "w", encoding="utf-8") as f:
         json.dump(output_data, f, ensure_ascii=False, indent=2)
 
     print(f"JSON saved to: {json_output}")
 
+def main(argv=None):
+    args = parse_args(argv)
+    stats = script_stats.start("extract_untranslated", args)
+    vi_file = resolve_catalog(args.translations_dir / "vi.ndjson")
+
+    print("Reading vi.ndjson...")
+    with stats.phase("group"), stats.profiled():
+        # The source index covers plain single-file catalogs only; others are scanned
+        if args.no_index or is_sharded(vi_file) or compression_of(vi_file):
+            # Group by unique source text; shards come back in file order, so
+            # first-seen ordering of groups is kept.
+            untranslated_groups = SourceGroups(args.sample_keys)
+            skipped_technical = 0
+            for _offset, (groups, skipped) in map_shards(
+                vi_file, _group_shard, args.sample_keys, args.namespace, jobs=args.jobs
+            ):
+                untranslated_groups.merge(groups)
+                skipped_technical += skipped
+        else:
+            untranslated_groups, skipped_technical = group_indexed(vi_file, args.sample_keys, args.namespace)
+
+    with stats.phase("write outputs") as timer:
+        write_outputs(untranslated_groups, skipped_technical, args.top, args.templates, args.translations_dir)
+        timer.records = len(untranslated_groups)
+
 if __name__ == "__main__":
     main()
@@ -4,11 +4,18 @@ Detect and fix quote style mismatches between source and translated text.
 Ensures translations use the same quote style as the source.
 """
 
+import argparse
 import json
 import re
 import sys
 from pathlib import Path
 
+import script_stats
+from catalog_codec import decode
+from catalog_io import CHANGED, KEEP, CatalogPass, encode_record, iter_shard_lines, line_ending, map_shards, rewrite_lines
+from catalog_shards import LineLocator, list_catalogs
+from script_stats import get_stats
+
 # Quote mappings
 CURLY_TO_STRAIGHT = {
     '\u201c': '"',  # Left double curly quote
@@ -47,74 +54,138 @@ def fix_quotes_to_match_source(source, translated):
 
     return result
 
-def process_file(filepath, fix=False):
-    """Process a single NDJSON file."""
-    issues = []
-    fixed_count = 0
-    fixed_lines = []
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                fixed_lines.append('')
-                continue
-
-            try:
-                entry = json.loads(line)
-                translated = entry.get('translated', '')
-                source = entry.get('source', '')
-                locres = entry.get('locresImport', '')
-
-                src_text = source if source else locres
-
-                if translated and src_text:
-                    # Check for curly quotes in translated
-                    has_curly = any(q in translated for q in CURLY_TO_STRAIGHT.keys())
-
-                    if has_curly:
-                        issues.append({
-                            'file': filepath.name,
-                            'line': line_num,
-                            'ns': entry.get('namespace', ''),
-                            'key': entry.get('key', ''),
-                            'translated_snippet': translated[:60]
-                        })
-
-                        if fix:
-                            fixed_translated = fix_quotes_to_match_source(src_text, translated)
-                            if fixed_translated != translated:
-                                fixed_count += 1
-                                entry['translated'] = fixed_translated
-
-                fixed_lines.append(json.dumps(entry, ensure_ascii=False))
-            except:
-                fixed_lines.append(line)
-
-    if fix and fixed_count > 0:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(fixed_lines))
-            if fixed_lines and fixed_lines[-1]:
-                f.write('\n')
+def check_entry(entry, line_num, filename, fix):
+    """Return ``(issue or None, fixed)`` for one record, straightening its quotes in place when ``fix``."""
+    translated = entry.get('translated', '')
+    source = entry.get('source', '')
+    locres = entry.get('locresImport', '')
 
-    return issues, fixed_count
+    src_text = source if source else locres
 
-def main():
-    fix_mode = '--fix' in sys.argv
+    if not translated or not src_text:
+        return None, False
 
-    translations_dir = Path(__file__).parent.parent / 'translations'
+    # Check for curly quotes in translated
+    if not any(q in translated for q in CURLY_TO_STRAIGHT.keys()):
+        return None, False
 
-    all_issues = []
-    total_fixed = 0
+    issue = {
+        'file': filename,
+        'line': line_num,
+        'ns': entry.get('namespace', ''),
+        'key': entry.get('key', ''),
+        'translated_snippet': translated[:60]
+    }
 
-    for ndjson_file in sorted(translations_dir.glob('*.ndjson')):
-        print(f"{'Fixing' if fix_mode else 'Checking'} {ndjson_file.name}...")
-        issues, fixed = process_file(ndjson_file, fix=fix_mode)
-        all_issues.extend(issues)
-        total_fixed += fixed
-        if fix_mode:
-            print(f"  Fixed {fixed} quote issues")
+    if fix:
+        fixed_translated = fix_quotes_to_match_source(src_text, translated)
+        if fixed_translated != translated:
+            entry['translated'] = fixed_translated
+            return issue, True
+
+    return issue, False
+
+def _process_shard(shard, filename, fix):
+    issues = []
+    fixed_count = 0
+    changes = []
+    line_num = 0
+
+    for line_num, raw in iter_shard_lines(shard):
+        line = raw.decode('utf-8').strip()
+        if not line:
+            continue
+
+        try:
+            entry = decode(line)
+            issue, fixed = check_entry(entry, line_num, filename, fix)
+            if issue:
+                issues.append(issue)
+            fixed_count += fixed
+
+            # Only fixed records are re-encoded; every other line is copied through as is
+            if fixed:
+                changes.append((line_num, encode_record(entry, line_ending(raw))))
+        except:
+            pass
+
+    return line_num, (issues, fixed_count, changes)
+
+def process_file(filepath, fix=False, jobs=None):
+    """Process a single NDJSON file."""
+    stats = get_stats()
+    issues = []
+    fixed_count = 0
+    replacements = {}
+    locator = LineLocator(filepath)
+
+    with stats.phase(f"scan {filepath.name}"), stats.profiled():
+        for line_offset, (shard_issues, shard_fixed, shard_changes) in map_shards(
+            filepath, _process_shard, filepath.name, fix, jobs=jobs
+        ):
+            for issue in shard_issues:
+                issue['line'] += line_offset
+                locator.relabel(issue)
+            issues.extend(shard_issues)
+            fixed_count += shard_fixed
+            for line_num, text in shard_changes:
+                replacements[line_offset + line_num] = text
+
+    if fix and replacements:
+        with stats.phase(f"rewrite {filepath.name}") as timer:
+            rewrite_lines(filepath, replacements)
+            timer.records = len(replacements)
+
+    return issues, fixed_count
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detect and fix curly quotes in translated text")
+    parser.add_argument('--fix', action='store_true', help="Rewrite catalogs with straight quotes")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count)")
+    script_stats.add_arguments(parser)
+    return parser.parse_args(argv)
+
+class QuotePass(CatalogPass):
+    """Pipeline pass reporting (and with ``fix``, straightening) curly quotes."""
+
+    name = 'quotes'
+    mutates = True
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.filename = Path(options['input']).name
+        self.fix = bool(options.get('fix'))
+        self.issues = []
+        self.fixed = 0
+        self.locator = None
+
+    def shard_state(self):
+        return [[], 0]
+
+    def process(self, state, record, line):
+        issue, fixed = check_entry(record, line, self.filename, self.fix)
+        if issue:
+            state[0].append(issue)
+        if fixed:
+            state[1] += 1
+            return CHANGED
+        return KEEP
+
+    def merge(self, state, line_offset):
+        issues, fixed = state
+        if self.locator is None:
+            self.locator = LineLocator(self.options['input'])
+        for issue in issues:
+            issue['line'] += line_offset
+            self.locator.relabel(issue)
+        self.issues.extend(issues)
+        self.fixed += fixed
+
+    def finish(self):
+        return report_issues(self.issues, self.fixed, self.fix)
+
+def report_issues(all_issues, total_fixed, fix_mode):
+    """Print the check or fix summary; returns the exit status."""
     if not fix_mode:
         print(f"\nFound {len(all_issues)} quote style issues")
         for issue in all_issues[:20]:
@@ -128,5 +199,25 @@ def main():
 
     return 1 if all_issues and not fix_mode else 0
 
+def main(argv=None):
+    args = parse_args(argv)
+    script_stats.start('fix-quotes', args)
+    fix_mode = args.fix
+
+    translations_dir = Path(__file__).parent.parent / 'translations'
+
+    all_issues = []
+    total_fixed = 0
+
+    for ndjson_file in list_catalogs(translations_dir):
+        print(f"{'Fixing' if fix_mode else 'Checking'} {ndjson_file.name}...")
+        issues, fixed = process_file(ndjson_file, fix=fix_mode, jobs=args.jobs)
+        all_issues.extend(issues)
+        total_fixed += fixed
+        if fix_mode:
+            print(f"  Fixed {fixed} quote issues")
+
+    return report_issues(all_issues, total_fixed, fix_mode)
+
 if __name__ == '__main__':
     sys.exit(main())
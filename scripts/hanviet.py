@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""Hán-Việt transliteration of catalog sources for the LIM variants.
+
+The LIM packs show boss skill names, 3D names and similar short texts in
+Hán-Việt. This stage converts the sources of the records picked by a rules
+file and writes the results as an overlay catalog (see ``catalog_overlay``),
+which the variant's locres build stacks on the language catalog::
+
+    python scripts/hanviet.py --input translations/vi.ndjson \\
+        --rules lim-rules.json --output translations/overlays/vi-lim.ndjson
+
+It also runs as the ``hanviet`` pass of ``catalog_pipeline.py``. Neither
+``pack`` nor the default pipeline runs it: no rules are shipped, since the
+rules must be limited to the boss-skill and 3D-name namespaces or keys, and
+the overlay is committed once it has been reviewed.
+
+Dictionaries are QuickTranslator-style text files, one ``漢字=reading`` per
+line (alternatives after ``/`` are ignored, ``#`` starts a comment); single
+characters and phrases may share a file, and later files override earlier
+ones. By default every ``config/hanviet/*.txt`` is loaded in name order. No
+dictionary is shipped; ``hanviet_seed.py`` derives a small starter file from
+the glossaries.
+Entries go into a trie stored as one flat edge table, and conversion takes
+the longest dictionary match at each position. Han characters without a
+reading are kept as they are.
+
+Rules use the ``config/translation-skip.json`` format (``namespace``,
+``keyRegex``, ``sourcePattern``); a record is converted when a rule matches
+it. Markup (``<Tag>``, ``</>``), placeholders (``{0}``, ``${name}``) and
+escapes (``\\n``) are copied through unchanged.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import script_stats
+from catalog_io import KEEP, CatalogPass, CatalogWriter
+from catalog_pipeline import run_pipeline
+from catalog_shards import catalog_exists
+from skip_rules import SkipRules
+
+CONFIG_DIR = Path(__file__).resolve().parent.parent / "config" / "hanviet"
+
+CASES = ("title", "lower")
+
+_MEMO_SIZE = 1 << 16
+# Code points fit in 21 bits, so an edge is keyed by (node << 21) | code point.
+_SHIFT = 21
+
+_HAN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+_PROTECTED = re.compile(r"\$?\{[^{}]*\}|<[^<>]*>|\\[nrt]")
+
+# Full-width punctuation -> (ASCII text, kind); see ``_join`` for the kinds.
+_PUNCTUATION: Dict[str, Tuple[str, str]] = {
+    "，": (",", "close"), "、": (",", "close"), "。": (".", "close"), "！": ("!", "close"),
+    "？": ("?", "close"), "：": (":", "close"), "；": (";", "close"), "）": (")", "close"),
+    "】": ("]", "close"), "》": ("»", "close"), "」": ('"', "close"), "』": ('"', "close"),
+    "（": ("(", "open"), "【": ("[", "open"), "《": ("«", "open"), "「": ('"', "open"),
+    "『": ('"', "open"), "…": ("...", "close"), "·": ("·", "other"),
+}
+
+
+def _cased(reading: str, case: str) -> str:
+    syllables = reading.lower().split()
+    if case == "title":
+        syllables = [syllable[:1].upper() + syllable[1:] for syllable in syllables]
+    return " ".join(syllables)
+
+
+class HanVietTrie:
+    """Longest-match phrase dictionary.
+
+    Nodes are integers and every edge lives in one ``int -> int`` dict, which
+    keeps a dictionary of a few hundred thousand phrases far smaller than a
+    dict per node.
+    """
+
+    def __init__(self) -> None:
+        self._edges: Dict[int, int] = {}
+        self._readings: List[Optional[str]] = [None]
+        self.entries = 0
+        self.longest = 0
+
+    def __len__(self) -> int:
+        return self.entries
+
+    @property
+    def nodes(self) -> int:
+        return len(self._readings)
+
+    def add(self, phrase: str, reading: str) -> None:
+        edges = self._edges
+        node = 0
+        for char in phrase:
+            edge = (node << _SHIFT) | ord(char)
+            child = edges.get(edge)
+            if child is None:
+                child = edges[edge] = len(self._readings)
+                self._readings.append(None)
+            node = child
+        if self._readings[node] is None:
+            self.entries += 1
+        self._readings[node] = reading
+        self.longest = max(self.longest, len(phrase))
+
+    def longest_match(self, text: str, start: int) -> Tuple[int, Optional[str]]:
+        """End and reading of the longest entry starting at ``text[start]`` (``(start, None)`` if none)."""
+        edges = self._edges
+        readings = self._readings
+        node = 0
+        end = start
+        best = None
+        for index in range(start, len(text)):
+            node = edges.get((node << _SHIFT) | ord(text[index]))
+            if node is None:
+                break
+            reading = readings[node]
+            if reading is not None:
+                best = reading
+                end = index + 1
+        return end, best
+
+
+def dictionary_paths(paths: Optional[Sequence[str | Path]] = None) -> List[Path]:
+    """The given dictionary files, or every ``config/hanviet/*.txt``."""
+    if paths:
+        return [Path(path) for path in paths]
+    return sorted(CONFIG_DIR.glob("*.txt"))
+
+
+def load_dictionary(paths: Sequence[Path], case: str = "title") -> HanVietTrie:
+    if not paths:
+        raise RuntimeError(f"No Hán-Việt dictionary given and none found in {CONFIG_DIR}")
+    trie = HanVietTrie()
+    for path in paths:
+        if not path.is_file():
+            raise RuntimeError(f"Hán-Việt dictionary not found: {path}")
+        with path.open(encoding="utf-8-sig") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                phrase, separator, readings = line.partition("=")
+                reading = readings.split("/", 1)[0].strip()
+                phrase = phrase.strip()
+                if separator and phrase and reading:
+                    trie.add(phrase, _cased(reading, case))
+    return trie
+
+
+class HanVietConverter:
+    """Memoized conversion of whole source strings."""
+
+    def __init__(self, trie: HanVietTrie) -> None:
+        self.trie = trie
+        self._convert = lru_cache(maxsize=_MEMO_SIZE)(self._convert_text)
+
+    def convert(self, text: str) -> Optional[str]:
+        """The Hán-Việt form of ``text``, or None when it has no Han characters or one has no reading."""
+        if _HAN.search(text) is None:
+            return None
+        converted = self._convert(text)
+        if _HAN.search(converted) is not None:
+            return None
+        return converted
+
+    def cache_info(self):
+        return self._convert.cache_info()
+
+    def _convert_text(self, text: str) -> str:
+        tokens: List[Tuple[str, str]] = []
+        position = 0
+        for match in _PROTECTED.finditer(text):
+            self._tokenize(text[position:match.start()], tokens)
+            piece = match.group()
+            if piece[0] == "<":
+                tokens.append((piece, "closetag" if piece.startswith("</") else "tag"))
+            elif piece[0] == "\\":
+                tokens.append((piece, "break"))
+            else:
+                tokens.append((piece, "word"))
+            position = match.end()
+        self._tokenize(text[position:], tokens)
+        return _join(tokens)
+
+    def _tokenize(self, text: str, tokens: List[Tuple[str, str]]) -> None:
+        trie = self.trie
+        index = 0
+        length = len(text)
+        while index < length:
+            end, reading = trie.longest_match(text, index)
+            if reading is not None:
+                tokens.append((reading, "word"))
+                index = end
+                continue
+            char = text[index]
+            if char in _PUNCTUATION:
+                tokens.append(_PUNCTUATION[char])
+            elif char.isspace():
+                tokens.append((char, "space"))
+            elif char.isalnum():
+                # Runs of letters, digits and unknown Han characters stay together.
+                end = index + 1
+                while end < length and text[end].isalnum() and trie.longest_match(text, end)[1] is None:
+                    end += 1
+                tokens.append((text[index:end], "word"))
+                index = end
+                continue
+            else:
+                tokens.append((char, "other"))
+            index += 1
+
+
+def _join(tokens: List[Tuple[str, str]]) -> str:
+    """Concatenate tokens, adding the spaces Chinese text leaves out.
+
+    A space goes between two words and between closing punctuation and a
+    following word. Tags do not count as tokens: the space goes before an
+    opening tag and after a closing one.
+    """
+    out: List[str] = []
+    previous = ""  # kind of the last token that is not a tag
+    space_at = 0  # where a space before the next word belongs
+    for text, kind in tokens:
+        if kind == "tag":
+            out.append(text)
+            continue
+        if kind == "closetag":
+            out.append(text)
+            space_at = len(out)
+            continue
+        if kind in ("word", "open") and previous in ("word", "close"):
+            out.insert(space_at, " ")
+        out.append(text)
+        previous = kind
+        space_at = len(out)
+    return "".join(out)
+
+
+_converters: Dict[Tuple[Tuple[Path, ...], str], HanVietConverter] = {}
+
+
+def get_converter(paths: Optional[Sequence[str | Path]] = None, case: str = "title") -> HanVietConverter:
+    """This process's converter for the given dictionaries (loaded once; forked workers inherit it)."""
+    key = (tuple(dictionary_paths(paths)), case)
+    converter = _converters.get(key)
+    if converter is None:
+        converter = _converters[key] = HanVietConverter(load_dictionary(list(key[0]), case))
+    return converter
+
+
+def load_rules(path: Path) -> SkipRules:
+    if not path.is_file():
+        raise RuntimeError(f"Hán-Việt rules not found: {path}")
+    return SkipRules.from_file(path)
+
+
+OverlayRow = Tuple[str, str, str]
+
+
+class HanVietPass(CatalogPass):
+    """Pipeline pass converting the sources of rule-selected records and writing them as an overlay.
+
+    Options: ``hanviet_rules`` and ``hanviet_output`` (required),
+    ``hanviet_dict`` (list of dictionaries), ``hanviet_case`` and
+    ``hanviet_overwrite``. Only untranslated records (no translation, or the
+    source copied as is) are converted unless ``hanviet_overwrite`` is set.
+    Sources with a Han character the dictionaries cannot read are left out
+    rather than written half converted.
+    """
+
+    name = "hanviet"
+
+    def __init__(self, options: Dict[str, object]) -> None:
+        super().__init__(options)
+        self.rules = load_rules(Path(str(options["hanviet_rules"])))
+        self.converter = get_converter(options.get("hanviet_dict"), str(options.get("hanviet_case") or "title"))
+        self.overwrite = bool(options.get("hanviet_overwrite"))
+        self.rows: List[OverlayRow] = []
+        self.selected = 0
+        self.unconverted = 0
+
+    def shard_state(self) -> list:
+        return [[], 0, 0]
+
+    def process(self, state: list, record: dict, line: int) -> int:
+        key = record.get("key")
+        source = record.get("source")
+        if not key or not isinstance(source, str):
+            return KEEP
+        translated = record.get("translated")
+        if not self.overwrite and translated and translated != source:
+            return KEEP
+        namespace = str(record.get("namespace") or "")
+        if not self.rules.matches(namespace, str(key), source):
+            return KEEP
+        state[1] += 1
+        converted = self.converter.convert(source)
+        if converted is None:
+            state[2] += 1
+        elif converted != source and converted != translated:
+            state[0].append((namespace, str(key), converted))
+        return KEEP
+
+    def merge(self, state: list, line_offset: int) -> None:
+        rows, selected, unconverted = state
+        self.rows.extend(rows)
+        self.selected += selected
+        self.unconverted += unconverted
+
+    def finish(self) -> int:
+        output_path = Path(str(self.options["hanviet_output"]))
+        write_overlay(output_path, self.rows)
+        trie = self.converter.trie
+        print(f"Dictionary: {len(trie)} entries ({trie.nodes} trie nodes, longest {trie.longest} characters)")
+        print(f"Selected {self.selected} records; wrote {len(self.rows)} conversions to {output_path}")
+        if self.unconverted:
+            print(f"  Skipped {self.unconverted} records with Han characters missing from the dictionaries")
+        return 0
+
+
+def write_overlay(path: Path, rows: Iterable[OverlayRow]) -> None:
+    """Write ``(namespace, key, translated)`` rows as an overlay catalog sorted by (namespace, key)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with CatalogWriter(path) as writer:
+        for namespace, key, translated in sorted(rows):
+            writer.write_record({"namespace": namespace, "key": key, "translated": translated})
+
+
+def parse_args(argv: Iterable[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert rule-selected catalog sources to Hán-Việt as an overlay")
+    parser.add_argument("--input", help="Catalog NDJSON to read")
+    parser.add_argument("--rules", help="Rules selecting the records to convert (translation-skip.json format)")
+    parser.add_argument("--output", help="Overlay NDJSON to write")
+    parser.add_argument(
+        "--dict",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="Dictionary file (repeatable, later wins; default: config/hanviet/*.txt)",
+    )
+    parser.add_argument("--case", choices=CASES, default="title", help="Capitalization of readings (default: %(default)s)")
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Also convert records that already have a translation (default: untranslated records only)",
+    )
+    parser.add_argument("--text", action="append", default=[], help="Print the conversion of TEXT and exit (repeatable)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    script_stats.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if not args.text and not (args.input and args.rules and args.output):
+        parser.error("--input, --rules and --output are required (or use --text)")
+    return args
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    script_stats.start("hanviet", args)
+    if args.text:
+        converter = get_converter(args.dict, args.case)
+        for text in args.text:
+            print(converter.convert(text) or text)
+        return 0
+
+    catalog_path = Path(args.input)
+    if not catalog_exists(catalog_path):
+        raise RuntimeError(f"Catalog not found: {catalog_path}")
+    options = {
+        "hanviet_rules": args.rules,
+        "hanviet_output": args.output,
+        "hanviet_dict": args.dict,
+        "hanviet_case": args.case,
+        "hanviet_overwrite": args.overwrite,
+    }
+    return run_pipeline(catalog_path, [("hanviet", options)], args.jobs, write=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
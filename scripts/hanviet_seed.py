@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Derive a starter Hán-Việt dictionary from the glossaries.
+
+The reviewed name translations in ``translations/translations_all.json`` and
+the term maps of ``translate_all.cjs`` are mostly Hán-Việt readings written
+in title case (``无常庙`` -> ``Vô Thường Miếu``). A pair is used when each
+``·``-separated part has one syllable per Han character, all capitalized or
+all lower case. Each character's reading is voted over those pairs, and pairs
+whose syllables lose a vote are dropped, since they are translations in
+Vietnamese word order rather than readings; this repeats until no pair is
+dropped. The surviving parts are written as phrases, together with every
+character reading seen at least ``--min-votes`` times, in the format
+``hanviet.py`` loads.
+
+The glossaries give a few hundred readings, far from what a catalog's names
+need, so the result is a starting point for a reviewed dictionary rather
+than one to convert with as is. Nothing is written into ``config/hanviet``
+unless asked for::
+
+    python scripts/hanviet_seed.py --output /tmp/hanviet-seed.txt
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_SOURCES = (REPO_DIR / "translations" / "translations_all.json", REPO_DIR / "translate_all.cjs")
+
+_HAN_WORD = re.compile(r"^[㐀-䶿一-鿿豈-﫿]+$")
+_SYLLABLE = re.compile(r"^[^\W\d_]+$")
+_READING_SEPARATOR = re.compile(r"\s+[-·]\s+")
+# One quoted ``'zh': 'vi'`` entry of a JavaScript object literal.
+_JS_ENTRY = re.compile(r"""'([^'\\\n]+)'\s*:\s*'([^'\\\n]+)'""")
+
+Part = Tuple[str, Tuple[str, ...]]
+
+
+def read_pairs(path: Path) -> Iterator[Tuple[str, str]]:
+    """``(chinese, vietnamese)`` pairs of a JSON glossary or of the object literals of a script."""
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        for chinese, vietnamese in json.loads(text).items():
+            if isinstance(vietnamese, str):
+                yield chinese, vietnamese
+    else:
+        yield from _JS_ENTRY.findall(text)
+
+
+def aligned_parts(chinese: str, vietnamese: str) -> List[Part]:
+    """The parts of a pair read one syllable per character, or ``[]`` if it is not such a pair."""
+    words = chinese.split("·")
+    readings = _READING_SEPARATOR.split(vietnamese.strip())
+    if len(words) != len(readings):
+        return []
+    parts: List[Part] = []
+    for word, reading in zip(words, readings):
+        syllables = reading.split()
+        if not _HAN_WORD.match(word) or len(syllables) != len(word):
+            return []
+        if not all(_SYLLABLE.match(syllable) for syllable in syllables):
+            return []
+        if len({syllable[0].isupper() for syllable in syllables}) > 1:
+            return []
+        parts.append((word, tuple(syllable.lower() for syllable in syllables)))
+    return parts
+
+
+def _votes(parts: Iterable[Part]) -> Dict[str, Counter]:
+    votes: Dict[str, Counter] = defaultdict(Counter)
+    for word, syllables in parts:
+        for char, syllable in zip(word, syllables):
+            votes[char][syllable] += 1
+    return votes
+
+
+def consistent_parts(parts: List[Part]) -> Tuple[List[Part], Dict[str, Counter]]:
+    """Drop parts disagreeing with the per-character vote until none do."""
+    while True:
+        votes = _votes(parts)
+        winners = {char: counter.most_common(1)[0][0] for char, counter in votes.items()}
+        kept = [
+            (word, syllables)
+            for word, syllables in parts
+            if all(winners[char] == syllable for char, syllable in zip(word, syllables))
+        ]
+        if len(kept) == len(parts):
+            return kept, votes
+        parts = kept
+
+
+def seed_entries(sources: Iterable[Path], min_votes: int = 2) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """``(phrases, characters)`` readings derived from the glossaries."""
+    unique: Dict[str, Tuple[str, ...]] = {}
+    for source in sources:
+        for chinese, vietnamese in read_pairs(source):
+            for word, syllables in aligned_parts(chinese, vietnamese):
+                unique.setdefault(word, syllables)
+    parts, votes = consistent_parts(list(unique.items()))
+    characters = {}
+    for char, counter in votes.items():
+        syllable, count = counter.most_common(1)[0]
+        if count >= min_votes:
+            characters[char] = syllable
+    phrases = {word: " ".join(syllables) for word, syllables in parts if len(word) > 1}
+    return phrases, characters
+
+
+def write_seed(path: Path, phrases: Dict[str, str], characters: Dict[str, str], sources: Iterable[Path]) -> None:
+    lines = [
+        "# Generated by scripts/hanviet_seed.py; review before use.",
+        f"# Sources: {', '.join(source.name for source in sources)}",
+        "",
+        "# Characters",
+    ]
+    lines.extend(f"{char}={characters[char]}" for char in sorted(characters))
+    lines.extend(["", "# Phrases"])
+    lines.extend(f"{word}={phrases[word]}" for word in sorted(phrases))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def parse_args(argv: Iterable[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Derive the seed Hán-Việt dictionary from the glossaries")
+    parser.add_argument(
+        "--source",
+        action="append",
+        type=Path,
+        default=[],
+        metavar="PATH",
+        help="Glossary JSON or script with 'zh': 'vi' maps (repeatable; default: translations_all.json, translate_all.cjs)",
+    )
+    parser.add_argument("--output", type=Path, required=True, help="Dictionary file to write")
+    parser.add_argument(
+        "--min-votes",
+        type=int,
+        default=2,
+        help="Pairs a character reading must appear in to be written on its own (default: %(default)s)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    sources = args.source or list(DEFAULT_SOURCES)
+    missing = [str(source) for source in sources if not source.is_file()]
+    if missing:
+        raise RuntimeError(f"Glossary not found: {', '.join(missing)}")
+    phrases, characters = seed_entries(sources, args.min_votes)
+    write_seed(args.output, phrases, characters, sources)
+    print(f"Wrote {len(characters)} character readings and {len(phrases)} phrases to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,16 +4,19 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import tempfile
 from pathlib import Path
-from typing import Dict, Iterable, Tuple
-from zlib import crc32
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-try:
-    from pylocres import LocresFile
-except Exception as exc:  # pragma: no cover
-    raise RuntimeError(
-        "Missing dependency 'pylocres'. Install with: pip install pylocres"
-    ) from exc
+import script_stats
+from catalog_compression import open_catalog
+from catalog_io import CatalogLineError, CatalogWriter, decode_line
+from catalog_model import Catalog, CatalogRecord, load_catalog, normalize_unchanged
+from catalog_shards import ShardedCatalog, describe_line, file_sha256, open_sharded, resolve_catalog
+from locres_reader import iter_locres
+from script_stats import get_stats
+from source_hash import configure as configure_hash_cache, diff_stats, format_stats, get_cache, report_stats
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -27,94 +30,57 @@ def _normalize_crlf(text: str) -> str:
     return normalized.replace("\n", "\r\n")
 
 
-def _hash_utf32le(text: str) -> int:
-    return crc32(text.encode("utf-32-le")) & 0xFFFFFFFF
-
-
 def compute_catalog_hash(source: str) -> int:
     normalized = _normalize_crlf(source)
-    return _hash_utf32le(normalized)
+    return get_cache().hash(normalized)
 
 
-def _entry_text(entry) -> str:
-    for attr in ("text", "translation", "value", "string"):
-        if hasattr(entry, attr):
-            value = getattr(entry, attr)
-            if isinstance(value, str):
-                return value
-    return ""
+def read_locres(path: Path) -> Iterable[Tuple[str, str, str, int]]:
+    for ns_name, key, text, source_hash in iter_locres(path, transform=_normalize_crlf):
+        if not key:
+            continue
+        yield ns_name, key, text, source_hash
 
 
-def _entry_hash(entry) -> int:
-    for attr in ("source_hash", "hash", "SourceHash"):
-        if hasattr(entry, attr):
-            value = getattr(entry, attr)
-            try:
-                return int(value)
-            except Exception:
-                pass
-    raise AttributeError("Locres entry missing source_hash attribute")
+def normalize_record(record: dict) -> dict:
+    record.setdefault("source", None)
+    record.setdefault("translated", None)
+    if "locres" in record and record.get("locres") is not None:
+        record["locresImport"] = record.pop("locres")
+    record.setdefault("locresImport", None)
+    if "hashOverride" in record and record.get("hashOverride") is not None:
+        record["importedHash"] = record.pop("hashOverride")
+    if "importedHash" in record and record["importedHash"] is not None:
+        try:
+            record["importedHash"] = int(str(record["importedHash"]), 0)
+        except Exception:
+            record["importedHash"] = None
+    return record
 
 
-def read_locres(path: Path) -> Iterable[Tuple[str, str, str, int]]:
-    loc = LocresFile()
-    loc.read(str(path))
-
-    for ns in loc:
-        ns_name = getattr(ns, "name", "") or ""
-        for entry in ns:
-            key = getattr(entry, "key", "")
-            if not key:
-                continue
-            text = _normalize_crlf(_entry_text(entry))
-            source_hash = _entry_hash(entry)
-            yield ns_name, str(key), text, source_hash
-
-
-def read_catalog(path: Path) -> list[dict]:
-    rows: list[dict] = []
-    if not path.exists():
-        return rows
+def normalize_raw(record: dict, raw: bytes) -> Optional[bytes]:
+    """Normalize ``record`` in place; returns its stripped raw line if that left it unchanged, else None."""
+    return raw.strip() if normalize_unchanged(record, normalize_record) else None
+
+
+def read_catalog(path: Path, jobs: Optional[int] = None) -> Catalog:
+    """Load the normalized catalog; rows normalization left alone are saved back byte for byte."""
+    try:
+        return load_catalog(path, jobs, normalize_record)
+    except CatalogLineError as exc:  # pragma: no cover
+        raise RuntimeError(f"Invalid JSON at {describe_line(path, exc.line)}: {exc.message}") from exc
+
+
+def catalog_sort_key(row: dict) -> Tuple[str, str]:
+    return (row.get("namespace") or ""), row.get("key") or ""
 
-    with path.open("r", encoding="utf-8") as handle:
-        for line_number, raw in enumerate(handle, 1):
-            line = raw.strip()
-            if not line:
-                continue
-            try:
-                record = json.loads(line)
-            except json.JSONDecodeError as exc:  # pragma: no cover
-                raise RuntimeError(f"Invalid JSON at line {line_number} of {path}: {exc}") from exc
-            if not isinstance(record, dict):
-                continue
-            record.setdefault("source", None)
-            record.setdefault("translated", None)
-            if "locres" in record and record.get("locres") is not None:
-                record["locresImport"] = record.pop("locres")
-            record.setdefault("locresImport", None)
-            if "hashOverride" in record and record.get("hashOverride") is not None:
-                record["importedHash"] = record.pop("hashOverride")
-            if "importedHash" in record and record["importedHash"] is not None:
-                try:
-                    record["importedHash"] = int(str(record["importedHash"]), 0)
-                except Exception:
-                    record["importedHash"] = None
-            rows.append(record)
-    return rows
-
-
-def write_catalog(path: Path, rows: Iterable[dict]) -> None:
-    sorted_rows = sorted(
-        rows,
-        key=lambda r: ((r.get("namespace") or ""), r.get("key") or ""),
-    )
-    with path.open("w", encoding="utf-8", newline="\n") as handle:
-        for record in sorted_rows:
-            handle.write(json.dumps(record, ensure_ascii=False))
-            handle.write("\n")
 
+def write_catalog(path: Path, catalog: Catalog) -> None:
+    """Write the catalog sorted by (namespace, key); unmodified rows keep their original bytes."""
+    catalog.save(path, sort_key=catalog_sort_key)
 
-def index_catalog(rows: list[dict]) -> Dict[Tuple[str, str], int]:
+
+def index_catalog(rows: Iterable[CatalogRecord]) -> Dict[Tuple[str, str], int]:
     index: Dict[Tuple[str, str], int] = {}
     for idx, row in enumerate(rows):
         ns = (row.get("namespace") or "").strip()
@@ -127,10 +93,199 @@ def index_catalog(rows: list[dict]) -> Dict[Tuple[str, str], int]:
     return index
 
 
+def new_catalog_row(namespace: str, key: str, target: str, source_hash: int) -> dict:
+    return {
+        "namespace": namespace,
+        "key": key,
+        "source": None,
+        "translated": None,
+        "locresImport": target,
+        "importedHash": int(source_hash),
+    }
+
+
+def apply_locres_entry(row: dict, target: str, source_hash: int) -> bool:
+    """Copy ``target`` into a catalog row whose source hash matches; returns True when updated."""
+    source = row.get("source")
+    if isinstance(source, str) and source.strip():
+        calculated = compute_catalog_hash(source)
+        if calculated == source_hash:
+            row["locresImport"] = target
+            row.pop("importedHash", None)
+            return True
+    # No source stored (nothing to compare) or the source changed since the locres was built
+    return False
+
+
+ImportStats = Tuple[int, int, int]
+LocresEntry = Tuple[str, str, str, int]
+
+
+def import_in_memory(catalog_path: Path, entries: Iterable[LocresEntry], jobs: Optional[int] = None) -> ImportStats:
+    stats = get_stats()
+    with stats.phase("load catalog"):
+        catalog = read_catalog(catalog_path, jobs)
+    index = index_catalog(catalog)
+
+    added = updated = skipped = 0
+
+    with stats.phase("apply") as timer, stats.profiled():
+        for namespace, key, target, source_hash in entries:
+            pair = (namespace, key)
+            if pair in index:
+                if apply_locres_entry(catalog[index[pair]], target, source_hash):
+                    updated += 1
+                else:
+                    skipped += 1
+            else:
+                catalog.append(new_catalog_row(namespace, key, target, source_hash))
+                index[pair] = len(catalog) - 1
+                added += 1
+        timer.records = updated + added + skipped
+
+    with stats.phase("write catalog") as timer:
+        write_catalog(catalog_path, catalog)
+        timer.records = len(catalog)
+    return updated, added, skipped
+
+
+class UnsortedCatalogError(RuntimeError):
+    """The catalog is not in (namespace, key) order, so it cannot be merge-joined."""
+
+
+def iter_catalog_rows(path: Path) -> Iterator[Tuple[dict, Optional[bytes]]]:
+    """Yield each normalized row with its raw line (None when normalizing changed the row)."""
+    if not path.exists():
+        return
+    with open_catalog(path) as handle:
+        for line_number, raw in enumerate(handle, 1):
+            try:
+                record = decode_line(raw)
+            except json.JSONDecodeError as exc:  # pragma: no cover
+                raise RuntimeError(f"Invalid JSON at line {line_number} of {path}: {exc}") from exc
+            if isinstance(record, dict):
+                yield record, normalize_raw(record, raw)
+
+
+def import_merge(catalog_path: Path, entries: Iterable[LocresEntry], output: Optional[Path] = None) -> ImportStats:
+    """Merge-join locres entries into a catalog sorted by (namespace, key) in one streaming pass.
+
+    Only the locres entries are held in memory. Rows are written to a temp
+    file that replaces the catalog (or ``output``) once the pass succeeds; the
+    result is the same as ``import_in_memory``. Raises ``UnsortedCatalogError``
+    (leaving the catalog untouched) when the catalog is out of order or has
+    keys that need whitespace normalisation.
+    """
+    pending = sorted(entries, key=lambda entry: (entry[0], entry[1]))
+    added = updated = skipped = 0
+    position = 0
+    previous: Optional[Tuple[str, str]] = None
+
+    def settle(row: dict, pair: Tuple[str, str]) -> None:
+        # Apply every locres entry for ``pair`` to ``row``, like repeated index hits.
+        nonlocal position, updated, skipped
+        while position < len(pending) and (pending[position][0], pending[position][1]) == pair:
+            if apply_locres_entry(row, pending[position][2], pending[position][3]):
+                updated += 1
+            else:
+                skipped += 1
+            position += 1
+
+    def emit_new_rows_before(bound: Optional[Tuple[str, str]], writer: CatalogWriter) -> None:
+        nonlocal position, added
+        while position < len(pending) and (bound is None or (pending[position][0], pending[position][1]) < bound):
+            namespace, key, target, source_hash = pending[position]
+            row = new_catalog_row(namespace, key, target, source_hash)
+            added += 1
+            position += 1
+            settle(row, (namespace, key))
+            writer.write_record(row)
+
+    stats = get_stats()
+    rows = 0
+    with stats.phase("merge") as timer, stats.profiled(), CatalogWriter(output or catalog_path, catalog_path) as writer:
+        for row, raw in iter_catalog_rows(catalog_path):
+            rows += 1
+            sort_key = catalog_sort_key(row)
+            try:
+                in_order = previous is None or previous <= sort_key
+            except TypeError:
+                in_order = False
+            if not in_order:
+                raise UnsortedCatalogError(f"{sort_key!r} follows {previous!r}")
+            if sort_key[0] != sort_key[0].strip() or sort_key[1] != sort_key[1].strip():
+                raise UnsortedCatalogError(f"unnormalised namespace/key {sort_key!r}")
+
+            emit_new_rows_before(sort_key, writer)
+            if sort_key != previous and sort_key[1]:
+                updated_before = updated
+                settle(row, sort_key)
+                if updated != updated_before:
+                    raw = None
+            previous = sort_key
+            if raw is None:
+                writer.write_record(row)
+            else:
+                writer.write_raw(raw + b"\n")
+        emit_new_rows_before(None, writer)
+        timer.records = rows
+
+    return updated, added, skipped
+
+
+def import_merge_sharded(catalog: ShardedCatalog, entries: Iterable[LocresEntry]) -> ImportStats:
+    """``import_merge`` for a sharded catalog, merging each shard with the entries of its namespaces.
+
+    Shards without entries are not read. The merged shards are staged and
+    only replace the originals once every shard merged, so an
+    ``UnsortedCatalogError`` leaves the catalog untouched; shards that come out
+    byte-identical are left as they are.
+    """
+    groups: Dict[str, List[LocresEntry]] = {}
+    for entry in entries:
+        groups.setdefault(catalog.file_for(entry[0]), []).append(entry)
+    totals = [0, 0, 0]
+    changed: List[str] = []
+    with tempfile.TemporaryDirectory(prefix=".import-", dir=str(catalog.root)) as staging:
+        for name in sorted(groups):
+            counts = import_merge(catalog.root / name, groups[name], Path(staging) / name)
+            totals = [total + count for total, count in zip(totals, counts)]
+        for name in sorted(groups):
+            staged = Path(staging) / name
+            path = catalog.root / name
+            if not path.is_file() or staged.stat().st_size != path.stat().st_size or file_sha256(staged) != file_sha256(path):
+                os.replace(staged, path)
+                changed.append(name)
+    catalog.refresh(changed)
+    catalog.save()
+    updated, added, skipped = totals
+    return updated, added, skipped
+
+
 def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Import locres into NDJSON catalog")
     parser.add_argument("--locres", required=True, help="Path to Game.locres")
-    parser.add_argument("--catalog", required=True, help="Path to catalog NDJSON (updated in place)")
+    parser.add_argument(
+        "--catalog",
+        required=True,
+        help="Path to catalog NDJSON or sharded catalog directory (updated in place)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for decoding the catalog (default: CPU count)",
+    )
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="Load and re-sort the whole catalog instead of merge-joining the sorted stream",
+    )
+    parser.add_argument(
+        "--hash-cache",
+        help="Persisted source-hash table to reuse and update (default: in-memory only)",
+    )
+    script_stats.add_arguments(parser)
     if argv is None:
         return parser.parse_args()
     return parser.parse_args(list(argv))
@@ -138,51 +293,36 @@ def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
 
 def main(argv: Iterable[str] | None = None) -> int:
     args = parse_args(argv)
+    script_stats.start("import_locres", args)
     locres_path = Path(args.locres)
-    catalog_path = Path(args.catalog)
+    catalog_path = resolve_catalog(args.catalog)
 
     if not locres_path.is_file():
         raise RuntimeError(f"Locres file not found: {locres_path}")
-    if catalog_path.exists():
-        rows = read_catalog(catalog_path)
-    else:
-        rows = []
-    index = index_catalog(rows)
-
-    added = updated = skipped = 0
 
-    for namespace, key, target, source_hash in read_locres(locres_path):
-        pair = (namespace, key)
-        if pair in index:
-            row = rows[index[pair]]
-            source = row.get("source")
-            if isinstance(source, str) and source.strip():
-                calculated = compute_catalog_hash(source)
-                if calculated == source_hash:
-                    row["locresImport"] = target
-                    row.pop("importedHash", None)
-                    updated += 1
-                else:
-                    skipped += 1
+    cache = configure_hash_cache(Path(args.hash_cache) if args.hash_cache else None)
+    before = cache.stats()
+    with get_stats().phase("read locres") as timer:
+        entries = list(read_locres(locres_path))
+        timer.records = len(entries)
+    if args.in_memory:
+        updated, added, skipped = import_in_memory(catalog_path, entries, args.jobs)
+    else:
+        sharded = open_sharded(catalog_path)
+        try:
+            if sharded is not None:
+                updated, added, skipped = import_merge_sharded(sharded, entries)
             else:
-                # No source stored; nothing to compare
-                skipped += 1
-        else:
-            rows.append(
-                {
-                    "namespace": namespace,
-                    "key": key,
-                    "source": None,
-                    "translated": None,
-                    "locresImport": target,
-                    "importedHash": int(source_hash),
-                }
-            )
-            index[pair] = len(rows) - 1
-            added += 1
-
-    write_catalog(catalog_path, rows)
+                updated, added, skipped = import_merge(catalog_path, entries)
+        except UnsortedCatalogError as exc:
+            print(f"{catalog_path} cannot be merge-joined ({exc}); falling back to in-memory import.")
+            updated, added, skipped = import_in_memory(catalog_path, entries, args.jobs)
+
+    cache.save()
+    hash_stats = diff_stats(cache.stats(), before)
+    report_stats(hash_stats)
     print(f"Import summary: updated {updated}, added {added}, skipped {skipped}.")
+    print(format_stats(hash_stats))
     return 0
 
 
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Zero-copy reader for UE ``.locres`` files (Legacy, Compact, Optimized and CityHash versions).
+
+The file is memory-mapped and the namespace/key tables are parsed in place.
+For versions with a deduplicated string table only the string offsets are
+indexed up front; each localized string is decoded (and passed through the
+optional ``transform``) the first time an entry references its index.
+"""
+from __future__ import annotations
+
+import mmap
+import struct
+from array import array
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+LOCRES_MAGIC = b"\x0e\x14\x74\x75\x67\x4a\x03\xfc\x4a\x15\x90\x9d\xc3\x37\x7f\x1b"
+
+VERSION_LEGACY = 0
+VERSION_COMPACT = 1
+VERSION_OPTIMIZED = 2
+VERSION_CITYHASH = 3
+
+_UINT32 = struct.Struct("<I")
+_INT32 = struct.Struct("<i")
+_UINT64 = struct.Struct("<Q")
+
+LocresEntry = Tuple[str, str, str, int]
+
+
+class LocresFormatError(ValueError):
+    """The file is not a locres file this reader understands."""
+
+
+def _fstring_span(buffer: mmap.mmap, offset: int) -> Tuple[int, int, bool, int]:
+    """Return ``(start, end, is_utf16, next_offset)`` of the FString at ``offset``; ``end`` excludes the terminator."""
+    (length,) = _INT32.unpack_from(buffer, offset)
+    start = offset + 4
+    if length > 0:
+        return start, start + length - 1, False, start + length
+    if length < 0:
+        size = -length * 2
+        return start, start + size - 2, True, start + size
+    return start, start, False, start
+
+
+def _decode(buffer: mmap.mmap, start: int, end: int, is_utf16: bool) -> str:
+    # Positive-length FStrings hold one byte per character (UE "ANSI", i.e. Latin-1).
+    return buffer[start:end].decode("utf-16-le" if is_utf16 else "latin-1", errors="replace")
+
+
+def _read_fstring(buffer: mmap.mmap, offset: int) -> Tuple[str, int]:
+    start, end, is_utf16, offset = _fstring_span(buffer, offset)
+    return _decode(buffer, start, end, is_utf16), offset
+
+
+class _StringTable:
+    """Offsets of the localized string array, decoded lazily once per index."""
+
+    def __init__(self, buffer: mmap.mmap, offset: int, version: int,
+                 transform: Optional[Callable[[str], str]]) -> None:
+        self._buffer = buffer
+        self._transform = transform
+        (count,) = _UINT32.unpack_from(buffer, offset)
+        offset += 4
+        self._starts = array("q")
+        self._ends = array("q")
+        self._wide = bytearray(count)
+        for index in range(count):
+            start, end, is_utf16, offset = _fstring_span(buffer, offset)
+            self._starts.append(start)
+            self._ends.append(end)
+            self._wide[index] = is_utf16
+            if version >= VERSION_OPTIMIZED:
+                offset += 4  # reference count
+        self._decoded: List[Optional[str]] = [None] * count
+
+    def __getitem__(self, index: int) -> str:
+        text = self._decoded[index]
+        if text is None:
+            text = _decode(self._buffer, self._starts[index], self._ends[index], bool(self._wide[index]))
+            if self._transform is not None:
+                text = self._transform(text)
+            self._decoded[index] = text
+        return text
+
+
+def iter_locres(path: Path | str, transform: Optional[Callable[[str], str]] = None) -> Iterator[LocresEntry]:
+    """Yield ``(namespace, key, text, source_hash)`` for every entry of a locres file.
+
+    ``transform`` is applied to each localized string once (per unique string
+    index for versions with a string table).
+    """
+    with open(path, "rb") as handle:
+        if not handle.seek(0, 2):
+            raise LocresFormatError(f"Empty locres file: {path}")
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            try:
+                yield from _iter_entries(buffer, transform)
+            except (struct.error, IndexError) as exc:
+                raise LocresFormatError(f"Truncated or corrupt locres file {path}: {exc}") from exc
+
+
+def _iter_entries(buffer: mmap.mmap, transform: Optional[Callable[[str], str]]) -> Iterator[LocresEntry]:
+    strings: Optional[_StringTable] = None
+    if buffer[:len(LOCRES_MAGIC)] == LOCRES_MAGIC:
+        version = buffer[len(LOCRES_MAGIC)]
+        if version > VERSION_CITYHASH:
+            raise LocresFormatError(f"Unsupported locres version {version}")
+        (strings_offset,) = _UINT64.unpack_from(buffer, len(LOCRES_MAGIC) + 1)
+        offset = len(LOCRES_MAGIC) + 1 + 8
+        strings = _StringTable(buffer, strings_offset, version, transform)
+    else:
+        version = VERSION_LEGACY
+        offset = 0
+
+    hashed = version >= VERSION_OPTIMIZED
+    if hashed:
+        offset += 4  # total entry count
+
+    (namespace_count,) = _UINT32.unpack_from(buffer, offset)
+    offset += 4
+    for _ in range(namespace_count):
+        if hashed:
+            offset += 4  # namespace key hash
+        namespace, offset = _read_fstring(buffer, offset)
+        (key_count,) = _UINT32.unpack_from(buffer, offset)
+        offset += 4
+        for _ in range(key_count):
+            if hashed:
+                offset += 4  # key hash
+            key, offset = _read_fstring(buffer, offset)
+            (source_hash,) = _UINT32.unpack_from(buffer, offset)
+            offset += 4
+            if strings is not None:
+                (string_index,) = _INT32.unpack_from(buffer, offset)
+                offset += 4
+                text = strings[string_index]
+            else:
+                text, offset = _read_fstring(buffer, offset)
+                if transform is not None:
+                    text = transform(text)
+            yield namespace, key, text, source_hash
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Long-lived JSON-RPC worker running build_locres and import_locres for the CLI.
+
+``pack`` and ``import`` loop over languages and variants; starting a fresh
+interpreter for each call paid interpreter start-up, the pylocres import and
+skip-rule compilation every time. This process is started once per CLI
+command and keeps all of that warm, together with the source-hash cache
+(sources repeat across language catalogs).
+
+Protocol: one JSON-RPC 2.0 message per line. Requests arrive on stdin::
+
+    {"jsonrpc": "2.0", "id": 1, "method": "build_locres", "params": {"args": ["--input", "..."]}}
+
+``params.args`` are the script's command-line arguments; the call runs the
+script's ``main`` in this process. The response carries its exit status
+(``{"status": 0}``); exceptions come back as JSON-RPC errors. What the script
+prints to stdout is streamed as ``output`` notifications while it runs::
+
+    {"jsonrpc": "2.0", "method": "output", "params": {"id": 1, "text": "Wrote 10 entries ...\\n"}}
+
+stderr is left alone (``--profile`` summaries, warnings and tracebacks go
+there). ``ping`` answers ``"pong"``; ``shutdown`` (or end of input) exits.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import sys
+import traceback
+from typing import Any, Callable, Dict, Iterable, Optional, TextIO
+
+import build_locres
+import import_locres
+import script_stats
+from skip_rules import load_skip_rules
+
+METHODS: Dict[str, Callable[[Iterable[str]], int]] = {
+    "build_locres": build_locres.main,
+    "import_locres": import_locres.main,
+}
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SCRIPT_ERROR = -32000
+
+
+class OutputStream(io.TextIOBase):
+    """``sys.stdout`` replacement sending complete lines as ``output`` notifications."""
+
+    def __init__(self, channel: "Channel") -> None:
+        self.channel = channel
+        self.request_id: Any = None
+        self._pending = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._pending += text
+        end = self._pending.rfind("\n") + 1
+        if end:
+            chunk, self._pending = self._pending[:end], self._pending[end:]
+            self.channel.send({"jsonrpc": "2.0", "method": "output", "params": {"id": self.request_id, "text": chunk}})
+        return len(text)
+
+    def flush(self) -> None:
+        if self._pending:
+            chunk, self._pending = self._pending, ""
+            self.channel.send({"jsonrpc": "2.0", "method": "output", "params": {"id": self.request_id, "text": chunk}})
+
+
+class Channel:
+    """The protocol stream: the original stdout, kept apart from anything printed."""
+
+    def __init__(self, handle: TextIO) -> None:
+        self.handle = handle
+
+    def send(self, message: Dict[str, Any]) -> None:
+        self.handle.write(json.dumps(message, ensure_ascii=False) + "\n")
+        self.handle.flush()
+
+    def reply(self, request_id: Any, result: Any) -> None:
+        self.send({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+    def error(self, request_id: Any, code: int, message: str) -> None:
+        self.send({"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}})
+
+
+def open_channel() -> Channel:
+    """Move the protocol off fd 1 and point fd 1 at stderr.
+
+    Shard worker processes and native code writing to fd 1 directly then
+    cannot interleave with protocol messages.
+    """
+    sys.stdout.flush()
+    protocol_fd = os.dup(1)
+    os.dup2(2, 1)
+    return Channel(os.fdopen(protocol_fd, "w", encoding="utf-8", newline="\n"))
+
+
+def run_script(method: str, args: list, output: OutputStream) -> int:
+    """Run ``METHODS[method]`` with ``args`` as if started as ``<method>.py args``."""
+    saved_argv, saved_stdout = sys.argv, sys.stdout
+    sys.argv = [f"{method}.py", *args]
+    sys.stdout = output
+    try:
+        try:
+            status = METHODS[method](args)
+        except SystemExit as exc:  # argparse errors and explicit exits
+            status = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+        finally:
+            script_stats.finish()
+        return int(status or 0)
+    finally:
+        output.flush()
+        sys.argv, sys.stdout = saved_argv, saved_stdout
+
+
+def handle(channel: Channel, output: OutputStream, message: Any) -> bool:
+    """Answer one request; returns False once the worker should exit."""
+    if not isinstance(message, dict) or not isinstance(message.get("method"), str):
+        channel.error(message.get("id") if isinstance(message, dict) else None, INVALID_REQUEST, "Invalid request")
+        return True
+    request_id = message.get("id")
+    method = message["method"]
+    if method == "shutdown":
+        channel.reply(request_id, None)
+        return False
+    if method == "ping":
+        channel.reply(request_id, "pong")
+        return True
+    if method not in METHODS:
+        channel.error(request_id, METHOD_NOT_FOUND, f"Unknown method: {method}")
+        return True
+    params = message.get("params") or {}
+    args = params.get("args") if isinstance(params, dict) else None
+    if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+        channel.error(request_id, INVALID_PARAMS, "params.args must be a list of strings")
+        return True
+
+    output.request_id = request_id
+    try:
+        status = run_script(method, args, output)
+    except Exception as exc:  # reported to the caller; the worker keeps serving
+        traceback.print_exc(file=sys.stderr)
+        channel.error(request_id, SCRIPT_ERROR, str(exc) or type(exc).__name__)
+    else:
+        channel.reply(request_id, {"status": status})
+    finally:
+        output.request_id = None
+    return True
+
+
+def serve(requests: Optional[TextIO] = None) -> int:
+    channel = open_channel()
+    output = OutputStream(channel)
+    # Compile the skip rules up front so forked shard workers inherit them.
+    load_skip_rules()
+    for line in requests or sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as exc:
+            channel.error(None, PARSE_ERROR, f"Parse error: {exc}")
+            continue
+        if not handle(channel, output, message):
+            break
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(serve())
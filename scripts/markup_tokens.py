@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Single-scan extraction of placeholders (``${...}``, ``{...}``) and XML-like tags (``<...>``).
+
+The scanner walks the delimiters with ``str.find`` and yields exactly the
+tokens of the former regex passes::
+
+    re.findall(r'\$\{[^}]+\}', text) + re.findall(r'\{[^}]+\}', text)  # minus '{##' color markers
+    re.findall(r'<[^>]+>', text)                                       # minus comparisons like '<25'
+
+Both placeholder regexes end each match at the first ``}`` after its opening
+brace, so one left-to-right pass over the braces can report the ``${...}``
+match that ends on the same ``}`` as the ``{...}`` match.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, NamedTuple, Set, Tuple
+
+SOURCE_CACHE_SIZE = 1 << 16
+
+
+def scan_placeholders(text: str) -> Set[str]:
+    tokens: Set[str] = set()
+    find = text.find
+    start = find("{")
+    while start != -1:
+        end = find("}", start + 1)
+        if end == -1:
+            break
+        if end == start + 1:  # '{}' has no content; retry from the next brace
+            start = find("{", start + 1)
+            continue
+        token = text[start:end + 1]
+        if not token.startswith("{##"):  # color markers
+            tokens.add(token)
+        if start and text[start - 1] == "$":
+            tokens.add("$" + token)
+        else:
+            dollar = find("${", start, end)
+            if dollar != -1 and dollar + 2 < end:
+                tokens.add(text[dollar:end + 1])
+        start = find("{", end + 1)
+    return tokens
+
+
+def scan_tags(text: str) -> Set[str]:
+    tokens: Set[str] = set()
+    find = text.find
+    start = find("<")
+    while start != -1:
+        end = find(">", start + 1)
+        if end == -1:
+            break
+        if end == start + 1:
+            start = find("<", start + 1)
+            continue
+        inner = text[start + 1:end].strip()
+        # Skip comparison operators like <25, <=, <!
+        if not (inner and (inner[0].isdigit() or inner[0] in "=!")):
+            tokens.add(text[start:end + 1])
+        start = find("<", end + 1)
+    return tokens
+
+
+def collapse_whitespace(token: str) -> str:
+    """``re.sub(r'\\s+', '', token)``."""
+    return "".join(token.split())
+
+
+def space_digits(token: str) -> str:
+    """``re.sub(r'(\\d)', r' \\1', token)``."""
+    return "".join(" " + char if char.isdecimal() else char for char in token)
+
+
+class SourceTokens(NamedTuple):
+    placeholders: FrozenSet[str]
+    collapsed: FrozenSet[str]  # placeholders with whitespace removed
+    digit_spaced: Dict[str, str]  # placeholder -> its space_digits() form
+    tags: FrozenSet[str]
+
+
+def tokenize(text: str) -> Tuple[Set[str], Set[str]]:
+    """Return ``(placeholders, tags)`` of ``text``."""
+    if not text:
+        return set(), set()
+    return scan_placeholders(text), scan_tags(text)
+
+
+@lru_cache(maxsize=SOURCE_CACHE_SIZE)
+def source_tokens(text: str) -> SourceTokens:
+    """Memoized tokens of a source string (sources repeat heavily across the catalog)."""
+    placeholders, tags = tokenize(text)
+    return SourceTokens(
+        frozenset(placeholders),
+        frozenset(collapse_whitespace(token) for token in placeholders),
+        {token: space_digits(token) for token in placeholders},
+        frozenset(tags),
+    )
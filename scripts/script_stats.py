@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Per-phase timing, throughput, cache and memory statistics for the catalog scripts.
+
+Every catalog script takes the options added by ``add_arguments``:
+
+``--profile``          print a per-phase summary to stderr when the script exits
+``--stats-json PATH``  write the same data to PATH as a JSON document
+``--cprofile PATH``    dump ``cProfile`` stats of the script's hot loop to PATH
+``--trace-memory``     also record each phase's Python heap peak (``tracemalloc``; slow)
+
+``start`` installs this process's collector (like ``source_hash.configure``)
+and reports it when the process exits, or at ``finish``. Code below a
+script's ``main`` reaches it through ``get_stats`` and wraps its stages in
+``phase``. A phase records:
+
+* its wall time;
+* the counters that moved while it ran (``catalog_io.map_shards`` counts the
+  catalog ``lines`` and ``bytes`` it reads);
+* records per second;
+* the process's peak RSS so far.
+
+Stages that run in worker processes send their durations back with the
+shard results, and the parent adds them with ``add_worker_time``. Those are
+CPU seconds summed over workers, listed apart from the wall-clock phases.
+``--cprofile`` covers this process only, so profile with ``--jobs 1``.
+
+Without any of the options the collector still runs; it costs two clock
+reads per phase.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore[assignment]
+
+
+def _peak_rss_mib(children: bool = False) -> Optional[float]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in bytes on macOS and KiB elsewhere.
+    return round(usage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def _per_second(count: Optional[int], seconds: float) -> Optional[float]:
+    if count is None or seconds <= 0:
+        return None
+    return round(count / seconds, 1)
+
+
+class PhaseTimer:
+    """One running phase; set ``records`` when the stage knows how many records it handled."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.records: Optional[int] = None
+        self.traced_peak = 0
+
+
+class RunStats:
+    """The statistics of one script run."""
+
+    def __init__(
+        self,
+        script: str = "",
+        argv: Optional[List[str]] = None,
+        profile: bool = False,
+        stats_json: Optional[str] = None,
+        cprofile: Optional[str] = None,
+        trace_memory: bool = False,
+    ) -> None:
+        self.script = script
+        self.argv = list(argv or [])
+        self.print_summary = profile
+        self.stats_json = stats_json
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.phases: List[Dict[str, Any]] = []
+        self.worker_phases: Dict[str, List[float]] = {}  # name -> [cpu seconds, records, shards]
+        self.counters: Dict[str, int] = {}
+        self.caches: Dict[str, Dict[str, Any]] = {}
+        self._open: List[PhaseTimer] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._started = time.perf_counter()
+        self._pid = os.getpid()
+
+    @property
+    def enabled(self) -> bool:
+        return self.print_summary or self.stats_json is not None or self.cprofile is not None
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def cache(self, name: str, hits: int, misses: int, **extra: Any) -> None:
+        """Record the final hit/miss totals of a cache (replacing earlier ones for ``name``)."""
+        lookups = hits + misses
+        self.caches[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hitRate": round(hits / lookups, 4) if lookups else None,
+            **extra,
+        }
+
+    def _fold_traced_peak(self, *timers: PhaseTimer) -> None:
+        # tracemalloc has a single peak; hand it to every open phase before resetting it.
+        if not self.trace_memory:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        for timer in (*self._open, *timers):
+            timer.traced_peak = max(timer.traced_peak, peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseTimer]:
+        """Time the ``with`` block as phase ``name``; phases may nest."""
+        timer = PhaseTimer(name)
+        before = dict(self.counters)
+        self._fold_traced_peak()
+        self._open.append(timer)
+        started = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            seconds = time.perf_counter() - started
+            self._open.remove(timer)
+            self._fold_traced_peak(timer)
+            moved = {
+                counter: value - before.get(counter, 0)
+                for counter, value in self.counters.items()
+                if value != before.get(counter, 0)
+            }
+            records = timer.records if timer.records is not None else moved.get("lines")
+            entry: Dict[str, Any] = {
+                "name": name,
+                "seconds": round(seconds, 4),
+                "records": records,
+                "recordsPerSecond": _per_second(records, seconds),
+                "counters": moved,
+                "peakRssMiB": _peak_rss_mib(),
+            }
+            if self.trace_memory:
+                entry["tracedPeakMiB"] = round(timer.traced_peak / (1 << 20), 1)
+            self.phases.append(entry)
+
+    def add_worker_time(self, name: str, seconds: float, records: Optional[int] = None) -> None:
+        """Add one shard's time in stage ``name`` measured in a worker process."""
+        totals = self.worker_phases.setdefault(name, [0.0, 0, 0])
+        totals[0] += seconds
+        totals[1] += records or 0
+        totals[2] += 1
+
+    @contextmanager
+    def profiled(self) -> Iterator[None]:
+        """Run the ``with`` block (the hot loop) under ``cProfile`` when ``--cprofile`` was given."""
+        if self.cprofile is None:
+            yield
+            return
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+        self._profile.enable()
+        try:
+            yield
+        finally:
+            self._profile.disable()
+
+    def document(self) -> Dict[str, Any]:
+        document: Dict[str, Any] = {
+            "script": self.script,
+            "argv": self.argv,
+            "python": platform.python_version(),
+            "wallSeconds": round(time.perf_counter() - self._started, 4),
+            "phases": self.phases,
+            "workerPhases": [
+                {
+                    "name": name,
+                    "cpuSeconds": round(seconds, 4),
+                    "records": int(records),
+                    "recordsPerSecond": _per_second(int(records), seconds),
+                    "shards": int(shards),
+                }
+                for name, (seconds, records, shards) in self.worker_phases.items()
+            ],
+            "counters": self.counters,
+            "caches": self.caches,
+            "memory": {
+                "peakRssMiB": _peak_rss_mib(),
+                "childrenPeakRssMiB": _peak_rss_mib(children=True),
+            },
+        }
+        if self.trace_memory:
+            document["memory"]["tracedPeakMiB"] = round(tracemalloc.get_traced_memory()[1] / (1 << 20), 1)
+        return document
+
+    def summary(self, document: Dict[str, Any]) -> str:
+        lines = [
+            f"== {self.script} stats ({document['wallSeconds']:.3f}s wall) ==",
+            f"{'phase':<28} {'seconds':>9} {'records':>10} {'records/s':>11} {'peak RSS':>11}",
+        ]
+        rows = [(phase["name"], phase["seconds"], phase) for phase in document["phases"]]
+        rows += [(f"{phase['name']} (worker cpu)", phase["cpuSeconds"], phase) for phase in document["workerPhases"]]
+        for name, seconds, phase in rows:
+            records = "" if phase["records"] is None else f"{phase['records']:,}"
+            rate = "" if phase["recordsPerSecond"] is None else f"{phase['recordsPerSecond']:,.0f}"
+            rss = f"{phase['peakRssMiB']} MiB" if phase.get("peakRssMiB") is not None else ""
+            lines.append(f"{name:<28} {seconds:>9.3f} {records:>10} {rate:>11} {rss:>11}")
+        for name, cache in document["caches"].items():
+            rate = "n/a" if cache["hitRate"] is None else f"{cache['hitRate'] * 100:.1f}%"
+            lines.append(f"cache {name}: {rate} hits ({cache['hits']:,} of {cache['hits'] + cache['misses']:,})")
+        if document["counters"]:
+            lines.append("counters: " + ", ".join(f"{name}={value:,}" for name, value in document["counters"].items()))
+        memory = document["memory"]
+        if memory["peakRssMiB"] is not None:
+            lines.append(f"peak RSS: {memory['peakRssMiB']} MiB (workers: {memory['childrenPeakRssMiB']} MiB)")
+        if "tracedPeakMiB" in memory:
+            lines.append(f"traced Python heap peak: {memory['tracedPeakMiB']} MiB")
+        return "\n".join(lines)
+
+    def report(self) -> None:
+        """Print and/or write the statistics as requested; a no-op in forked worker processes."""
+        if os.getpid() != self._pid:
+            return
+        document = self.document()
+        if self.print_summary:
+            print(self.summary(document), file=sys.stderr)
+        if self.stats_json is not None:
+            with open(self.stats_json, "w", encoding="utf-8") as handle:
+                json.dump(document, handle, indent=2)
+                handle.write("\n")
+        if self._profile is not None:
+            self._profile.dump_stats(self.cprofile)
+
+
+_current = RunStats()
+
+
+def get_stats() -> RunStats:
+    return _current
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("statistics")
+    group.add_argument("--profile", action="store_true", help="Print per-phase timing and memory to stderr at exit")
+    group.add_argument("--stats-json", metavar="PATH", help="Write per-phase timing, cache and memory stats as JSON")
+    group.add_argument("--cprofile", metavar="PATH", help="Dump cProfile stats of the hot loop (use with --jobs 1)")
+    group.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record each phase's Python heap peak with tracemalloc (slows the run down)",
+    )
+
+
+def start(script: str, args: argparse.Namespace) -> RunStats:
+    """Install the collector for this run from the ``add_arguments`` options; it reports at exit."""
+    global _current  # noqa: PLW0603 -- one collector per process by design
+    _current = RunStats(
+        script,
+        sys.argv[1:],
+        profile=args.profile or (args.trace_memory and args.stats_json is None),
+        stats_json=args.stats_json,
+        cprofile=args.cprofile,
+        trace_memory=args.trace_memory,
+    )
+    if args.trace_memory:
+        tracemalloc.start()
+    if _current.enabled:
+        atexit.register(_current.report)
+    return _current
+
+
+def finish() -> None:
+    """Report the current run now and install a fresh collector.
+
+    For long-lived processes running several scripts' ``main`` in turn
+    (``locres_worker.py``); peak RSS figures there cover the whole process.
+    """
+    global _current  # noqa: PLW0603
+    atexit.unregister(_current.report)
+    if _current.enabled:
+        _current.report()
+    if _current.trace_memory:
+        tracemalloc.stop()
+    _current = RunStats()
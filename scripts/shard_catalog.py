@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Convert catalogs between the single-file and the namespace-sharded layout.
+
+    python scripts/shard_catalog.py split translations/vi.ndjson      # -> translations/vi/
+    python scripts/shard_catalog.py join translations/vi              # -> translations/vi.ndjson
+    python scripts/shard_catalog.py status translations/vi            # shards changed since the manifest
+    python scripts/shard_catalog.py refresh translations/vi           # re-scan shards into the manifest
+
+``split`` keeps each namespace's records in catalog order; ``join`` merges
+the shards back in (namespace, key) order, which gives the original file for
+a sorted catalog. The catalog scripts and the CLI read and write either
+layout, so after ``split`` (and removing ``vi.ndjson``) nothing else changes.
+``split`` also reads a compressed ``vi.ndjson.gz``/``.xz``, and ``join``
+compresses when ``--output`` ends in ``.gz`` or ``.xz``.
+See ``catalog_shards`` for the layout itself.
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple
+
+import script_stats
+from catalog_compression import compression_of, open_catalog
+from catalog_io import CatalogLineError, CatalogWriter, ShardedCatalogWriter, decode_line
+from catalog_shards import DEFAULT_BUCKETS, ShardedCatalog, is_sharded, open_sharded
+from script_stats import get_stats
+
+
+def _namespace_key(record: object) -> Tuple[str, str]:
+    if not isinstance(record, dict):
+        return "", ""
+    return str(record.get("namespace") or ""), str(record.get("key") or "")
+
+
+def _decoded_lines(path: Path) -> Iterator[Tuple[Tuple[str, str], bytes]]:
+    """``((namespace, key), raw)`` for each non-blank line of ``path``."""
+    with open_catalog(path) as handle:
+        for line_number, raw in enumerate(handle, 1):
+            try:
+                record = decode_line(raw)
+            except json.JSONDecodeError as exc:
+                raise CatalogLineError(line_number, f"{path}: {exc}") from exc
+            if record is not None:
+                yield _namespace_key(record), raw if raw.endswith(b"\n") else raw + b"\n"
+
+
+def split(source: Path, output: Path, buckets: int) -> ShardedCatalog:
+    if output.exists() and not is_sharded(output) and any(output.iterdir()):
+        raise RuntimeError(f"{output} exists and is not a sharded catalog")
+    written = 0
+    with get_stats().phase("split") as timer, ShardedCatalogWriter(output, buckets) as writer:
+        for (namespace, _key), raw in _decoded_lines(source):
+            writer.write_raw(raw, namespace)
+            written += 1
+        timer.records = written
+    return ShardedCatalog.load(output)
+
+
+def join(source: ShardedCatalog, output: Path) -> int:
+    written = 0
+    with get_stats().phase("join") as timer, CatalogWriter(output) as writer:
+        for _sort_key, raw in heapq.merge(*(_decoded_lines(path) for path in source.paths()), key=lambda item: item[0]):
+            writer.write_raw(raw)
+            written += 1
+        timer.records = written
+    return written
+
+
+def parse_args(argv: Iterable[str]) -> argparse.Namespace:
+    common = argparse.ArgumentParser(add_help=False)
+    script_stats.add_arguments(common)
+    parser = argparse.ArgumentParser(description="Convert catalogs between the single-file and sharded layouts")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    split_parser = commands.add_parser("split", parents=[common], help="Shard a catalog NDJSON by namespace")
+    split_parser.add_argument("catalog", help="Catalog NDJSON to split")
+    split_parser.add_argument("--output", help="Sharded catalog directory (default: the catalog path without .ndjson)")
+    split_parser.add_argument(
+        "--buckets",
+        type=int,
+        default=DEFAULT_BUCKETS,
+        help="Namespace buckets for a new sharded catalog (default: %(default)s)",
+    )
+
+    join_parser = commands.add_parser("join", parents=[common], help="Merge a sharded catalog into one NDJSON")
+    join_parser.add_argument("catalog", help="Sharded catalog directory")
+    join_parser.add_argument("--output", help="Catalog NDJSON to write (default: <directory>.ndjson)")
+
+    for name, help_text in (
+        ("status", "Compare the shards with their manifest"),
+        ("refresh", "Re-scan the shards into the manifest"),
+    ):
+        command = commands.add_parser(name, parents=[common], help=help_text)
+        command.add_argument("catalog", help="Sharded catalog directory")
+    return parser.parse_args(argv)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    script_stats.start("shard_catalog", args)
+    path = Path(args.catalog)
+
+    if args.command == "split":
+        if not path.is_file():
+            raise RuntimeError(f"Catalog not found: {path}")
+        if args.buckets < 1:
+            raise RuntimeError("--buckets must be at least 1")
+        stem = path.with_suffix("") if compression_of(path) else path
+        output = Path(args.output) if args.output else stem.with_suffix("")
+        catalog = split(path, output, args.buckets)
+        print(f"Wrote {catalog.records} records to {len(catalog.shards)} shards in {output}")
+        print(f"Remove {path} to use the sharded layout.")
+        return 0
+
+    sharded = open_sharded(path)
+    if sharded is None:
+        raise RuntimeError(f"{path} is not a sharded catalog (no manifest.json)")
+
+    if args.command == "join":
+        output = Path(args.output) if args.output else path.with_suffix(".ndjson")
+        written = join(sharded, output)
+        print(f"Wrote {written} records from {len(sharded.shards)} shards to {output}")
+        return 0
+
+    if args.command == "refresh":
+        changed = sharded.refresh()
+        sharded.save()
+        for name in changed:
+            print(f"updated {name}")
+        print(f"Manifest of {sharded.root}: {len(sharded.shards)} shards, {sharded.records} records, {len(changed)} updated")
+        return 0
+
+    states = sharded.status()
+    changed = [(name, state) for name, state in states if state != "ok"]
+    for name, state in changed:
+        print(f"{state:<10} {name}")
+    print(f"{len(states) - len(changed)} of {len(states)} shards match {sharded.manifest_path}")
+    return 1 if changed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
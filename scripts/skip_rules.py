@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Compiled skip-rule engine for config/translation-skip.json, shared by the catalog scripts.
+
+Rule semantics follow the locres builder: a rule applies to its ``namespace``
+(or to every namespace when omitted), ``keyRegex`` is searched anywhere in the
+key, and ``sourcePattern`` must match at the start of the record's ``source``.
+Records without a namespace are never skipped.
+"""
+from __future__ import annotations
+
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from catalog_io import DROP, KEEP, CatalogPass
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "translation-skip.json"
+
+_MEMO_SIZE = 1 << 16
+
+Rule = Tuple[Optional[re.Pattern[str]], Optional[re.Pattern[str]]]
+KeyedRule = Tuple[re.Pattern[str], Optional[re.Pattern[str]]]
+
+
+def _combine(patterns: List[re.Pattern[str]]) -> Tuple[Optional[re.Pattern[str]], List[re.Pattern[str]]]:
+    """One alternation of the patterns that can share it, and the patterns left to match one by one.
+
+    Patterns with capture groups stay out of the alternation: their groups
+    would be renumbered there, so a numbered backreference would point at
+    another pattern's group.
+    """
+    combinable = [pattern for pattern in patterns if not pattern.groups]
+    if len(combinable) < 2:
+        return None, list(patterns)
+    try:
+        combined = re.compile("|".join(f"(?:{pattern.pattern})" for pattern in combinable))
+    except re.error:
+        # e.g. inline global flags that are only legal at the start of a pattern
+        return None, list(patterns)
+    return combined, [pattern for pattern in patterns if pattern.groups]
+
+
+class _NamespacePlan:
+    """Rules that can apply to one namespace, pre-split by what they test."""
+
+    __slots__ = ("always", "source_patterns", "source_regex", "source_rest", "keyed")
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.always = False
+        self.source_patterns: List[re.Pattern[str]] = []
+        self.keyed: List[KeyedRule] = []
+        for key_pattern, source_pattern in rules:
+            if key_pattern is not None:
+                self.keyed.append((key_pattern, source_pattern))
+            elif source_pattern is not None:
+                self.source_patterns.append(source_pattern)
+            else:
+                self.always = True
+        self.source_regex, self.source_rest = _combine(self.source_patterns)
+
+    def source_matches(self, source: str) -> bool:
+        if self.source_regex is not None and self.source_regex.match(source) is not None:
+            return True
+        return any(pattern.match(source) for pattern in self.source_rest)
+
+
+class SkipRules:
+    """Namespace-bucketed, memoized evaluation of translation skip rules."""
+
+    def __init__(self, raw_rules: Iterable[dict]) -> None:
+        self._global: List[Rule] = []
+        self._scoped: Dict[str, List[Rule]] = {}
+        for entry in raw_rules:
+            namespace = entry.get("namespace")  # None means "all namespaces"
+            key_regex = entry.get("keyRegex")
+            source_regex = entry.get("sourcePattern")
+            rule = (
+                re.compile(key_regex) if isinstance(key_regex, str) else None,
+                re.compile(source_regex) if isinstance(source_regex, str) else None,
+            )
+            if namespace is None:
+                self._global.append(rule)
+            else:
+                self._scoped.setdefault(namespace, []).append(rule)
+
+        self._global_plan = _NamespacePlan(self._global)
+        self._plans: Dict[str, _NamespacePlan] = {
+            namespace: _NamespacePlan(self._global + rules) for namespace, rules in self._scoped.items()
+        }
+        # Decisions depend on (plan, source) and (namespace, key) independently,
+        # so each half is memoized on its own bounded cache.
+        self._source_decision = lru_cache(maxsize=_MEMO_SIZE)(self._evaluate_source)
+        self._key_decision = lru_cache(maxsize=_MEMO_SIZE)(self._evaluate_key)
+
+    @classmethod
+    def from_file(cls, path: Path = CONFIG_PATH) -> "SkipRules":
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return cls([])
+        return cls(raw.get("rules", []))
+
+    def __len__(self) -> int:
+        return len(self._global) + sum(len(rules) for rules in self._scoped.values())
+
+    def _plan(self, namespace: str) -> _NamespacePlan:
+        return self._plans.get(namespace, self._global_plan)
+
+    def _evaluate_source(self, plan_name: Optional[str], source: str) -> bool:
+        plan = self._global_plan if plan_name is None else self._plans[plan_name]
+        return plan.source_matches(source)
+
+    def _evaluate_key(self, namespace: str, key: str) -> Tuple[Optional[re.Pattern[str]], ...]:
+        """Source patterns still to check for rules whose key pattern matched (None = skip outright)."""
+        return tuple(
+            source_pattern
+            for key_pattern, source_pattern in self._plan(namespace).keyed
+            if key_pattern.search(key)
+        )
+
+    def should_skip(self, namespace: str, key: Optional[str], source: Optional[str] = None) -> bool:
+        if not namespace:
+            return False
+        plan = self._plan(namespace)
+        if plan.always:
+            return True
+        if source is not None and plan.source_patterns:
+            # Namespaces without scoped rules share the global plan and its memo entries.
+            plan_name = namespace if namespace in self._plans else None
+            if self._source_decision(plan_name, source):
+                return True
+        if key is None or not plan.keyed:
+            return False
+        for source_pattern in self._key_decision(namespace, key):
+            if source_pattern is None:
+                return True
+            if source is not None and source_pattern.match(source):
+                return True
+        return False
+
+    def matches(self, namespace: str, key: Optional[str], source: Optional[str] = None) -> bool:
+        """``should_skip`` under a neutral name, for rule files that select records rather than skip them."""
+        return self.should_skip(namespace, key, source)
+
+    def cache_info(self) -> Dict[str, object]:
+        return {"source": self._source_decision.cache_info(), "key": self._key_decision.cache_info()}
+
+
+_default_rules: Optional[SkipRules] = None
+
+
+def load_skip_rules() -> SkipRules:
+    global _default_rules  # noqa: PLW0603 -- cache is module-level by design
+    if _default_rules is None:
+        _default_rules = SkipRules.from_file()
+    return _default_rules
+
+
+def should_skip_translation(namespace: str, key: Optional[str], source: Optional[str] = None) -> bool:
+    return load_skip_rules().should_skip(namespace, key, source)
+
+
+class SkipPass(CatalogPass):
+    """Pipeline pass dropping skip-listed records before the passes that follow it."""
+
+    name = "skip"
+
+    def __init__(self, options: Dict[str, object]) -> None:
+        super().__init__(options)
+        self.by_namespace: Counter[str] = Counter()
+
+    def shard_state(self) -> Counter[str]:
+        return Counter()
+
+    def process(self, state: Counter[str], record: dict, line: int) -> int:
+        namespace = record.get("namespace", "")
+        source = record.get("source")
+        if should_skip_translation(str(namespace), record.get("key"), str(source) if source else None):
+            state[namespace] += 1
+            return DROP
+        return KEEP
+
+    def merge(self, state: Counter[str], line_offset: int) -> None:
+        self.by_namespace.update(state)
+
+    def finish(self) -> int:
+        total = sum(self.by_namespace.values())
+        print(f"\nSkip rules dropped {total} records")
+        for namespace, count in self.by_namespace.most_common(10):
+            print(f"  {namespace}: {count}")
+        return 0
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Memoized UTF-32LE CRC32 source hashes shared by build_locres and import_locres.
+
+Sources repeat heavily across the catalog, so hashes are kept in a bounded
+LRU keyed on the source string. An optional persisted table (source digest ->
+crc) lets later runs skip the UTF-32 encode + CRC for sources they have seen
+before. Each process owns one default cache; worker processes report the
+entries they computed via ``drain`` so the parent can persist them.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from zlib import crc32
+
+from script_stats import get_stats
+
+DEFAULT_MAXSIZE = 1 << 18
+
+_MAGIC = b"SHC1"
+_RECORD = struct.Struct("<8sI")
+
+
+def hash_utf32le(text: str) -> int:
+    return crc32(text.encode("utf-32-le")) & 0xFFFFFFFF
+
+
+def source_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+class SourceHashCache:
+    """LRU of source -> crc, optionally backed by a persisted digest table."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, persist_path: Optional[Path] = None) -> None:
+        self.persist_path = persist_path
+        self._persisted: Dict[bytes, int] = {}
+        self._new: Dict[bytes, int] = {}
+        self._reported: Dict[str, int] = {}
+        self.persisted_hits = 0
+        self.computed = 0
+        if persist_path is not None:
+            self._persisted = load_table(persist_path)
+        self._lookup = lru_cache(maxsize=maxsize)(self._miss)
+
+    def _miss(self, text: str) -> int:
+        if self.persist_path is None:
+            self.computed += 1
+            return hash_utf32le(text)
+        digest = source_digest(text)
+        value = self._persisted.get(digest)
+        if value is not None:
+            self.persisted_hits += 1
+            return value
+        self.computed += 1
+        value = self._persisted[digest] = self._new[digest] = hash_utf32le(text)
+        return value
+
+    def hash(self, text: str) -> int:
+        return self._lookup(text)
+
+    def stats(self) -> Dict[str, int]:
+        info = self._lookup.cache_info()
+        return {
+            "hits": info.hits,
+            "persistedHits": self.persisted_hits,
+            "computed": self.computed,
+            "size": info.currsize,
+        }
+
+    def mark(self) -> None:
+        """Count ``drain`` increments from now on (worker processes forked later inherit the mark)."""
+        self._reported = self.stats()
+
+    def drain(self) -> Tuple[Dict[bytes, int], Dict[str, int]]:
+        """Return the entries computed and the counter increments since the last drain."""
+        new, self._new = self._new, {}
+        stats = self.stats()
+        delta = diff_stats(stats, self._reported)
+        self._reported = stats
+        return new, delta
+
+    def merge(self, entries: Dict[bytes, int]) -> None:
+        """Adopt entries drained from a (possibly different) process so ``save`` persists them."""
+        self._persisted.update(entries)
+        self._new.update(entries)
+
+    def save(self) -> bool:
+        """Rewrite the persisted table when new entries were computed; returns True if written."""
+        if self.persist_path is None or not self._new:
+            return False
+        save_table(self.persist_path, self._persisted)
+        self._new = {}
+        return True
+
+
+def load_table(path: Path) -> Dict[bytes, int]:
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return {}
+    if not data.startswith(_MAGIC):
+        return {}
+    body = memoryview(data)[len(_MAGIC):]
+    usable = len(body) - len(body) % _RECORD.size
+    return dict(_RECORD.iter_unpack(body[:usable]))
+
+
+def save_table(path: Path, table: Dict[bytes, int]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(_MAGIC)
+            handle.write(b"".join(_RECORD.pack(digest, value) for digest, value in table.items()))
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_name, 0o666 & ~umask)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+_default_cache: Optional[SourceHashCache] = None
+
+
+def configure(persist_path: Optional[Path] = None, maxsize: int = DEFAULT_MAXSIZE) -> SourceHashCache:
+    """Install (or reuse) this process's default cache for ``persist_path``."""
+    global _default_cache  # noqa: PLW0603 -- one cache per process by design
+    if _default_cache is None or _default_cache.persist_path != persist_path:
+        _default_cache = SourceHashCache(maxsize, persist_path)
+    return _default_cache
+
+
+def get_cache() -> SourceHashCache:
+    return _default_cache if _default_cache is not None else configure()
+
+
+def diff_stats(after: Dict[str, int], before: Dict[str, int]) -> Dict[str, int]:
+    """Counter increments from ``before`` to ``after`` (both from ``SourceHashCache.stats``)."""
+    return {name: value - before.get(name, 0) for name, value in after.items() if name != "size"}
+
+
+def add_stats(total: Dict[str, int], delta: Dict[str, int]) -> None:
+    for name, value in delta.items():
+        total[name] = total.get(name, 0) + value
+
+
+def report_stats(stats: Dict[str, int]) -> None:
+    """Record ``stats`` (as from ``SourceHashCache.stats``) as this run's source-hash cache statistics."""
+    get_stats().cache(
+        "sourceHash",
+        hits=stats.get("hits", 0) + stats.get("persistedHits", 0),
+        misses=stats.get("computed", 0),
+        persistedHits=stats.get("persistedHits", 0),
+    )
+
+
+def format_stats(stats: Dict[str, int]) -> str:
+    return (
+        f"Source hash cache: {stats['hits']} hits, {stats['persistedHits']} persisted hits, "
+        f"{stats['computed']} computed."
+    )
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Persisted inverted index from original text to the catalog records that use it.
+
+A record's original text is ``source`` (or ``locresImport`` when ``source``
+is null), the text apply_translations.py matches batch translations against
+and extract_untranslated.py groups by. For every such record the index keeps
+a posting ``(line, byte offset, untranslated)`` under an 8-byte digest of the
+original text, so callers can seek straight to the records they need.
+
+The catalog is cut into content-defined blocks of lines (a line ends a block
+when its CRC has the low ``_BOUNDARY_BITS`` bits clear), so an edit only
+changes the blocks around it. Refreshing re-hashes the file but decodes only
+blocks whose digest is not already indexed; an unchanged size and mtime skip
+even that.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from catalog_codec import decode
+from script_stats import get_stats
+
+INDEX_SUFFIX = ".srcindex"
+
+_MAGIC = b"SIX1"
+_HEADER = struct.Struct("<4sQqI")  # magic, catalog size, catalog mtime_ns, block count
+_BLOCK = struct.Struct("<16sQII")  # block digest, byte length, line count, posting count
+_POSTING = struct.Struct("<8sIIB")  # original digest, local line, local offset, untranslated
+
+_BOUNDARY_BITS = 8  # ~256 lines per block on average
+_BOUNDARY_MASK = (1 << _BOUNDARY_BITS) - 1
+_MAX_BLOCK_LINES = 4096
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def record_original(record: dict) -> Optional[str]:
+    source = record.get("source")
+    original = source if source is not None else record.get("locresImport")
+    return original if isinstance(original, str) and original else None
+
+
+def is_untranslated(record: dict, original: str) -> bool:
+    translated = record.get("translated")
+    return translated is None or translated == original
+
+
+class Posting(NamedTuple):
+    line: int  # 1-based
+    offset: int  # byte offset of the line
+    untranslated: bool
+
+
+class _Block(NamedTuple):
+    digest: bytes
+    size: int
+    lines: int
+    postings: bytes  # packed _POSTING records
+
+
+def _iter_raw_blocks(path: Path) -> Iterator[Tuple[bytes, int, List[bytes]]]:
+    """Yield ``(digest, byte_length, raw_lines)`` for the content-defined blocks of ``path``."""
+    crc32 = zlib.crc32
+    with open(path, "rb", buffering=1 << 20) as handle:
+        lines: List[bytes] = []
+        digest = hashlib.blake2b(digest_size=16)
+        size = 0
+        for raw in handle:
+            lines.append(raw)
+            digest.update(raw)
+            size += len(raw)
+            if not crc32(raw) & _BOUNDARY_MASK or len(lines) >= _MAX_BLOCK_LINES:
+                yield digest.digest(), size, lines
+                lines, digest, size = [], hashlib.blake2b(digest_size=16), 0
+        if lines:
+            yield digest.digest(), size, lines
+
+
+def _index_lines(lines: List[bytes]) -> bytes:
+    postings = []
+    offset = 0
+    for local_line, raw in enumerate(lines):
+        line = raw.strip()
+        if line:
+            try:
+                record = decode(line)
+            except json.JSONDecodeError:
+                record = None
+            if isinstance(record, dict):
+                original = record_original(record)
+                if original is not None:
+                    postings.append(
+                        _POSTING.pack(text_digest(original), local_line, offset, is_untranslated(record, original))
+                    )
+        offset += len(raw)
+    return b"".join(postings)
+
+
+class SourceIndex:
+    """Original-text index of one catalog, stored next to it as ``<catalog>.srcindex``."""
+
+    def __init__(self, catalog_path: Path | str, index_path: Optional[Path | str] = None) -> None:
+        self.catalog_path = Path(catalog_path)
+        self.index_path = Path(index_path) if index_path else self.catalog_path.with_name(
+            self.catalog_path.name + INDEX_SUFFIX
+        )
+        self._stamp: Tuple[int, int] = (-1, -1)
+        self._blocks: List[_Block] = []
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = self.index_path.read_bytes()
+        except FileNotFoundError:
+            return
+        if len(data) < _HEADER.size:
+            return
+        magic, size, mtime_ns, block_count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            return
+        blocks = []
+        offset = _HEADER.size
+        try:
+            for _ in range(block_count):
+                digest, block_size, lines, posting_count = _BLOCK.unpack_from(data, offset)
+                offset += _BLOCK.size
+                end = offset + posting_count * _POSTING.size
+                if end > len(data):
+                    return
+                blocks.append(_Block(digest, block_size, lines, data[offset:end]))
+                offset = end
+        except struct.error:
+            return
+        self._stamp = (size, mtime_ns)
+        self._blocks = blocks
+
+    def save(self) -> None:
+        parts = [_HEADER.pack(_MAGIC, self._stamp[0], self._stamp[1], len(self._blocks))]
+        for block in self._blocks:
+            parts.append(_BLOCK.pack(block.digest, block.size, block.lines, len(block.postings) // _POSTING.size))
+            parts.append(block.postings)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{self.index_path.name}.", dir=str(self.index_path.parent))
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(b"".join(parts))
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_name, 0o666 & ~umask)
+            os.replace(tmp_name, self.index_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def refresh(self) -> Tuple[int, int]:
+        """Bring the index up to date with the catalog; returns ``(blocks reused, blocks decoded)``.
+
+        The index file is rewritten only when something changed.
+        """
+        stat = self.catalog_path.stat()
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        if stamp == self._stamp:
+            return len(self._blocks), 0
+
+        known: Dict[bytes, _Block] = {block.digest: block for block in self._blocks}
+        blocks: List[_Block] = []
+        decoded = 0
+        for digest, size, lines in _iter_raw_blocks(self.catalog_path):
+            block = known.get(digest)
+            if block is None:
+                block = _Block(digest, size, len(lines), _index_lines(lines))
+                decoded += 1
+            blocks.append(block)
+        self._blocks = blocks
+        self._stamp = stamp
+        self.save()
+        return len(blocks) - decoded, decoded
+
+    def _iter_postings(self) -> Iterator[Tuple[bytes, Posting]]:
+        line_base = 1
+        offset_base = 0
+        for block in self._blocks:
+            for digest, local_line, local_offset, untranslated in _POSTING.iter_unpack(block.postings):
+                yield digest, Posting(line_base + local_line, offset_base + local_offset, bool(untranslated))
+            line_base += block.lines
+            offset_base += block.size
+
+    def __len__(self) -> int:
+        """Number of indexed records (records with an original text)."""
+        return sum(len(block.postings) for block in self._blocks) // _POSTING.size
+
+    def find(self, texts: Iterable[str]) -> Dict[str, List[Posting]]:
+        """Postings of the records whose original is one of ``texts``, in file order.
+
+        Digest collisions are possible in principle, so callers re-check the
+        decoded record.
+        """
+        wanted: Dict[bytes, str] = {text_digest(text): text for text in texts}
+        found: Dict[str, List[Posting]] = {}
+        for digest, posting in self._iter_postings():
+            text = wanted.get(digest)
+            if text is not None:
+                found.setdefault(text, []).append(posting)
+        return found
+
+    def untranslated(self) -> List[Posting]:
+        """Postings of all untranslated records, in file order."""
+        return [posting for _digest, posting in self._iter_postings() if posting.untranslated]
+
+
+def read_lines(path: Path | str, postings: Iterable[Posting]) -> Iterator[Tuple[Posting, bytes]]:
+    """Seek to each posting's line (in the given order) and yield it with the raw line."""
+    with open(path, "rb") as handle:
+        for posting in postings:
+            handle.seek(posting.offset)
+            yield posting, handle.readline()
+
+
+def open_index(catalog_path: Path | str, index_path: Optional[Path | str] = None) -> SourceIndex:
+    with get_stats().phase("source index"):
+        index = SourceIndex(catalog_path, index_path)
+        reused, decoded = index.refresh()
+    get_stats().cache("sourceIndexBlocks", hits=reused, misses=decoded)
+    if decoded:
+        print(f"Source index: reused {reused} blocks, indexed {decoded}")
+    return index
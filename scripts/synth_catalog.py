@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""Generate deterministic synthetic catalogs (and matching locres files) for benchmarks.
+
+The real ``translations/vi.ndjson`` is a Git LFS object that is not always
+fetched, so the benchmarks run on generated data instead. For a given seed
+and set of options the output is byte-for-byte the same on every run and
+platform. It imitates the shape of the real catalog:
+
+* records sorted by ``(namespace, key)`` in ``json.dumps`` layout, spread
+  over namespaces of very different sizes;
+* Chinese sources with a long-tailed length distribution (item names up to
+  multi-paragraph quest text), ``{0}``/``${name}`` placeholders, ``<Tag>…</>``
+  rich-text tags, numbers and escaped newlines;
+* a share of sources repeated under other keys, and numbered variants of
+  the same sentence;
+* translated, untranslated (``null`` or copied source) and locres-only
+  records, with a few translations that lost a tag (validation issues).
+
+Besides the catalog it can write a ``translations_all.json`` covering part
+of the untranslated sources (for ``apply_translations.py``) and a game-side
+locres holding the sources, with some stale and some new entries (for
+``import_locres.py``)::
+
+    python scripts/synth_catalog.py --records 200000 --output /tmp/bench/vi.ndjson \\
+        --translations /tmp/bench/translations_all.json --locres /tmp/bench/Game.locres
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from catalog_io import CatalogWriter
+
+DEFAULT_SEED = 20240601
+
+_HANZI = (
+    "的一是不了人我在有他这中大来上个国到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好"
+    "都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长知民样现分将外但身些与高意进把法此"
+    "实回二理美点月明其种声全工己话儿者向情部正名定女问力机给等几很业最间新什打便位因重被走电四第门相次东政海口使教西再平真"
+    "听世气信北少关并内加化由却代军产入先山五太水万市眼体别处总才场师书比住员九笑性通目华报立马命张活难神数件安表原车白应路"
+    "期叫死常提感金何更反合放做系计或司利受光王果亲界及今京务制解各任至清物台象记边共风战干接它许八特觉望直服毛林题建南度统"
+    "色字请交爱让认算论百吃义科怎元社术结六功指思非流每青管夫连远资队跟带花快条院变联言权往展该领传近留红治决周保达办运武半"
+    "候七必城父强步完革深区即求品士转量空甚众技轻程告江语英基派满式李息写呢识极令黄德收脸钱党倒未持取设始版双历越史商千片容"
+    "研像找友孩站广改议形委早房音火际则首单据导影失拿网香似斯专石若兵弟谁校读志飞观争究包组造落视济喜离虽坏兴冲剑修罗仙魔灵"
+    "宝装备技能任务副本帮派坐骑宠物时装称号成就活动商店兑换奖励经验等级属性攻击防御气血内力会心暴击闪避命中抗性"
+)
+_PUNCTUATION = "，，，。。！？、：；…"
+_VIET_SYLLABLES = (
+    "anh", "bạn", "của", "không", "người", "được", "những", "này", "một", "có", "trong", "đã", "với", "là",
+    "cho", "đến", "khi", "nhiệm", "vụ", "kỹ", "năng", "trang", "bị", "phó", "bản", "bang", "hội", "thú", "cưỡi",
+    "sủng", "vật", "thời", "danh", "hiệu", "thành", "tựu", "hoạt", "động", "cửa", "hàng", "đổi", "thưởng",
+    "kinh", "nghiệm", "cấp", "thuộc", "tính", "công", "kích", "phòng", "ngự", "khí", "huyết", "nội", "lực",
+    "hội", "tâm", "bạo", "né", "tránh", "trúng", "kháng", "kiếm", "tu", "la", "tiên", "ma", "linh", "bảo",
+)
+_TAGS = ("RTP_Skill_Rationality", "RTP_Orange", "RTP_Green", "RTP_Item", "Highlight", "Emphasis")
+_PLACEHOLDERS = ("{0}", "{1}", "{2}", "${count}", "${name}", "{PlayerName}", "{ItemName}", "${level}")
+
+# (namespace, relative size): a few huge namespaces and a long tail of small ones.
+NAMESPACES: Tuple[Tuple[str, int], ...] = (
+    ("Dialog", 30), ("Quest", 18), ("Item", 14), ("Skill", 8), ("Buff", 6), ("NPC", 5), ("UI", 4),
+    ("Battle", 3), ("Achievement", 2), ("Map", 2), ("Title", 1), ("Mail", 1), ("Shop", 1), ("Pet", 1),
+    ("Mount", 1), ("Fashion", 1), ("Guild", 1), ("Tutorial", 1), ("Activity", 1), ("System", 1),
+)
+
+# (share of new texts, min length, max length) in CJK characters.
+_LENGTHS = ((0.45, 2, 8), (0.35, 8, 40), (0.15, 40, 150), (0.05, 150, 600))
+
+
+class SynthOptions:
+    """Knobs of the generated catalog; the defaults resemble the real vi.ndjson."""
+
+    def __init__(
+        self,
+        records: int = 100_000,
+        seed: int = DEFAULT_SEED,
+        duplicate_ratio: float = 0.30,
+        translated_ratio: float = 0.70,
+        copied_ratio: float = 0.05,
+        locres_only_ratio: float = 0.02,
+        issue_ratio: float = 0.002,
+        markup_ratio: float = 0.15,
+    ) -> None:
+        self.records = records
+        self.seed = seed
+        self.duplicate_ratio = duplicate_ratio
+        self.translated_ratio = translated_ratio
+        self.copied_ratio = copied_ratio
+        self.locres_only_ratio = locres_only_ratio
+        self.issue_ratio = issue_ratio
+        self.markup_ratio = markup_ratio
+
+
+class _TextFactory:
+    def __init__(self, rng: random.Random, options: SynthOptions) -> None:
+        self.rng = rng
+        self.options = options
+        self.sources: List[str] = []
+
+    def _hanzi(self, length: int) -> str:
+        rng = self.rng
+        chars = rng.choices(_HANZI, k=length)
+        # Break longer runs into clauses.
+        for index in range(rng.randint(6, 14), length - 1, rng.randint(6, 14)):
+            chars[index] = rng.choice(_PUNCTUATION)
+        return "".join(chars)
+
+    def _length(self) -> Tuple[int, int]:
+        roll = self.rng.random()
+        for share, low, high in _LENGTHS:
+            if roll < share:
+                return low, high
+            roll -= share
+        return _LENGTHS[-1][1:]
+
+    def new_source(self) -> str:
+        rng = self.rng
+        low, high = self._length()
+        text = self._hanzi(rng.randint(low, high))
+        if high <= 8:
+            return text
+        pieces = [text]
+        if rng.random() < self.options.markup_ratio:
+            tag = rng.choice(_TAGS)
+            at = rng.randrange(len(text))
+            pieces = [text[:at], f"<{tag}>", self._hanzi(rng.randint(2, 6)), "</>", text[at:]]
+        if rng.random() < self.options.markup_ratio:
+            pieces.insert(rng.randrange(len(pieces) + 1), rng.choice(_PLACEHOLDERS))
+        if rng.random() < 0.2:
+            pieces.insert(rng.randrange(len(pieces) + 1), str(rng.randint(1, 5000)))
+        if high > 40 and rng.random() < 0.3:
+            pieces.insert(rng.randrange(1, len(pieces) + 1), "\\n")
+        return "".join(pieces)
+
+    def source(self) -> str:
+        rng = self.rng
+        if self.sources and rng.random() < self.options.duplicate_ratio:
+            text = rng.choice(self.sources)
+            if rng.random() < 0.3:
+                # A numbered variant of an earlier sentence (level, count, chapter...).
+                text = self._hanzi(2) + str(rng.randint(1, 99)) + text
+            return text
+        text = self.new_source()
+        self.sources.append(text)
+        return text
+
+    def translate(self, source: str) -> str:
+        """A Vietnamese-looking text keeping the source's placeholders, tags and numbers."""
+        rng = self.rng
+        out: List[str] = []
+        index = 0
+        length = len(source)
+        while index < length:
+            char = source[index]
+            if char in "<{$":
+                end = source.find(">" if char == "<" else "}", index)
+                if end != -1:
+                    out.append(source[index:end + 1])
+                    index = end + 1
+                    continue
+            if source.startswith("\\n", index):
+                out.append("\\n")
+                index += 2
+                continue
+            if char.isdigit():
+                start = index
+                while index < length and source[index].isdigit():
+                    index += 1
+                out.append(source[start:index])
+                continue
+            start = index
+            index += 1
+            while index < length and source[index] not in "<{$\\" and not source[index].isdigit():
+                index += 1
+            words = max(1, (index - start) // 2)
+            out.append(" ".join(rng.choices(_VIET_SYLLABLES, k=words)).capitalize())
+        text = " ".join(out)
+        if rng.random() < self.options.issue_ratio and "<" in text:
+            text = text.replace("</>", "", 1)
+        return text
+
+
+def _namespace_sizes(total: int) -> List[Tuple[str, int]]:
+    weight = sum(size for _name, size in NAMESPACES)
+    sizes = [(name, total * size // weight) for name, size in NAMESPACES]
+    sizes[0] = (sizes[0][0], sizes[0][1] + total - sum(count for _name, count in sizes))
+    return sorted(sizes)
+
+
+def _keys(rng: random.Random, count: int) -> Iterator[str]:
+    number = 0
+    emitted = 0
+    while emitted < count:
+        number += rng.randint(1, 3)
+        yield f"{number:06d}"
+        emitted += 1
+        if emitted < count and rng.random() < 0.05:
+            yield f"{number:06d}b"
+            emitted += 1
+
+
+def generate_records(options: SynthOptions) -> Iterator[dict]:
+    """Yield the catalog records in file order (sorted by namespace and key)."""
+    rng = random.Random(options.seed)
+    texts = _TextFactory(rng, options)
+    for namespace, count in _namespace_sizes(options.records):
+        for key in _keys(rng, count):
+            roll = rng.random()
+            if roll < options.locres_only_ratio:
+                text = texts.source()
+                yield {
+                    "namespace": namespace,
+                    "key": key,
+                    "source": None,
+                    "translated": None,
+                    "locresImport": text,
+                    "importedHash": rng.getrandbits(32),
+                }
+                continue
+            source = texts.source()
+            roll = rng.random()
+            if roll < options.translated_ratio:
+                translated: Optional[str] = texts.translate(source)
+            elif roll < options.translated_ratio + options.copied_ratio:
+                translated = source
+            else:
+                translated = None
+            yield {"namespace": namespace, "key": key, "source": source, "translated": translated}
+
+
+def write_catalog(path: Path, records: Iterable[dict]) -> Tuple[int, List[str]]:
+    """Write ``records`` to ``path``; returns the count and the sources of untranslated records."""
+    untranslated: List[str] = []
+    count = 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with CatalogWriter(path) as writer:
+        for record in records:
+            writer.write_record(record)
+            count += 1
+            source = record.get("source")
+            if source is not None and record.get("translated") in (None, source):
+                untranslated.append(source)
+    return count, untranslated
+
+
+def write_translations(path: Path, untranslated: Iterable[str], options: SynthOptions, share: float = 0.5) -> int:
+    """Write a translations_all.json covering ``share`` of the distinct untranslated sources."""
+    rng = random.Random(options.seed + 1)
+    texts = _TextFactory(rng, options)
+    mapping: Dict[str, str] = {}
+    for source in untranslated:
+        if source not in mapping and rng.random() < share:
+            mapping[source] = texts.translate(source)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(mapping, handle, ensure_ascii=False, indent=2)
+    return len(mapping)
+
+
+def write_locres(
+    path: Path, catalog: Path, options: SynthOptions, stale_ratio: float = 0.03, new_ratio: float = 0.02
+) -> int:
+    """Write a game-side locres of the catalog's sources; some changed since, some not in the catalog yet."""
+    # pylocres is only needed here, not for the catalog itself.
+    from build_locres import write_locres_rows
+    from import_locres import compute_catalog_hash
+
+    rng = random.Random(options.seed + 2)
+    texts = _TextFactory(rng, options)
+
+    def rows() -> Iterator[Tuple[str, str, str, int]]:
+        with catalog.open("rb") as handle:
+            for raw in handle:
+                record = json.loads(raw)
+                source = record.get("source") or record.get("locresImport")
+                if not source:
+                    continue
+                namespace, key = record["namespace"], record["key"]
+                if rng.random() < stale_ratio:
+                    source = texts.new_source()
+                yield namespace, key, source, compute_catalog_hash(source)
+                if rng.random() < new_ratio:
+                    text = texts.new_source()
+                    yield namespace, key + "n", text, compute_catalog_hash(text)
+
+    return write_locres_rows(rows(), path)
+
+
+def parse_args(argv: Iterable[str]) -> argparse.Namespace:
+    defaults = SynthOptions()
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic NDJSON catalog")
+    parser.add_argument("--records", type=int, default=defaults.records, help="Catalog records (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed (default: %(default)s)")
+    parser.add_argument("--output", required=True, help="Catalog NDJSON to write")
+    parser.add_argument("--translations", help="Also write a translations_all.json for apply_translations.py")
+    parser.add_argument("--locres", help="Also write a game-side locres for import_locres.py (needs pylocres)")
+    parser.add_argument(
+        "--duplicate-ratio",
+        type=float,
+        default=defaults.duplicate_ratio,
+        help="Share of records repeating an earlier source (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--translated-ratio",
+        type=float,
+        default=defaults.translated_ratio,
+        help="Share of records with a translation (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--markup-ratio",
+        type=float,
+        default=defaults.markup_ratio,
+        help="Chance of a tag, and separately of a placeholder, in a sentence (default: %(default)s)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    options = SynthOptions(
+        records=args.records,
+        seed=args.seed,
+        duplicate_ratio=args.duplicate_ratio,
+        translated_ratio=args.translated_ratio,
+        markup_ratio=args.markup_ratio,
+    )
+    catalog_path = Path(args.output)
+    count, untranslated = write_catalog(catalog_path, generate_records(options))
+    print(f"Wrote {count} records ({len(untranslated)} untranslated) to {catalog_path}")
+    if args.translations:
+        written = write_translations(Path(args.translations), untranslated, options)
+        print(f"Wrote {written} translations to {args.translations}")
+    if args.locres:
+        written = write_locres(Path(args.locres), catalog_path, options)
+        print(f"Wrote {written} locres entries to {args.locres}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Collapse source texts that differ only in numbers, placeholders or markup into templates.
+
+``templatize`` replaces every ``${...}``/``{...}`` placeholder, ``<...>`` tag
+and run of ASCII digits with a numbered slot marker (``⟦0⟧``, ``⟦1⟧``, ...)
+and returns the replaced values, so::
+
+    可在琥珀商店-装备中兑换【主会心副专精】5/10品质等级的天灵。
+    -> 可在琥珀商店-装备中兑换【主会心副专精】⟦0⟧/⟦1⟧品质等级的天灵。, ("5", "10")
+
+Texts sharing a template form a family that is translated once; ``expand``
+puts each member's slot values back into the translated template.
+"""
+from __future__ import annotations
+
+import heapq
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+SLOT_OPEN = "⟦"
+SLOT_CLOSE = "⟧"
+
+_SLOT_VALUE = re.compile(r"\$\{[^}]+\}|\{[^}]+\}|<[^>]+>|[0-9]+")
+_MARKER = re.compile(SLOT_OPEN + r"(\d+)" + SLOT_CLOSE)
+
+# (text or template, occurrence count, variants or None for a plain text)
+OutputItem = Tuple[str, int, Optional[List[dict]]]
+
+
+def templatize(text: str) -> Tuple[str, Tuple[str, ...]]:
+    """Return ``(template, slot_values)``; texts that already contain marker brackets are left alone."""
+    if SLOT_OPEN in text or SLOT_CLOSE in text:
+        return text, ()
+    slots: List[str] = []
+
+    def slot(match: re.Match) -> str:
+        slots.append(match.group(0))
+        return f"{SLOT_OPEN}{len(slots) - 1}{SLOT_CLOSE}"
+
+    return _SLOT_VALUE.sub(slot, text), tuple(slots)
+
+
+def expand(template: str, slots: Sequence[str]) -> Optional[str]:
+    """Fill ``template``'s markers from ``slots``.
+
+    Returns None unless every slot is used and no marker is out of range, so
+    a translation that dropped or invented a slot is never applied.
+    """
+    used = set()
+
+    def value(match: re.Match) -> str:
+        index = int(match.group(1))
+        if index >= len(slots):
+            raise IndexError(index)
+        used.add(index)
+        return slots[index]
+
+    try:
+        text = _MARKER.sub(value, template)
+    except IndexError:
+        return None
+    return text if len(used) == len(slots) else None
+
+
+def collapse_families(counts: Iterable[Tuple[str, int]], min_variants: int = 2) -> List[OutputItem]:
+    """Group ``(text, count)`` pairs into template families, in first-seen order.
+
+    Families with at least ``min_variants`` distinct texts become one item
+    whose variants carry their slot values and counts; the rest stay plain
+    texts.
+    """
+    families: Dict[str, List[Tuple[str, Tuple[str, ...], int]]] = {}
+    for text, count in counts:
+        template, slots = templatize(text)
+        families.setdefault(template, []).append((text, slots, count))
+
+    items: List[OutputItem] = []
+    for template, members in families.items():
+        if len(members) >= min_variants and members[0][1]:
+            variants = [{"slots": list(slots), "count": count} for _text, slots, count in members]
+            items.append((template, sum(count for _text, _slots, count in members), variants))
+        else:
+            items.extend((text, count, None) for text, _slots, count in members)
+    return items
+
+
+def rank(items: Iterable[tuple], top: Optional[int] = None) -> List[tuple]:
+    """Items whose second field is a count, most common first with ties in input order; only ``top`` if given."""
+    if top is None:
+        return sorted(items, key=lambda item: -item[1])
+    return heapq.nlargest(top, items, key=lambda item: item[1])
+
+
+def expand_translations(items: Iterable[dict]) -> Tuple[Dict[str, str], int]:
+    """Turn translated to_translate.json items into ``{source: translation}``.
+
+    Template items are expanded onto every variant. Returns the mapping and
+    the number of variants skipped because the translation's slot markers did
+    not match.
+    """
+    translations: Dict[str, str] = {}
+    rejected = 0
+    for item in items:
+        template = item.get("zh")
+        translated = item.get("vi")
+        if not template or not translated:
+            continue
+        variants = item.get("variants")
+        if not variants:
+            translations[template] = translated
+            continue
+        for variant in variants:
+            slots = variant.get("slots", [])
+            source = expand(template, slots)
+            target = expand(translated, slots)
+            if source is None or target is None:
+                rejected += 1
+                continue
+            translations[source] = target
+    return translations, rejected
@@ -4,162 +4,234 @@ Validate translations for placeholder and tag consistency.
 Detects when translated text contains placeholders/tags not present in source.
 """
 
+import argparse
 import json
-import re
 import sys
 from pathlib import Path
 
+import markup_tokens
+import script_stats
+from catalog_filter import translated_not_null
+from catalog_io import KEEP, CatalogPass, decode_line, iter_catalog_raw, iter_shard_lines, map_shards
+from catalog_shards import LineLocator, catalog_files, list_catalogs
+from markup_tokens import collapse_whitespace, scan_placeholders, scan_tags, source_tokens, tokenize
+from script_stats import get_stats
+from validation_cache import ValidationCache, iter_revision_lines, line_digest, load_entries
+
 def extract_placeholders(text):
     """Extract all placeholder patterns from text."""
-    if not text:
-        return set()
+    return scan_placeholders(text) if text else set()
 
-    patterns = set()
+def extract_tags(text):
+    """Extract all XML-like tags from text."""
+    return scan_tags(text) if text else set()
 
-    # ${...} placeholders
-    patterns.update(re.findall(r'\$\{[^}]+\}', text))
+def validate_entry(entry, line_num, filename):
+    """Return the placeholder/tag issues of a single catalog record."""
+    translated = entry.get('translated', '')
+    source = entry.get('source', '')
+    locres = entry.get('locresImport', '')
 
-    # {...} placeholders (but not color markers)
-    for m in re.findall(r'\{[^}]+\}', text):
-        if not m.startswith('{##'):  # Skip color markers
-            patterns.add(m)
+    # Use locresImport as fallback source
+    src_text = source if source else locres
 
-    return patterns
+    if not translated or not src_text:
+        return []
 
-def extract_tags(text):
-    """Extract all XML-like tags from text."""
-    if not text:
-        return set()
-
-    # <...> tags, but filter out comparison operators like <25, >100
-    tags = set()
-    for match in re.findall(r'<[^>]+>', text):
-        # Skip if it looks like a comparison operator (starts with number or comparison)
-        inner = match[1:-1].strip()
-        if inner and (inner[0].isdigit() or inner.startswith('=') or inner.startswith('!')):
-            continue
-        tags.add(match)
-    return tags
+    src = source_tokens(src_text)
+    trans_placeholders, trans_tags = tokenize(translated)
+    if trans_placeholders == src.placeholders and trans_tags == src.tags:
+        return []
 
-def validate_file(filepath):
-    """Validate translations in a single NDJSON file."""
     issues = []
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-
-            try:
-                entry = json.loads(line)
-            except json.JSONDecodeError:
-                continue
+    def add(issue_type, value):
+        issues.append({
+            'file': filename,
+            'line': line_num,
+            'ns': entry.get('namespace', ''),
+            'key': entry.get('key', ''),
+            'type': issue_type,
+            'value': value,
+            'source': src_text[:60]
+        })
+
+    # Placeholders in translation that aren't in source; spaced versions of a
+    # source placeholder are reported separately
+    for ep in sorted(trans_placeholders - src.placeholders):
+        if collapse_whitespace(ep) in src.collapsed:
+            add('spaced_placeholder', ep)
+        else:
+            add('extra_placeholder', ep)
+
+    # Missing placeholders, unless a digit-spaced version is present
+    for mp in sorted(src.placeholders - trans_placeholders):
+        if src.digit_spaced[mp] not in trans_placeholders:
+            add('missing_placeholder', mp)
+
+    for et in sorted(trans_tags - src.tags):
+        add('extra_tag', et)
+
+    for mt in sorted(src.tags - trans_tags):
+        add('missing_tag', mt)
 
-            translated = entry.get('translated', '')
-            source = entry.get('source', '')
-            locres = entry.get('locresImport', '')
+    return issues
 
-            # Use locresImport as fallback source
-            src_text = source if source else locres
+def has_markup(raw):
+    """False when no field of the raw record line can hold a placeholder or tag.
 
-            if not translated or not src_text:
-                continue
+    The only brace is then the object's own, and neither '<' nor a \\u00XX
+    escape (which could spell one) appears, so the line needs no decoding.
+    """
+    return raw.count(b'{') > 1 or b'<' in raw or b'\\u00' in raw
 
-            ns = entry.get('namespace', '')
-            key = entry.get('key', '')
-
-            # Check placeholders
-            src_placeholders = extract_placeholders(src_text)
-            trans_placeholders = extract_placeholders(translated)
-
-            # Find placeholders in translation that aren't in source
-            extra_placeholders = trans_placeholders - src_placeholders
-
-            # Filter out false positives (spaces inside placeholders that match source without space)
-            for ep in list(extra_placeholders):
-                # Check if it's a spaced version of a source placeholder
-                normalized = re.sub(r'\s+', '', ep)
-                if normalized in [re.sub(r'\s+', '', sp) for sp in src_placeholders]:
-                    issues.append({
-                        'file': filepath.name,
-                        'line': line_num,
-                        'ns': ns,
-                        'key': key,
-                        'type': 'spaced_placeholder',
-                        'value': ep,
-                        'source': src_text[:60]
-                    })
-                elif ep not in src_placeholders:
-                    issues.append({
-                        'file': filepath.name,
-                        'line': line_num,
-                        'ns': ns,
-                        'key': key,
-                        'type': 'extra_placeholder',
-                        'value': ep,
-                        'source': src_text[:60]
-                    })
-
-            # Check for missing placeholders
-            missing_placeholders = src_placeholders - trans_placeholders
-            # Also check spaced versions
-            for mp in list(missing_placeholders):
-                spaced = re.sub(r'(\d)', r' \1', mp)
-                if spaced in trans_placeholders:
-                    missing_placeholders.discard(mp)
-
-            for mp in missing_placeholders:
-                issues.append({
-                    'file': filepath.name,
-                    'line': line_num,
-                    'ns': ns,
-                    'key': key,
-                    'type': 'missing_placeholder',
-                    'value': mp,
-                    'source': src_text[:60]
-                })
-
-            # Check tags
-            src_tags = extract_tags(src_text)
-            trans_tags = extract_tags(translated)
-
-            extra_tags = trans_tags - src_tags
-            for et in extra_tags:
-                issues.append({
-                    'file': filepath.name,
-                    'line': line_num,
-                    'ns': ns,
-                    'key': key,
-                    'type': 'extra_tag',
-                    'value': et,
-                    'source': src_text[:60]
-                })
-
-            missing_tags = src_tags - trans_tags
-            for mt in missing_tags:
-                issues.append({
-                    'file': filepath.name,
-                    'line': line_num,
-                    'ns': ns,
-                    'key': key,
-                    'type': 'missing_tag',
-                    'value': mt,
-                    'source': src_text[:60]
-                })
+_HAS_TRANSLATION = translated_not_null()
 
-    return issues
+def needs_check(raw):
+    """False when the raw line alone shows the record has nothing to validate (no markup or no translation)."""
+    return has_markup(raw) and _HAS_TRANSLATION.raw(raw) is not False
 
-def main():
-    translations_dir = Path(__file__).parent.parent / 'translations'
+def issue_row(issue):
+    return (issue['type'], issue['value'], issue['ns'], issue['key'], issue['source'])
 
-    all_issues = []
+def stamp_issues(rows, line_num, filename):
+    return [
+        {'file': filename, 'line': line_num, 'ns': ns, 'key': key, 'type': issue_type, 'value': value, 'source': source}
+        for issue_type, value, ns, key, source in rows
+    ]
 
-    for ndjson_file in translations_dir.glob('*.ndjson'):
-        print(f"Validating {ndjson_file.name}...")
-        issues = validate_file(ndjson_file)
-        all_issues.extend(issues)
+def _validate_lines(lines, filename, max_issues=None, cache_key=None, unchanged=None):
+    """Validate ``(line_num, raw)`` pairs; returns ``(last_line_num, (issues, seen, fresh))``.
 
+    With ``cache_key`` (path, fingerprint) results are looked up by line
+    digest; ``seen`` packs the digests of the checked lines and ``fresh``
+    holds the results computed here. Lines whose digest is in ``unchanged``
+    are skipped entirely.
+    """
+    cache = load_entries(*cache_key) if cache_key else None
+    digests = cache is not None or unchanged is not None
+    issues = []
+    seen = []
+    fresh = {}
+    line_num = 0
+    for line_num, raw in lines:
+        if not needs_check(raw):
+            continue
+        digest = line_digest(raw) if digests else None
+        if unchanged is not None and digest in unchanged:
+            continue
+        if cache is not None:
+            seen.append(digest)
+            rows = cache.get(digest)
+            if rows is None:
+                rows = fresh.get(digest)
+            if rows is not None:
+                issues.extend(stamp_issues(rows, line_num, filename))
+                if max_issues is not None and len(issues) >= max_issues:
+                    break
+                continue
+        try:
+            entry = decode_line(raw)
+        except json.JSONDecodeError:
+            entry = None
+        found = validate_entry(entry, line_num, filename) if isinstance(entry, dict) else []
+        if cache is not None:
+            fresh[digest] = tuple(issue_row(issue) for issue in found)
+        issues.extend(found)
+        if max_issues is not None and len(issues) >= max_issues:
+            # The driver stops at this shard, so the short line count is never used.
+            break
+    return line_num, (issues, b''.join(seen), fresh)
+
+def _validate_shard(shard, filename, max_issues=None, cache_key=None):
+    return _validate_lines(iter_shard_lines(shard), filename, max_issues, cache_key)
+
+def iter_issues(filepath, jobs=None, max_issues=None, cache=None, since=None):
+    """Yield the issues of one NDJSON file in file order, stopping after ``max_issues``.
+
+    ``cache`` is a ``ValidationCache`` to read and update. ``since`` is a git
+    revision; only lines that are not in the file at that revision are checked
+    (for a sharded catalog, lines in none of its shards at that revision).
+    """
+    cache_key = (cache.path, cache.fingerprint) if cache is not None else None
+    locator = LineLocator(filepath)
+    if since is not None:
+        unchanged = {
+            line_digest(raw)
+            for shard_file in catalog_files(filepath)
+            for raw in iter_revision_lines(shard_file, since)
+            if needs_check(raw)
+        }
+        lines = iter_catalog_raw(filepath)
+        results = [(0, _validate_lines(lines, filepath.name, max_issues, cache_key, unchanged)[1])]
+        if cache is not None:
+            cache.complete = False
+    else:
+        results = map_shards(filepath, _validate_shard, filepath.name, max_issues, cache_key, jobs=jobs)
+
+    emitted = 0
+    for line_offset, (shard_issues, seen, fresh) in results:
+        if cache is not None:
+            cache.update(seen, fresh)
+        for issue in shard_issues[:None if max_issues is None else max_issues - emitted]:
+            issue['line'] += line_offset
+            emitted += 1
+            yield locator.relabel(issue)
+        if max_issues is not None and emitted >= max_issues:
+            # Shards stop scanning at the limit, so not every line was seen.
+            if cache is not None:
+                cache.complete = False
+            return
+
+def validate_file(filepath, jobs=None, max_issues=None, cache=None, since=None):
+    """Validate translations in a single NDJSON file."""
+    return list(iter_issues(filepath, jobs, max_issues, cache, since))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Validate placeholder and tag consistency of NDJSON catalogs")
+    parser.add_argument('files', nargs='*', type=Path,
+                        help="Catalogs or sharded catalog directories to check (default: all in translations/)")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--jsonl', action='store_true', help="Stream issues to stdout as JSON lines")
+    parser.add_argument('--max-issues', type=int, default=None, help="Stop after this many issues")
+    parser.add_argument('--cache', type=Path, default=None,
+                        help="Sidecar file of per-record results; unchanged records are not re-checked")
+    parser.add_argument('--since', metavar='GIT_REV', default=None,
+                        help="Only check lines that differ from the catalog at this git revision")
+    script_stats.add_arguments(parser)
+    return parser.parse_args(argv)
+
+class ValidatePass(CatalogPass):
+    """Pipeline pass collecting placeholder/tag issues."""
+
+    name = 'validate'
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.filename = Path(options['input']).name
+        self.issues = []
+        self.locator = None
+
+    def shard_state(self):
+        return []
+
+    def process(self, state, record, line):
+        state.extend(validate_entry(record, line, self.filename))
+        return KEEP
+
+    def merge(self, state, line_offset):
+        if self.locator is None:
+            self.locator = LineLocator(self.options['input'])
+        for issue in state:
+            issue['line'] += line_offset
+            self.locator.relabel(issue)
+        self.issues.extend(state)
+
+    def finish(self):
+        return report_issues(self.issues)
+
+def report_issues(all_issues):
+    """Print issues grouped by type; returns the exit status."""
     if not all_issues:
         print("\nNo issues found!")
         return 0
@@ -183,7 +255,45 @@ def main():
         if len(issues) > 10:
             print(f"  ... and {len(issues) - 10} more")
 
-    return 1 if all_issues else 0
+    return 1
+
+def main(argv=None):
+    args = parse_args(argv)
+    stats = script_stats.start('validate-translations', args)
+    translations_dir = Path(__file__).parent.parent / 'translations'
+    files = args.files or list_catalogs(translations_dir)
+    # Progress goes to stderr when stdout carries the JSON lines
+    log = sys.stderr if args.jsonl else sys.stdout
+
+    all_issues = []
+    found = 0
+    write = sys.stdout.write
+    cache = ValidationCache(args.cache, [__file__, markup_tokens.__file__]) if args.cache else None
+
+    for ndjson_file in files:
+        remaining = None if args.max_issues is None else args.max_issues - found
+        if remaining is not None and remaining <= 0:
+            if cache is not None:
+                cache.complete = False
+            break
+        print(f"Validating {ndjson_file.name}...", file=log)
+        with stats.phase(f"validate {ndjson_file.name}"), stats.profiled():
+            for issue in iter_issues(ndjson_file, args.jobs, remaining, cache, args.since):
+                found += 1
+                if args.jsonl:
+                    write(json.dumps(issue, ensure_ascii=False) + '\n')
+                else:
+                    all_issues.append(issue)
+    stats.count('issues', found)
+
+    if cache is not None:
+        cache.save()
+        print(cache.summary(), file=log)
+        stats.cache('validation', hits=max(len(cache.seen) - len(cache.fresh), 0), misses=len(cache.fresh))
+
+    if args.jsonl:
+        return 1 if found else 0
+    return report_issues(all_issues)
 
 if __name__ == '__main__':
     sys.exit(main())
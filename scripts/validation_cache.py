@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Sidecar cache of per-record validation results, plus git-revision line sets.
+
+Results are keyed by a digest of the raw catalog line. The line fixes every
+field the validator reads (namespace, key, source, locresImport, translated),
+and hashing the bytes lets unchanged records skip JSON decoding as well as
+tokenizing. Issues are stored without their file and line, which are
+re-stamped on every hit, so one cache serves several catalogs and survives
+records moving around.
+
+The cache is tied to a fingerprint of the validator's source files, so edits
+to the validation rules invalidate it automatically.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, Set, Tuple
+
+from catalog_compression import compression_of, decompress_stream
+
+DIGEST_SIZE = 8
+
+_MAGIC = b"VLC1"
+_HEADER = struct.Struct("<4s16sI")
+
+# (type, value, ns, key, source) of one issue; a clean record maps to ().
+IssueRow = Tuple[str, str, str, str, str]
+CacheEntries = Dict[bytes, Tuple[IssueRow, ...]]
+
+_LFS_POINTER = b"version https://git-lfs.github.com/spec/"
+
+_loaded: Dict[Tuple[str, bytes], CacheEntries] = {}
+
+
+def line_digest(raw: bytes) -> bytes:
+    return hashlib.blake2b(raw.strip(), digest_size=DIGEST_SIZE).digest()
+
+
+def code_fingerprint(paths: Iterable[Path | str]) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    return digest.digest()
+
+
+def _read(path: Path, fingerprint: bytes) -> CacheEntries:
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return {}
+    if len(data) < _HEADER.size:
+        return {}
+    magic, stored_fingerprint, clean_count = _HEADER.unpack_from(data)
+    if magic != _MAGIC or stored_fingerprint != fingerprint:
+        return {}
+    offset = _HEADER.size
+    clean_end = offset + clean_count * DIGEST_SIZE
+    entries: CacheEntries = dict.fromkeys(
+        (data[start:start + DIGEST_SIZE] for start in range(offset, clean_end, DIGEST_SIZE)), ()
+    )
+    try:
+        dirty = json.loads(data[clean_end:].decode("utf-8") or "{}")
+    except ValueError:
+        return {}
+    for digest, rows in dirty.items():
+        entries[bytes.fromhex(digest)] = tuple(tuple(row) for row in rows)
+    return entries
+
+
+def load_entries(path: Path, fingerprint: bytes) -> CacheEntries:
+    """Load ``path`` once per process (forked workers inherit the parent's copy)."""
+    key = (str(path), fingerprint)
+    if key not in _loaded:
+        _loaded[key] = _read(path, fingerprint)
+    return _loaded[key]
+
+
+def _write(path: Path, fingerprint: bytes, entries: CacheEntries) -> None:
+    clean = [digest for digest, rows in entries.items() if not rows]
+    dirty = {digest.hex(): rows for digest, rows in entries.items() if rows}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(_HEADER.pack(_MAGIC, fingerprint, len(clean)))
+            handle.write(b"".join(clean))
+            handle.write(json.dumps(dirty, ensure_ascii=False).encode("utf-8"))
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_name, 0o666 & ~umask)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class ValidationCache:
+    """Driver-side view of the sidecar: the loaded entries plus what this run saw and computed."""
+
+    def __init__(self, path: Path | str, code_paths: Iterable[Path | str]) -> None:
+        self.path = Path(path)
+        self.fingerprint = code_fingerprint(code_paths)
+        self.entries = load_entries(self.path, self.fingerprint)
+        self.seen: Set[bytes] = set()
+        self.fresh: CacheEntries = {}
+        # False when the run did not look at every line (early exit, --since),
+        # in which case entries that were not seen are kept rather than pruned.
+        self.complete = True
+
+    def update(self, seen: bytes, fresh: CacheEntries) -> None:
+        """Record a shard's packed seen digests and newly computed results."""
+        self.seen.update(seen[start:start + DIGEST_SIZE] for start in range(0, len(seen), DIGEST_SIZE))
+        self.fresh.update(fresh)
+
+    def save(self) -> None:
+        merged = dict(self.entries)
+        merged.update(self.fresh)
+        if self.complete:
+            merged = {digest: merged[digest] for digest in self.seen if digest in merged}
+        _write(self.path, self.fingerprint, merged)
+
+    def summary(self) -> str:
+        reused = len(self.seen) - len(self.fresh)
+        return f"Validation cache: {max(reused, 0)} records reused, {len(self.fresh)} checked"
+
+
+def _git(args: Iterable[str], cwd: Path) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=str(cwd), capture_output=True)
+
+
+class _PrefixedStream:
+    """``stream`` with ``prefix`` (bytes already read from it) put back in front."""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO) -> None:
+        self._prefix = prefix
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._prefix:
+            return self._stream.read(size)
+        if size is None or size < 0:
+            data, self._prefix = self._prefix + self._stream.read(), b""
+            return data
+        data, self._prefix = self._prefix[:size], self._prefix[size:]
+        return data
+
+
+def iter_revision_lines(path: Path, rev: str) -> Iterator[bytes]:
+    """Yield the raw lines ``path`` had at git revision ``rev`` (nothing if it did not exist).
+
+    LFS pointers are resolved through ``git lfs smudge``; ``git diff`` on an
+    LFS-tracked catalog would only compare pointers. Compressed catalogs are
+    decompressed.
+    """
+    cwd = path.resolve().parent
+    spec = f"{rev}:./{path.name}"
+    if _git(["rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}"], cwd).returncode != 0:
+        raise RuntimeError(f"Unknown git revision: {rev}")
+    if _git(["cat-file", "-e", spec], cwd).returncode != 0:
+        return
+
+    blob = subprocess.Popen(["git", "cat-file", "blob", spec], cwd=str(cwd), stdout=subprocess.PIPE)
+    processes = [blob]
+    try:
+        first = blob.stdout.readline()
+        if first.startswith(_LFS_POINTER):
+            smudge = subprocess.Popen(
+                ["git", "lfs", "smudge", path.name], cwd=str(cwd), stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            )
+            processes.append(smudge)
+            smudge.stdin.write(first + blob.stdout.read())
+            smudge.stdin.close()
+            content: BinaryIO = smudge.stdout
+            first = b""
+        else:
+            content = blob.stdout
+        compression = compression_of(path)
+        if compression is not None:
+            yield from decompress_stream(_PrefixedStream(first, content), compression)
+        else:
+            if first:
+                yield first
+            yield from content
+        for process in processes:
+            process.stdout.close()
+            if process.wait() != 0:
+                raise RuntimeError(f"Could not read {path.name} at {rev}")
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
@@ -1,13 +1,25 @@
 #!/usr/bin/env node
+import { mkdtemp, rm } from 'node:fs/promises';
+import os from 'node:os';
 import path from 'node:path';
 import process from 'node:process';
 import { select } from '@inquirer/prompts';
 import { collect } from './commands/collect.js';
 import { translate } from './commands/translate.js';
 import { syncTranslations } from './commands/sync.js';
-import { buildPak } from './commands/pack.js';
+import {
+  buildLocresTargets,
+  buildPak,
+  findOverlays,
+  pakCacheKey,
+  queryLocresCache,
+  restoreCachedPak,
+  storeCachedPak,
+  type LocresTarget,
+} from './commands/pack.js';
 import { importLocres } from './commands/importLocres.js';
 import { getSupportedLanguages } from './lib/languages.js';
+import { withPythonWorker } from './lib/pythonWorker.js';
 import { syncFmtStrings } from './commands/fmtstring.js';
 import { diffTranslations, printDiff, writeDiffReport } from './commands/diff.js';
 import { GitLfsObjectMissingError } from './lib/translationFile.js';
@@ -203,6 +215,9 @@ async function main(): Promise<void> {
       const keepTemp = Boolean(flags.keepTemp);
       const outputDir = outputDirPos ?? (typeof flags.output === 'string' ? String(flags.output) : 'artifacts');
       const variant = typeof flags.variant === 'string' ? String(flags.variant) : undefined;
+      const profile = Boolean(flags.profile);
+      const statsDir = typeof flags.statsDir === 'string' ? String(flags.statsDir) : undefined;
+      const cacheDir = typeof flags.cacheDir === 'string' ? String(flags.cacheDir) : undefined;
 
       interface VariantConfig {
         suffix: string;
@@ -230,25 +245,88 @@ async function main(): Promise<void> {
         : [variant ?? 'base'];
 
       for (const variantKey of variantsToBuild) {
-        const config = variantConfigs[variantKey];
-        if (!config) {
+        if (!variantConfigs[variantKey]) {
           throw new Error(`Unknown variant: ${variantKey}. Valid variants: ${Object.keys(variantConfigs).join(', ')}, all`);
         }
+      }
 
-        for (const language of languages) {
-          const translationsPath = path.join('translations', `${language}.ndjson`);
-          const pakName = `${language.toUpperCase()}_PATCH${config.suffix}`;
-          const assetLayers = config.layers(language);
-          await buildPak({
-            translationsPath,
-            outputDir,
-            pythonPath,
-            keepTemp,
-            pakName,
-            language,
-            assetLayers,
+      // Every variant's locres is built in one concurrent batch. A variant
+      // differs from the language catalog only by its layers' overlays, so
+      // variants without overlays share a single build. With --cache-dir, a
+      // PAK whose inputs are unchanged is restored from the cache and its
+      // locres build and repak are skipped.
+      const locresRoot = await mkdtemp(path.join(os.tmpdir(), 'wojd-locres-'));
+      try {
+        await withPythonWorker(pythonPath, async (worker) => {
+          const builds: {
+            language: string;
+            variantKey: string;
+            assetLayers: string[];
+            pakName: string;
+            pakKey?: string;
+            target: LocresTarget;
+          }[] = [];
+          for (const variantKey of variantsToBuild) {
+            const config = variantConfigs[variantKey];
+            for (const language of languages) {
+              const assetLayers = config.layers(language);
+              builds.push({
+                language,
+                variantKey,
+                assetLayers,
+                pakName: `${language.toUpperCase()}_PATCH${config.suffix}`,
+                target: {
+                  name: `${language}/${variantKey}`,
+                  translationsPath: path.join('translations', `${language}.ndjson`),
+                  outputPath: path.join(locresRoot, variantKey, language, 'Game.locres'),
+                  overlays: await findOverlays(assetLayers),
+                },
+              });
+            }
+          }
+          let pending = builds;
+          if (cacheDir) {
+            const cached = await queryLocresCache(builds.map((build) => build.target), locresRoot, worker, cacheDir);
+            pending = [];
+            for (const build of builds) {
+              const status = cached.get(path.resolve(build.target.outputPath));
+              if (status) {
+                build.pakKey = await pakCacheKey(status.key, build.pakName, build.language, build.assetLayers);
+                if (status.hit && (await restoreCachedPak(cacheDir, build.pakKey, outputDir, build.pakName))) {
+                  console.log(`[${build.language}] ${build.variantKey} unchanged; PAK restored from ${cacheDir}`);
+                  continue;
+                }
+              }
+              pending.push(build);
+            }
+          }
+
+          await buildLocresTargets(pending.map((build) => build.target), locresRoot, {
+            worker,
+            profile,
+            statsDir,
+            cacheDir,
           });
-        }
+
+          for (const { language, assetLayers, pakName, pakKey, target } of pending) {
+            await buildPak({
+              translationsPath: target.translationsPath,
+              outputDir,
+              pythonPath,
+              keepTemp,
+              pakName,
+              language,
+              assetLayers,
+              worker,
+              locresPath: target.outputPath,
+            });
+            if (cacheDir && pakKey) {
+              await storeCachedPak(cacheDir, pakKey, outputDir, pakName);
+            }
+          }
+        });
+      } finally {
+        await rm(locresRoot, { recursive: true, force: true });
       }
       return;
     }
@@ -378,6 +456,26 @@ function parseArgs(args: string[]): ParsedArgs {
       continue;
     }
 
+    if (arg === '--profile') {
+      flags.profile = true;
+      index += 1;
+      continue;
+    }
+
+    if (arg.startsWith('--stats-dir')) {
+      const value = extractOptionValue(arg, args[index + 1]);
+      flags.statsDir = value.value;
+      index += value.skip ? 1 : 2;
+      continue;
+    }
+
+    if (arg.startsWith('--cache-dir')) {
+      const value = extractOptionValue(arg, args[index + 1]);
+      flags.cacheDir = value.value;
+      index += value.skip ? 1 : 2;
+      continue;
+    }
+
 
     console.warn(`Ignoring unknown option: ${arg}`);
     index += 1;
@@ -440,7 +538,7 @@ function printHelp(): void {
   console.log('      Translate pending entries for the chosen language using Bedrock Claude or Google Gemini.');
   console.log('  import <Game.locres> [--python <path>]');
   console.log('      Import an existing locres into all language catalogs.');
-  console.log('  pack [outputDir] [--python <path>] [--keep-temp]');
+  console.log('  pack [outputDir] [--python <path>] [--keep-temp] [--profile] [--cache-dir <dir>]');
   console.log('      Build Game.locres and per-language PAK files into outputDir (default: artifacts).');
   console.log('Options for translate:');
   console.log('  --language <code>        Language to translate; prompts when omitted.');
@@ -455,6 +553,10 @@ function printHelp(): void {
   console.log('  --python <path>          Use a specific Python interpreter.');
   console.log('  --keep-temp              Preserve the temporary working folder.');
   console.log('  --variant <name>         Build variant: base, lim-xf, lim-mvh, or all.');
+  console.log('                           Layers with translations/overlays/<layer>.ndjson adjust that variant\'s locres.');
+  console.log('  --profile                Print build_locres per-phase timing and memory.');
+  console.log('  --stats-dir <dir>        Write build_locres stats JSON into <dir>.');
+  console.log('  --cache-dir <dir>        Reuse locres and PAK builds whose inputs are unchanged (stored in <dir>).');
   console.log('Options for import:');
   console.log('  --python <path>          Use a specific Python interpreter.');
   console.log('Options for diff:');
@@ -4,7 +4,16 @@ import { execFile } from 'node:child_process';
 import { mkdir, writeFile } from 'node:fs/promises';
 import { promisify } from 'node:util';
 import type { TranslationItem } from '../lib/translationFile.js';
-import { createKey, loadTranslationFile, materializeLfsContent, parseTranslationContent } from '../lib/translationFile.js';
+import {
+  SHARD_MANIFEST_NAME,
+  catalogCompression,
+  createKey,
+  decompressCatalog,
+  loadTranslationFile,
+  materializeLfsBuffer,
+  parseShardManifest,
+  parseTranslationContent,
+} from '../lib/translationFile.js';
 
 const execFileAsync = promisify(execFile);
 
@@ -97,18 +106,63 @@ function normalizeValue(value: TranslationItem[keyof TranslationItem]): string |
   return null;
 }
 
+async function gitShow(ref: string, relPath: string): Promise<string> {
+  const { stdout } = await execFileAsync('git', ['show', `${ref}:${relPath}`], {
+    cwd: process.cwd(),
+    encoding: 'buffer',
+    maxBuffer: 1024 * 1024 * 512,
+  });
+  const raw = await materializeLfsBuffer(stdout, `${relPath}@${ref}`);
+  return (await decompressCatalog(raw, catalogCompression(relPath))).toString('utf8');
+}
+
+function isMissingAtRef(error: unknown): boolean {
+  const err = error as NodeJS.ErrnoException & { stderr?: string };
+  const codeString = err.code !== undefined ? String(err.code) : undefined;
+  return codeString === '128' || (typeof err.stderr === 'string' && err.stderr.includes('fatal:'));
+}
+
+/** The shards listed in `dir/manifest.json` at `ref`, concatenated in manifest order. */
+async function showShardedFromGit(ref: string, dir: string): Promise<string> {
+  const manifestPath = path.posix.join(dir, SHARD_MANIFEST_NAME);
+  const manifest = parseShardManifest(await gitShow(ref, manifestPath), `${manifestPath}@${ref}`);
+  const parts: string[] = [];
+  for (const file of manifest.shards.map((entry) => entry.file).sort()) {
+    parts.push(await gitShow(ref, path.posix.join(dir, file)));
+  }
+  return parts.join('\n');
+}
+
+/**
+ * The catalog `gitPath` at `ref`, which may have been stored compressed
+ * (`.ndjson.gz`/`.ndjson.xz`) or sharded at that revision.
+ */
+async function showCatalogFromGit(ref: string, gitPath: string): Promise<string> {
+  const candidates = catalogCompression(gitPath) ? [gitPath] : [gitPath, `${gitPath}.gz`, `${gitPath}.xz`];
+  for (const candidate of candidates) {
+    try {
+      return await gitShow(ref, candidate);
+    } catch (error) {
+      if (!isMissingAtRef(error)) {
+        throw error;
+      }
+    }
+  }
+  return showShardedFromGit(ref, gitPath.replace(/\.ndjson(\.(gz|xz))?$/, ''));
+}
+
 async function loadFromGit(ref: string, relPath: string): Promise<TranslationItem[]> {
+  const gitPath = relPath.split(path.sep).join(path.posix.sep);
   try {
-    const { stdout } = await execFileAsync('git', ['show', `${ref}:${relPath}`], {
-      cwd: process.cwd(),
-      maxBuffer: 1024 * 1024 * 512,
-    });
-    const resolved = await materializeLfsContent(stdout, `${relPath}@${ref}`);
-    return parseTranslationContent(resolved, `${relPath}@${ref}`);
+    let content: string;
+    if (!/\.ndjson(\.(gz|xz))?$/.test(gitPath)) {
+      content = await showShardedFromGit(ref, gitPath);
+    } else {
+      content = await showCatalogFromGit(ref, gitPath);
+    }
+    return parseTranslationContent(content, `${relPath}@${ref}`);
   } catch (error) {
-    const err = error as NodeJS.ErrnoException & { stderr?: string };
-    const codeString = err.code !== undefined ? String(err.code) : undefined;
-    if (codeString === '128' || (typeof err.stderr === 'string' && err.stderr.includes('fatal:'))) {
+    if (isMissingAtRef(error)) {
       console.warn(`No baseline found for ${relPath} at ${ref}; treating as empty.`);
       return [];
     }
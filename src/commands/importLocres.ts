@@ -1,6 +1,5 @@
 import path from 'node:path';
-import { fileURLToPath } from 'node:url';
-import { detectPython, runCommand } from '../lib/python.js';
+import { withPythonWorker } from '../lib/pythonWorker.js';
 import { getSupportedLanguages } from '../lib/languages.js';
 
 export interface ImportLocresOptions {
@@ -15,19 +14,17 @@ export async function importLocres(options: ImportLocresOptions): Promise<void>
     throw new Error('Missing locres file path.');
   }
 
-  const pythonExecutable = detectPython(pythonPath);
-  const scriptPath = fileURLToPath(new URL('../../scripts/import_locres.py', import.meta.url));
-
   const languages = await getSupportedLanguages();
-  for (const language of languages) {
-    const catalogPath = path.resolve('translations', `${language}.ndjson`);
-    console.log(`Importing ${locresPath} into ${catalogPath} [${language}]`);
-    await runCommand(pythonExecutable, [
-      scriptPath,
-      '--locres',
-      path.resolve(locresPath),
-      '--catalog',
-      catalogPath,
-    ]);
-  }
+  await withPythonWorker(pythonPath, async (worker) => {
+    for (const language of languages) {
+      const catalogPath = path.resolve('translations', `${language}.ndjson`);
+      console.log(`Importing ${locresPath} into ${catalogPath} [${language}]`);
+      await worker.run('import_locres', [
+        '--locres',
+        path.resolve(locresPath),
+        '--catalog',
+        catalogPath,
+      ]);
+    }
+  });
 }
@@ -1,9 +1,16 @@
-import { mkdtemp, mkdir, rename, rm, writeFile, cp } from 'node:fs/promises';
+import { createHash } from 'node:crypto';
+import type { Dirent } from 'node:fs';
+import { copyFile, mkdtemp, mkdir, readdir, readFile, rename, rm, stat, utimes, writeFile, cp } from 'node:fs/promises';
 import os from 'node:os';
 import path from 'node:path';
-import { fileURLToPath } from 'node:url';
-import { loadTranslationFile, type TranslationItem } from '../lib/translationFile.js';
-import { detectPython, runCommand } from '../lib/python.js';
+import {
+  loadTranslationFile,
+  resolveCatalogFile,
+  shardedCatalogDir,
+  type TranslationItem,
+} from '../lib/translationFile.js';
+import { runCommand } from '../lib/python.js';
+import { PythonWorker } from '../lib/pythonWorker.js';
 
 export interface PackOptions {
   translationsPath: string;
@@ -13,10 +20,237 @@ export interface PackOptions {
   pakName?: string;
   language?: string;
   assetLayers?: string[];
+  profile?: boolean;
+  statsDir?: string;
+  /** Shared worker for build_locres; one is started (and stopped) for this build when omitted. */
+  worker?: PythonWorker;
+  /** Game.locres already built for this catalog (see buildLocresTargets); copied instead of rebuilt. */
+  locresPath?: string;
+}
+
+export interface LocresTarget {
+  name: string;
+  translationsPath: string;
+  outputPath: string;
+  /** Overlay catalogs applied on top of translationsPath, in order (see findOverlays). */
+  overlays?: string[];
+}
+
+const overlayRoot = path.join('translations', 'overlays');
+
+/**
+ * Overlay catalogs for a variant's asset layers: translations/overlays/<layer>.ndjson
+ * for each layer that has one, in layer order. Overlays override or suppress
+ * translations of the language catalog for that variant only.
+ */
+export async function findOverlays(layers: string[] = []): Promise<string[]> {
+  const overlays: string[] = [];
+  for (const layer of layers) {
+    const overlayPath = path.join(overlayRoot, `${layer}.ndjson`);
+    const stats = await stat(overlayPath).catch(() => undefined);
+    if (stats?.isFile()) {
+      overlays.push(overlayPath);
+    }
+  }
+  return overlays;
+}
+
+export interface LocresBatchOptions {
+  worker: PythonWorker;
+  profile?: boolean;
+  statsDir?: string;
+  /** build_locres --cache-dir: unchanged targets are restored instead of rebuilt. */
+  cacheDir?: string;
+}
+
+export interface LocresCacheStatus {
+  /** Content-addressed build key of the target (see scripts/build_cache.py). */
+  key: string;
+  hit: boolean;
+}
+
+/**
+ * Build several Game.locres files with one build_locres --manifest call.
+ * The targets are built concurrently, and targets sharing a catalog and
+ * overlays are built once. The manifest is written to workDir.
+ */
+export async function buildLocresTargets(
+  targets: LocresTarget[],
+  workDir: string,
+  options: LocresBatchOptions,
+): Promise<void> {
+  if (targets.length === 0) {
+    return;
+  }
+  const args = ['--manifest', await writeManifest(targets, workDir)];
+  if (options.cacheDir) {
+    args.push('--cache-dir', path.resolve(options.cacheDir));
+  }
+  args.push(...(await statsArgs(options.profile, options.statsDir, 'batch')));
+  await options.worker.run('build_locres', args);
+}
+
+/**
+ * Ask build_locres (--query-cache, a dry run) which targets are already in
+ * the build cache. Returns each target's build key and hit flag, by
+ * resolved output path.
+ */
+export async function queryLocresCache(
+  targets: LocresTarget[],
+  workDir: string,
+  worker: PythonWorker,
+  cacheDir: string,
+): Promise<Map<string, LocresCacheStatus>> {
+  const status = new Map<string, LocresCacheStatus>();
+  if (targets.length === 0) {
+    return status;
+  }
+  const reportPath = path.join(workDir, 'locres-cache.json');
+  const args = ['--manifest', await writeManifest(targets, workDir), '--cache-dir', path.resolve(cacheDir)];
+  await worker.run('build_locres', [...args, '--query-cache', reportPath]);
+  const report = JSON.parse(await readFile(reportPath, 'utf8')) as {
+    targets: { key: string; hit: boolean; outputs: string[] }[];
+  };
+  for (const { key, hit, outputs } of report.targets) {
+    for (const output of outputs) {
+      status.set(path.resolve(output), { key, hit });
+    }
+  }
+  return status;
+}
+
+async function writeManifest(targets: LocresTarget[], workDir: string): Promise<string> {
+  const manifestPath = path.join(workDir, 'locres-manifest.json');
+  const manifest = {
+    targets: targets.map((target) => ({
+      name: target.name,
+      input: path.resolve(target.translationsPath),
+      output: path.resolve(target.outputPath),
+      overlays: (target.overlays ?? []).map((overlay) => path.resolve(overlay)),
+    })),
+  };
+  await mkdir(workDir, { recursive: true });
+  await writeFile(manifestPath, `${JSON.stringify(manifest, null, 2)}\n`, 'utf8');
+  return manifestPath;
+}
+
+// Bump when buildPak changes what goes into a PAK besides the locres.
+const PAK_CACHE_VERSION = 1;
+
+/**
+ * Cache key of a whole PAK: the locres build key plus everything else
+ * buildPak packs (the FormatString catalog and the asset layers).
+ */
+export async function pakCacheKey(
+  locresKey: string,
+  pakName: string,
+  language: string,
+  assetLayers: string[] = [],
+): Promise<string> {
+  const hash = createHash('sha256');
+  hash.update(JSON.stringify({ version: PAK_CACHE_VERSION, locresKey, pakName }));
+  const fmtCatalogPath = path.join('translations', `${language}.fmtstring.ndjson`);
+  const fmtShardedDir = await shardedCatalogDir(fmtCatalogPath);
+  if (fmtShardedDir) {
+    await hashTree(hash, fmtShardedDir, '');
+  } else {
+    await hashFile(hash, await resolveCatalogFile(fmtCatalogPath));
+  }
+  for (const layer of assetLayers) {
+    hash.update(`\0layer:${layer}\0`);
+    await hashTree(hash, path.resolve('assets', layer), '');
+  }
+  return hash.digest('hex');
+}
+
+async function hashFile(hash: ReturnType<typeof createHash>, filePath: string): Promise<void> {
+  try {
+    hash.update(await readFile(filePath));
+  } catch (error) {
+    if ((error as NodeJS.ErrnoException).code !== 'ENOENT') {
+      throw error;
+    }
+    hash.update('\0missing\0');
+  }
+}
+
+async function hashTree(hash: ReturnType<typeof createHash>, root: string, relative: string): Promise<void> {
+  let entries: Dirent[];
+  try {
+    entries = await readdir(path.join(root, relative), { withFileTypes: true });
+  } catch (error) {
+    if ((error as NodeJS.ErrnoException).code !== 'ENOENT') {
+      throw error;
+    }
+    return;
+  }
+  entries.sort((a, b) => (a.name < b.name ? -1 : a.name > b.name ? 1 : 0));
+  for (const entry of entries) {
+    const entryPath = path.posix.join(relative, entry.name);
+    if (entry.isDirectory()) {
+      await hashTree(hash, root, entryPath);
+    } else if (entry.isFile()) {
+      hash.update(`\0${entryPath}\0`);
+      hash.update(await readFile(path.join(root, entryPath)));
+    }
+  }
+}
+
+export function pakFileName(pakBase: string): string {
+  return `${pakBase.startsWith('~') ? pakBase : `~${pakBase}`}.pak`;
+}
+
+function cachedPakPath(cacheDir: string, key: string): string {
+  return path.resolve(cacheDir, 'pak', key.slice(0, 2), `${key}.pak`);
+}
+
+/** Copy a cached PAK into outputDir; returns false when the cache has none for key. */
+export async function restoreCachedPak(cacheDir: string, key: string, outputDir: string, pakName: string): Promise<boolean> {
+  const cachedPath = cachedPakPath(cacheDir, key);
+  const stats = await stat(cachedPath).catch(() => undefined);
+  if (!stats?.isFile()) {
+    return false;
+  }
+  const finalDir = path.resolve(outputDir);
+  await mkdir(finalDir, { recursive: true });
+  const tempPath = path.join(finalDir, `.${pakFileName(pakName)}.tmp`);
+  await copyFile(cachedPath, tempPath);
+  await rename(tempPath, path.join(finalDir, pakFileName(pakName)));
+  const now = new Date();
+  await utimes(cachedPath, now, now);
+  return true;
+}
+
+/** Store the PAK buildPak wrote to outputDir under key (nothing when no PAK was written). */
+export async function storeCachedPak(cacheDir: string, key: string, outputDir: string, pakName: string): Promise<void> {
+  const pakPath = path.resolve(outputDir, pakFileName(pakName));
+  const stats = await stat(pakPath).catch(() => undefined);
+  if (!stats?.isFile()) {
+    return;
+  }
+  const cachedPath = cachedPakPath(cacheDir, key);
+  await mkdir(path.dirname(cachedPath), { recursive: true });
+  const tempPath = `${cachedPath}.${process.pid}.tmp`;
+  await copyFile(pakPath, tempPath);
+  await rename(tempPath, cachedPath);
+}
+
+async function statsArgs(profile: boolean | undefined, statsDir: string | undefined, name: string): Promise<string[]> {
+  const args: string[] = [];
+  if (profile) {
+    args.push('--profile');
+  }
+  if (statsDir) {
+    const resolvedStatsDir = path.resolve(statsDir);
+    await mkdir(resolvedStatsDir, { recursive: true });
+    args.push('--stats-json', path.join(resolvedStatsDir, `${name}.build_locres.json`));
+  }
+  return args;
 }
 
 export async function buildPak(options: PackOptions): Promise<void> {
-  const { translationsPath, outputDir, pythonPath, keepTemp, pakName, language, assetLayers } = options;
+  const { translationsPath, outputDir, pythonPath, keepTemp, pakName, language, assetLayers, profile, statsDir } = options;
+  const worker = options.worker ?? new PythonWorker(pythonPath);
 
   if (!translationsPath) {
     throw new Error('Missing translations NDJSON path.');
@@ -58,10 +292,16 @@ export async function buildPak(options: PackOptions): Promise<void> {
       return;
     }
 
-    const pythonExecutable = detectPython(pythonPath);
-    const buildScriptPath = fileURLToPath(new URL('../../scripts/build_locres.py', import.meta.url));
-
-    await runCommand(pythonExecutable, [buildScriptPath, '--input', translationsPath, '--output', locresPath]);
+    if (options.locresPath) {
+      await cp(options.locresPath, locresPath);
+    } else {
+      const buildArgs = ['--input', translationsPath, '--output', locresPath];
+      for (const overlay of await findOverlays(assetLayers)) {
+        buildArgs.push('--overlay', overlay);
+      }
+      buildArgs.push(...(await statsArgs(profile, statsDir, pakBase)));
+      await worker.run('build_locres', buildArgs);
+    }
 
     if (fmtItems.length > 0) {
       await writeFormatStringFiles(patchRoot, fmtItems);
@@ -87,14 +327,16 @@ export async function buildPak(options: PackOptions): Promise<void> {
 
     const finalDir = path.resolve(outputDir);
     await mkdir(finalDir, { recursive: true });
-    const finalBaseName = pakBase.startsWith('~') ? pakBase : `~${pakBase}`;
-    const finalPakPath = path.join(finalDir, `${finalBaseName}.pak`);
+    const finalPakPath = path.join(finalDir, pakFileName(pakBase));
     await rename(pakTempPath, finalPakPath);
 
     console.log(`[${language ?? 'default'}] Locres written to ${locresPath}`);
     console.log(`[${language ?? 'default'}] Packed PAK generated at ${finalPakPath}`);
     console.log(`[${language ?? 'default'}] Translated entries included: ${translatedEntries.length}`);
   } finally {
+    if (!options.worker) {
+      await worker.close();
+    }
     if (!keepTemp) {
       await rm(tempRoot, { recursive: true, force: true });
     } else {
@@ -1,41 +1,32 @@
 import { spawn, spawnSync } from 'node:child_process';
 
-export interface CommandResult {
-  stdout: string;
-  stderr: string;
-}
+let detectedPython: string | undefined;
 
 export function detectPython(preferred?: string): string {
   if (preferred) {
     return preferred;
   }
+  if (detectedPython) {
+    return detectedPython;
+  }
   const candidates = ['python3', 'python'];
   for (const exe of candidates) {
     const result = spawnSync(exe, ['--version'], { stdio: 'ignore' });
     if (result.status === 0 && !result.error) {
+      detectedPython = exe;
       return exe;
     }
   }
   throw new Error('Unable to find a Python interpreter (tried python3 and python).');
 }
 
-export async function runCommand(command: string, args: string[]): Promise<CommandResult> {
+export async function runCommand(command: string, args: string[]): Promise<void> {
   return new Promise((resolve, reject) => {
-    const proc = spawn(command, args, { stdio: ['ignore', 'pipe', 'pipe'] });
-    let stdout = '';
-    let stderr = '';
-    proc.stdout.on('data', (chunk) => {
-      stdout += chunk.toString();
-      process.stdout.write(chunk);
-    });
-    proc.stderr.on('data', (chunk) => {
-      stderr += chunk.toString();
-      process.stderr.write(chunk);
-    });
+    const proc = spawn(command, args, { stdio: ['ignore', 'inherit', 'inherit'] });
     proc.on('error', (error) => reject(error));
     proc.on('close', (code) => {
       if (code === 0) {
-        resolve({ stdout, stderr });
+        resolve();
       } else {
         reject(new Error(`${command} exited with code ${code}`));
       }
@@ -0,0 +1,149 @@
+import { spawn, type ChildProcessWithoutNullStreams } from 'node:child_process';
+import { createInterface } from 'node:readline';
+import { fileURLToPath } from 'node:url';
+import { detectPython } from './python.js';
+
+export type WorkerMethod = 'build_locres' | 'import_locres';
+
+interface PendingCall {
+  method: string;
+  resolve: (value: unknown) => void;
+  reject: (error: Error) => void;
+}
+
+interface WorkerMessage {
+  id?: number | null;
+  method?: string;
+  params?: { id?: number | null; text?: string };
+  result?: unknown;
+  error?: { code: number; message: string };
+}
+
+const workerScriptPath = fileURLToPath(new URL('../../scripts/locres_worker.py', import.meta.url));
+
+/**
+ * Client for scripts/locres_worker.py: one Python process serving JSON-RPC
+ * calls over stdin/stdout, so pylocres, the compiled skip rules and the
+ * source-hash cache stay loaded across languages and variants. The process
+ * starts on the first call; script stdout is streamed as it is printed.
+ */
+export class PythonWorker {
+  private proc?: ChildProcessWithoutNullStreams;
+  private exited?: Promise<void>;
+  private nextId = 1;
+  private readonly pending = new Map<number, PendingCall>();
+
+  constructor(private readonly pythonPath?: string) {}
+
+  async run(method: WorkerMethod, args: string[]): Promise<void> {
+    const result = (await this.call(method, { args })) as { status?: number } | null;
+    const status = result?.status ?? 0;
+    if (status !== 0) {
+      throw new Error(`${method} exited with code ${status}`);
+    }
+  }
+
+  async close(): Promise<void> {
+    if (!this.proc || !this.exited) {
+      return;
+    }
+    if (this.proc.exitCode === null && this.proc.signalCode === null) {
+      try {
+        await this.call('shutdown');
+      } catch {
+        this.proc.kill();
+      }
+    }
+    await this.exited;
+    this.proc = undefined;
+    this.exited = undefined;
+  }
+
+  private call(method: string, params?: Record<string, unknown>): Promise<unknown> {
+    const proc = this.start();
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { method, resolve, reject });
+      proc.stdin.write(`${JSON.stringify({ jsonrpc: '2.0', id, method, params })}\n`);
+    });
+  }
+
+  private start(): ChildProcessWithoutNullStreams {
+    if (this.proc) {
+      return this.proc;
+    }
+    const proc = spawn(detectPython(this.pythonPath), [workerScriptPath]);
+    proc.stderr.on('data', (chunk) => process.stderr.write(chunk));
+
+    const lines = createInterface({ input: proc.stdout, crlfDelay: Infinity });
+    lines.on('line', (line) => this.dispatch(line));
+
+    this.exited = new Promise((resolve) => {
+      proc.on('error', (error) => {
+        this.failPending(error);
+        resolve();
+      });
+      proc.on('close', (code, signal) => {
+        this.failPending(new Error(`Python worker exited (${signal ?? `code ${code}`})`));
+        this.proc = undefined;
+        resolve();
+      });
+    });
+    this.proc = proc;
+    return proc;
+  }
+
+  private dispatch(line: string): void {
+    if (!line.trim()) {
+      return;
+    }
+    let message: WorkerMessage;
+    try {
+      message = JSON.parse(line) as WorkerMessage;
+    } catch {
+      process.stdout.write(`${line}\n`);
+      return;
+    }
+
+    if (message.method === 'output') {
+      process.stdout.write(message.params?.text ?? '');
+      return;
+    }
+    if (typeof message.id !== 'number') {
+      if (message.error) {
+        console.error(`Python worker: ${message.error.message}`);
+      }
+      return;
+    }
+
+    const call = this.pending.get(message.id);
+    if (!call) {
+      return;
+    }
+    this.pending.delete(message.id);
+    if (message.error) {
+      call.reject(new Error(`${call.method} failed: ${message.error.message}`));
+    } else {
+      call.resolve(message.result);
+    }
+  }
+
+  private failPending(error: Error): void {
+    for (const call of this.pending.values()) {
+      call.reject(error);
+    }
+    this.pending.clear();
+  }
+}
+
+export async function withPythonWorker<T>(
+  pythonPath: string | undefined,
+  body: (worker: PythonWorker) => Promise<T>,
+): Promise<T> {
+  const worker = new PythonWorker(pythonPath);
+  try {
+    return await body(worker);
+  } finally {
+    await worker.close();
+  }
+}
@@ -1,5 +1,9 @@
-import { access, mkdir, readFile, writeFile, rename, lstat } from 'node:fs/promises';
+import { spawn } from 'node:child_process';
+import { createHash } from 'node:crypto';
+import { mkdir, readFile, writeFile, rename, lstat, stat, unlink } from 'node:fs/promises';
 import path from 'node:path';
+import process from 'node:process';
+import { gunzipSync, gzipSync } from 'node:zlib';
 import type { LocalizationEntry } from '../types.js';
 import { sanitizeTranslationItem, sanitizeTranslationItems, shouldSkipTranslation } from './skipList.js';
 
@@ -18,6 +22,20 @@ const CRC32_TABLE = (() => {
 
 const GIT_LFS_POINTER_PREFIX = 'version https://git-lfs.github.com/spec/';
 
+// Sharded catalog layout, shared with scripts/catalog_shards.py.
+export const SHARD_MANIFEST_NAME = 'manifest.json';
+const SHARD_LAYOUT_VERSION = 1;
+const SHARD_SUFFIX = '.ndjson';
+
+// Compressed single-file catalogs, shared with scripts/catalog_compression.py.
+export type CatalogCompression = 'gzip' | 'xz';
+const CATALOG_COMPRESSIONS: Array<[string, CatalogCompression]> = [
+  ['.gz', 'gzip'],
+  ['.xz', 'xz'],
+];
+const COMPRESSION_LEVEL_ENV = 'CATALOG_COMPRESSION_LEVEL';
+const DEFAULT_COMPRESSION_LEVEL = 6;
+
 function computeCrc32(buffer: Buffer): number {
   let crc = 0 ^ -1;
   for (let i = 0; i < buffer.length; i += 1) {
@@ -136,7 +154,7 @@ async function resolveGitDir(): Promise<string> {
   throw new Error('Unable to resolve .git directory required for Git LFS objects.');
 }
 
-async function readLfsObject(pointer: GitLfsPointerInfo, label: string): Promise<string> {
+async function readLfsObject(pointer: GitLfsPointerInfo, label: string): Promise<Buffer> {
   const gitDir = await resolveGitDir();
   const objectPath = path.join(
     gitDir,
@@ -148,7 +166,7 @@ async function readLfsObject(pointer: GitLfsPointerInfo, label: string): Promise
   );
 
   try {
-    return await readFile(objectPath, 'utf8');
+    return await readFile(objectPath);
   } catch (error) {
     if ((error as NodeJS.ErrnoException).code === 'ENOENT') {
       throw new GitLfsObjectMissingError(label, pointer.oid);
@@ -162,9 +180,106 @@ export async function materializeLfsContent(raw: string, label: string): Promise
   if (!pointer) {
     return raw;
   }
+  return (await readLfsObject(pointer, label)).toString('utf8');
+}
+
+/** Like `materializeLfsContent`, for bytes that may be compressed. */
+export async function materializeLfsBuffer(raw: Buffer, label: string): Promise<Buffer> {
+  // Pointer files are a few short lines; do not decode whole catalogs to check.
+  const pointer = raw.length <= 1024 ? parseLfsPointer(raw.toString('utf8')) : null;
+  if (!pointer) {
+    return raw;
+  }
   return readLfsObject(pointer, label);
 }
 
+export function catalogCompression(filePath: string): CatalogCompression | null {
+  const suffix = path.extname(filePath).toLowerCase();
+  const match = CATALOG_COMPRESSIONS.find(([candidate]) => candidate === suffix);
+  return match ? match[1] : null;
+}
+
+async function fileExists(filePath: string): Promise<boolean> {
+  try {
+    return (await stat(filePath)).isFile();
+  } catch {
+    return false;
+  }
+}
+
+async function existingCatalogFile(filePath: string): Promise<string | null> {
+  const candidates = [filePath];
+  if (!catalogCompression(filePath)) {
+    candidates.push(...CATALOG_COMPRESSIONS.map(([suffix]) => `${filePath}${suffix}`));
+  }
+  for (const candidate of candidates) {
+    if (await fileExists(candidate)) {
+      return candidate;
+    }
+  }
+  return null;
+}
+
+/**
+ * The file holding the single-file catalog `filePath`: the path itself, or its
+ * `.gz`/`.xz` variant when only that exists (`filePath` when neither does).
+ */
+export async function resolveCatalogFile(filePath: string): Promise<string> {
+  return (await existingCatalogFile(filePath)) ?? filePath;
+}
+
+function compressionLevel(): number {
+  const configured = process.env[COMPRESSION_LEVEL_ENV]?.trim();
+  if (!configured) {
+    return DEFAULT_COMPRESSION_LEVEL;
+  }
+  const level = Number(configured);
+  if (!Number.isInteger(level) || level < 0 || level > 9) {
+    throw new Error(`${COMPRESSION_LEVEL_ENV} must be an integer between 0 and 9, got ${configured}`);
+  }
+  return level;
+}
+
+/** Node's zlib has no xz codec, so xz goes through the `xz` command. */
+function runXz(args: string[], input: Buffer): Promise<Buffer> {
+  return new Promise((resolve, reject) => {
+    const proc = spawn('xz', args, { stdio: ['pipe', 'pipe', 'pipe'] });
+    const stdout: Buffer[] = [];
+    const stderr: Buffer[] = [];
+    proc.stdout.on('data', (chunk: Buffer) => stdout.push(chunk));
+    proc.stderr.on('data', (chunk: Buffer) => stderr.push(chunk));
+    proc.on('error', (error) => reject(new Error(`Unable to run xz for compressed catalogs: ${error.message}`)));
+    proc.on('close', (code) => {
+      if (code === 0) {
+        resolve(Buffer.concat(stdout));
+      } else {
+        reject(new Error(`xz exited with code ${code}: ${Buffer.concat(stderr).toString('utf8').trim()}`));
+      }
+    });
+    proc.stdin.end(input);
+  });
+}
+
+export async function decompressCatalog(content: Buffer, compression: CatalogCompression | null): Promise<Buffer> {
+  if (compression === 'gzip') {
+    return gunzipSync(content);
+  }
+  if (compression === 'xz') {
+    return runXz(['-d', '-c'], content);
+  }
+  return content;
+}
+
+async function compressCatalog(content: Buffer, compression: CatalogCompression | null): Promise<Buffer> {
+  if (compression === 'gzip') {
+    return gzipSync(content, { level: compressionLevel() });
+  }
+  if (compression === 'xz') {
+    return runXz(['-z', '-c', `-${compressionLevel()}`], content);
+  }
+  return content;
+}
+
 export interface TranslationItem {
   namespace: string;
   key: string;
@@ -186,9 +301,26 @@ export interface MergeResult {
   changedIndices: number[];
 }
 
+function createStringPool(): (value: string | null) => string | null {
+  const pool = new Map<string, string>();
+  return (value) => {
+    if (value === null) {
+      return null;
+    }
+    const shared = pool.get(value);
+    if (shared !== undefined) {
+      return shared;
+    }
+    pool.set(value, value);
+    return value;
+  };
+}
+
 export function parseTranslationContent(raw: string, label = '<string>'): TranslationItem[] {
   const lines = raw.split(/\r?\n/).filter((line) => line.trim().length > 0);
 
+  // Namespaces and source texts repeat across the catalog; keep one copy of each.
+  const share = createStringPool();
   const items: TranslationItem[] = [];
   for (let index = 0; index < lines.length; index += 1) {
     const line = lines[index];
@@ -220,11 +352,11 @@ export function parseTranslationContent(raw: string, label = '<string>'): Transl
 
       const normalizedNamespace = namespace ?? '';
       items.push({
-        namespace: normalizedNamespace,
+        namespace: share(normalizedNamespace) ?? '',
         key,
-        source,
+        source: share(source),
         translated,
-        locresImport,
+        locresImport: share(locresImport),
         importedHash,
       });
     } catch (error) {
@@ -238,11 +370,84 @@ export function parseTranslationContent(raw: string, label = '<string>'): Transl
   return sortItems(sanitizeTranslationItems(items));
 }
 
+export interface ShardManifestEntry {
+  file: string;
+  sha256: string;
+  records: number;
+  bytes: number;
+}
+
+export interface ShardManifest {
+  version: number;
+  buckets: number;
+  shards: ShardManifestEntry[];
+}
+
+export function parseShardManifest(raw: string, label: string): ShardManifest {
+  const parsed = JSON.parse(raw) as Partial<ShardManifest> | null;
+  if (!parsed || parsed.version !== SHARD_LAYOUT_VERSION || !Array.isArray(parsed.shards)) {
+    throw new Error(`${label} is not a version ${SHARD_LAYOUT_VERSION} catalog manifest`);
+  }
+  const buckets = Number(parsed.buckets);
+  if (!Number.isInteger(buckets) || buckets < 1) {
+    throw new Error(`Invalid bucket count in ${label}`);
+  }
+  return { version: SHARD_LAYOUT_VERSION, buckets, shards: parsed.shards };
+}
+
+/**
+ * Directory of the sharded catalog at (or standing in for a missing) `filePath`,
+ * or null for a single-file catalog. `translations/vi.ndjson` stands for
+ * `translations/vi/` once only the sharded layout exists.
+ */
+export async function shardedCatalogDir(filePath: string): Promise<string | null> {
+  const candidates = [filePath];
+  if (filePath.endsWith(SHARD_SUFFIX) && !(await existingCatalogFile(filePath))) {
+    candidates.push(filePath.slice(0, -SHARD_SUFFIX.length));
+  }
+  for (const candidate of candidates) {
+    try {
+      if ((await stat(path.join(candidate, SHARD_MANIFEST_NAME))).isFile()) {
+        return candidate;
+      }
+    } catch {
+      // not a sharded catalog
+    }
+  }
+  return null;
+}
+
+export function shardBucket(namespace: string, buckets: number): number {
+  return createHash('sha1').update(namespace, 'utf8').digest().readUInt32BE(0) % buckets;
+}
+
+export function shardFileName(bucket: number, buckets: number): string {
+  const width = Math.max(2, (buckets - 1).toString(16).length);
+  return `${bucket.toString(16).padStart(width, '0')}${SHARD_SUFFIX}`;
+}
+
+async function readShardedCatalog(dir: string): Promise<string> {
+  const manifestPath = path.join(dir, SHARD_MANIFEST_NAME);
+  const manifest = parseShardManifest(await readFile(manifestPath, 'utf8'), manifestPath);
+  const files = manifest.shards.map((entry) => entry.file).sort();
+  const parts: string[] = [];
+  for (const file of files) {
+    const shardPath = path.join(dir, file);
+    parts.push(await materializeLfsContent(await readFile(shardPath, 'utf8'), shardPath));
+  }
+  return parts.join('\n');
+}
+
 export async function loadTranslationFile(filePath: string): Promise<TranslationItem[]> {
+  const shardedDir = await shardedCatalogDir(filePath);
+  if (shardedDir) {
+    return parseTranslationContent(await readShardedCatalog(shardedDir), shardedDir);
+  }
+  const catalogPath = await resolveCatalogFile(filePath);
   try {
-    const raw = await readFile(filePath, 'utf8');
-    const resolvedContent = await materializeLfsContent(raw, filePath);
-    return parseTranslationContent(resolvedContent, filePath);
+    const raw = await materializeLfsBuffer(await readFile(catalogPath), catalogPath);
+    const content = await decompressCatalog(raw, catalogCompression(catalogPath));
+    return parseTranslationContent(content.toString('utf8'), catalogPath);
   } catch (error) {
     if ((error as NodeJS.ErrnoException).code === 'ENOENT') {
       return [];
@@ -276,9 +481,78 @@ export async function saveTranslationFile(
     return JSON.stringify(record);
   });
 
-  const tmpPath = `${filePath}.tmp`;
-  await writeFile(tmpPath, lines.join('\n') + (lines.length > 0 ? '\n' : ''), 'utf8');
-  await rename(tmpPath, filePath);
+  const shardedDir = await shardedCatalogDir(filePath);
+  if (shardedDir) {
+    await saveShardedCatalog(shardedDir, sorted, lines);
+    return;
+  }
+
+  const catalogPath = await resolveCatalogFile(filePath);
+  const content = Buffer.from(lines.join('\n') + (lines.length > 0 ? '\n' : ''), 'utf8');
+  const tmpPath = `${catalogPath}.tmp`;
+  await writeFile(tmpPath, await compressCatalog(content, catalogCompression(catalogPath)));
+  await rename(tmpPath, catalogPath);
+}
+
+async function sameFileContent(filePath: string, content: Buffer, sha256: string): Promise<boolean> {
+  try {
+    const info = await stat(filePath);
+    if (info.size !== content.length) {
+      return false;
+    }
+    return createHash('sha256').update(await readFile(filePath)).digest('hex') === sha256;
+  } catch {
+    return false;
+  }
+}
+
+/**
+ * Write sorted records into their namespace shards. Shards whose bytes do not
+ * change are left untouched (git and LFS see no change), emptied shards are
+ * removed, and the manifest is written last.
+ */
+async function saveShardedCatalog(dir: string, items: TranslationItem[], lines: string[]): Promise<void> {
+  const manifestPath = path.join(dir, SHARD_MANIFEST_NAME);
+  const previous = parseShardManifest(await readFile(manifestPath, 'utf8'), manifestPath);
+  const shardLines = new Map<string, string[]>();
+  items.forEach((item, index) => {
+    const file = shardFileName(shardBucket(item.namespace, previous.buckets), previous.buckets);
+    const bucketLines = shardLines.get(file);
+    if (bucketLines) {
+      bucketLines.push(lines[index]);
+    } else {
+      shardLines.set(file, [lines[index]]);
+    }
+  });
+
+  const shards: ShardManifestEntry[] = [];
+  for (const file of Array.from(shardLines.keys()).sort()) {
+    const bucketLines = shardLines.get(file) ?? [];
+    const content = Buffer.from(bucketLines.join('\n') + '\n', 'utf8');
+    const sha256 = createHash('sha256').update(content).digest('hex');
+    const shardPath = path.join(dir, file);
+    if (!(await sameFileContent(shardPath, content, sha256))) {
+      const tmpPath = `${shardPath}.tmp`;
+      await writeFile(tmpPath, content);
+      await rename(tmpPath, shardPath);
+    }
+    shards.push({ file, sha256, records: bucketLines.length, bytes: content.length });
+  }
+
+  for (const entry of previous.shards) {
+    if (!shardLines.has(entry.file)) {
+      await unlink(path.join(dir, entry.file)).catch((error: NodeJS.ErrnoException) => {
+        if (error.code !== 'ENOENT') {
+          throw error;
+        }
+      });
+    }
+  }
+
+  const manifest: ShardManifest = { version: SHARD_LAYOUT_VERSION, buckets: previous.buckets, shards };
+  const tmpManifest = `${manifestPath}.tmp`;
+  await writeFile(tmpManifest, JSON.stringify(manifest, null, 2) + '\n', 'utf8');
+  await rename(tmpManifest, manifestPath);
 }
 
 export async function saveTranslationUpdates(